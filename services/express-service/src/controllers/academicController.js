@@ -1,4 +1,6 @@
 import AcademicModel from "../models/academicModel.js";
+import StudentModel from "../models/studentModel.js";
+import ChatbotService from "../services/pythonService/chatbot.service.js";
 
 export const getAcademicRecords = async (req, res) => {
   try {
@@ -126,6 +128,13 @@ export const updateAcademicRecord = async (req, res) => {
       });
     }
 
+    // Academic records are keyed by student_id; the chatbot cache is keyed by citizen_id
+    StudentModel.findOne({ student_id: studentId })
+      .then((student) =>
+        ChatbotService.invalidateUserCache(student?.citizen_id, "academic")
+      )
+      .catch(() => {});
+
     res.status(200).json({
       message: "Academic record updated successfully",
       data: {
@@ -5,7 +5,7 @@ export const chatWithBot = async (req, res) => {
   const startTime = Date.now();
 
   try {
-    const { message, citizen_id} = req.body;
+    const { message, citizen_id, conversation_id } = req.body;
 
     // Validate input
     if (
@@ -20,11 +20,12 @@ export const chatWithBot = async (req, res) => {
     }
 
     // Call Python service via gRPC
-    const response = await ChatbotService.chat_v2(
+    const response = await ChatbotService.chat(
       message,
       citizen_id,
+      conversation_id,
     );
-    // const response = await ChatbotService.chat(message, conversation_id);
+    // const response = await ChatbotService.chat_v2(message, citizen_id, conversation_id);
 
     const responseTime = Date.now() - startTime;
 
@@ -36,7 +37,7 @@ export const chatWithBot = async (req, res) => {
       sources: response.sources,
       processing_time: response.processing_time,
       response_time: responseTime,
-    //   conversation_id: conversation_id,
+      conversation_id: response.conversation_id,
     });
   } catch (error) {
     const responseTime = Date.now() - startTime;
@@ -52,6 +53,69 @@ export const chatWithBot = async (req, res) => {
   }
 };
 
+// Chat with RAG bot, streaming answer tokens as Server-Sent Events
+export const chatWithBotStream = async (req, res) => {
+  const { message, citizen_id, conversation_id } = req.body;
+
+  if (!message || typeof message !== "string" || message.trim().length === 0) {
+    return res.status(400).json({
+      success: false,
+      error: "Tin nhắn không được để trống",
+    });
+  }
+
+  let call = null;
+  try {
+    // gRPC ChatStream, re-emitted with the same SSE events as POST /api/v1/chat/stream
+    call = ChatbotService.chatStreamGrpc(message, citizen_id, conversation_id);
+    // Browser went away: cancel the call so Python stops generating
+    res.on("close", () => call.cancel());
+
+    res.setHeader("Content-Type", "text/event-stream");
+    res.setHeader("Cache-Control", "no-cache");
+    res.setHeader("Connection", "keep-alive");
+    res.flushHeaders();
+
+    for await (const event of call) {
+      let payload;
+      if (event.type === "token") {
+        payload = { type: "token", text: event.text };
+      } else if (event.type === "done") {
+        const { question, answer, sources, strategy, requires_login, processing_time, suggestion } = event.response;
+        payload = {
+          type: "done",
+          question,
+          answer,
+          sources,
+          strategy,
+          requires_login,
+          processing_time,
+          suggestion,
+          conversation_id: event.response.conversation_id,
+        };
+      } else {
+        payload = { type: "error", error: event.error };
+      }
+      res.write(`data: ${JSON.stringify(payload)}\n\n`);
+    }
+    res.end();
+  } catch (error) {
+    if (res.writableEnded || res.destroyed) return;
+
+    console.error("❌ Chat stream error:", error);
+
+    if (!res.headersSent) {
+      return res.status(500).json({
+        success: false,
+        error: "Xin lỗi, tôi không thể trả lời lúc này. Vui lòng thử lại sau.",
+        details: error.message,
+      });
+    }
+    res.write(`data: ${JSON.stringify({ type: "error", error: error.message })}\n\n`);
+    res.end();
+  }
+};
+
 // Health check for chatbot service
 export const chatHealthCheck = async (req, res) => {
   try {
@@ -75,3 +139,19 @@ export const chatHealthCheck = async (req, res) => {
     });
   }
 };
+
+export const clearChatAnswerCache = async (req, res) => {
+  try {
+    const result = await ChatbotService.clearAnswerCache();
+    console.log("🧹 Chatbot answer cache cleared");
+    res.json({ ...result, timestamp: new Date().toISOString() });
+  } catch (error) {
+    console.error("❌ Chatbot answer cache clear error:", error);
+
+    res.status(500).json({
+      success: false,
+      error: error.message,
+      timestamp: new Date().toISOString(),
+    });
+  }
+};
@@ -1,4 +1,5 @@
 import StudentModel from "../models/studentModel.js";
+import ChatbotService from "../services/pythonService/chatbot.service.js";
 
 export const getStudent = async (req, res) => {
   const { citizen_id } = req.params;
@@ -96,6 +97,7 @@ export const updateStudent = async (req, res) => {
     });
     await student.save();
     console.log('✅ Student saved successfully');
+    ChatbotService.invalidateUserCache(student.citizen_id, "student");
 
     res.status(200).json({ message: "Student updated successfully", student });
   } catch (error) {
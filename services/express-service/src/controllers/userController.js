@@ -1,4 +1,5 @@
 import UserModel from "../models/userModel.js";
+import ChatbotService from "../services/pythonService/chatbot.service.js";
 
 export const updateUser = async (req, res) => {
   console.log('🚀 User Controller - Update user request received');
@@ -77,6 +78,7 @@ export const updateUser = async (req, res) => {
     });
     await user.save();
     console.log('✅ User updated successfully');
+    ChatbotService.invalidateUserCache(user.citizen_id, "user");
 
     res.status(200).json({ message: "User updated successfully", user });
   } catch (error) {
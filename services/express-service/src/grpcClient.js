@@ -27,3 +27,28 @@ const client = new protoDescriptor.base.BaseService(
 );
 
 export default client;
+
+/**
+ * Run the multi-agent loan debate over the DebateLoan server stream.
+ * onRound(round) is called for every round as it finishes ({ round, stage, turns, result });
+ * resolves with the final DebateResult (carried by the last round).
+ */
+export function debateLoan(application, onRound = () => {}) {
+  return new Promise((resolve, reject) => {
+    let result = null;
+    const call = client.DebateLoan({
+      ...application,
+      club: application.club || "",
+      guarantor: application.guarantor || "",
+    });
+
+    call.on("data", (round) => {
+      if (round.result) result = round.result;
+      onRound(round);
+    });
+    call.on("error", reject);
+    call.on("end", () =>
+      result ? resolve(result) : reject(new Error("DebateLoan stream ended without a result"))
+    );
+  });
+}
@@ -1,12 +1,18 @@
 import express from 'express';
-import { chatWithBot, chatHealthCheck } from '../controllers/chatController.js';
+import { chatWithBot, chatWithBotStream, chatHealthCheck, clearChatAnswerCache } from '../controllers/chatController.js';
 
 const router = express.Router();
 
 // POST /api/v1/chat - Chat with RAG bot
 router.post('/chat', chatWithBot);
 
+// POST /api/v1/chat/stream - Chat with RAG bot, answer streamed as Server-Sent Events
+router.post('/chat/stream', chatWithBotStream);
+
 // GET /api/v1/chat/health - Health check for chatbot service
 router.get('/chat/health', chatHealthCheck);
 
+// POST /api/v1/chat/cache/clear - Drop cached knowledge-base answers in the gRPC chat process
+router.post('/chat/cache/clear', clearChatAnswerCache);
+
 export default router;
\ No newline at end of file
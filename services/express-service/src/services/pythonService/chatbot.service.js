@@ -42,7 +42,8 @@ class Chatbot {
     }
   }
 
-  async chat(message, conversationId = "web-chat") {
+  // Chat over the persistent gRPC channel (same answer as POST /api/v1/chat)
+  async chat(message, citizen_id = null, conversation_id = null) {
     return new Promise((resolve, reject) => {
       if (!this.connected || !this.client) {
         reject(new Error("gRPC client not connected"));
@@ -51,7 +52,8 @@ class Chatbot {
 
       const request = {
         message: message,
-        conversation_id: conversationId,
+        citizen_id: citizen_id || "",
+        conversation_id: conversation_id || "",
       };
 
       console.log(`📤 gRPC Request: ${message.substring(0, 50)}...`);
@@ -71,12 +73,30 @@ class Chatbot {
           processing_time: response.processing_time,
           success: response.success,
           error: response.error,
+          strategy: response.strategy,
+          conversation_id: response.conversation_id,
+          requires_login: response.requires_login,
+          suggestion: response.suggestion,
         });
       });
     });
   }
 
-  async chat_v2(message, citizen_id) {
+  // Token stream over gRPC: returns the call, which emits ChatStreamEvent
+  // { type: "token" | "done" | "error", text, response, error } on "data"
+  chatStreamGrpc(message, citizen_id = null, conversation_id = null) {
+    if (!this.connected || !this.client) {
+      throw new Error("gRPC client not connected");
+    }
+
+    return this.client.ChatStream({
+      message,
+      citizen_id: citizen_id || "",
+      conversation_id: conversation_id || "",
+    });
+  }
+
+  async chat_v2(message, citizen_id, conversation_id = null) {
     const response = await fetch("http://127.0.0.1:8000/api/v1/chat", {
       method: "POST",
       headers: {
@@ -85,7 +105,7 @@ class Chatbot {
       body: JSON.stringify({
         message,
         citizen_id: citizen_id,
-        // conversation_id: conversationId,
+        conversation_id: conversation_id,
       }),
     });
 
@@ -98,11 +118,94 @@ class Chatbot {
     return data;
   }
 
-  // Health check method
+  // Server-Sent Events stream of answer tokens; the caller pipes response.body to the client
+  async chat_stream(message, citizen_id, conversation_id = null) {
+    const response = await fetch("http://127.0.0.1:8000/api/v1/chat/stream", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ message, citizen_id, conversation_id }),
+    });
+
+    if (!response.ok) {
+      console.error("❌ HTTP Error:", response.statusText);
+      throw new Error("Failed to communicate with chat API");
+    }
+
+    return response;
+  }
+
+  // Drop cached profile/academic data in the Python chatbot after an update: both the gRPC process
+  // (serves chat) and FastAPI (serves chat_v2 / chat_stream) keep their own cache
+  async invalidateUserCache(citizen_id, scope = null) {
+    if (!citizen_id) return false;
+    const results = await Promise.allSettled([
+      this.callUnary("InvalidateUserCache", { citizen_id, scope: scope || "" }),
+      fetch("http://127.0.0.1:8000/api/v1/cache/invalidate", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({ citizen_id, scope }),
+      }),
+    ]);
+
+    const [grpcResult, httpResult] = results;
+    if (grpcResult.status === "rejected") {
+      console.error("⚠️ Chatbot cache invalidation (gRPC) failed:", grpcResult.reason.message);
+    }
+    if (httpResult.status === "rejected") {
+      console.error("⚠️ Chatbot cache invalidation (HTTP) failed:", httpResult.reason.message);
+    }
+    return grpcResult.status === "fulfilled" && httpResult.status === "fulfilled" && httpResult.value.ok;
+  }
+
+  // Unary call on the gRPC client as a promise
+  callUnary(method, request = {}) {
+    return new Promise((resolve, reject) => {
+      if (!this.connected || !this.client) {
+        reject(new Error("gRPC client not connected"));
+        return;
+      }
+
+      this.client[method](request, (error, response) => {
+        if (error) {
+          console.error(`❌ gRPC ${method} Error:`, error);
+          reject(error);
+          return;
+        }
+        resolve(response);
+      });
+    });
+  }
+
+  // Warm-up state of the Python process serving chat (not the FastAPI one)
+  async ready() {
+    const response = await this.callUnary("Ready");
+    return {
+      ready: response.ready,
+      status: response.status,
+      components: response.components || {},
+      snapshot: JSON.parse(response.snapshot_json || "{}"),
+    };
+  }
+
+  // Drop cached knowledge-base answers in the Python process serving chat (e.g. after uploading documents)
+  async clearAnswerCache() {
+    const response = await this.callUnary("ClearAnswerCache");
+    return {
+      success: response.success,
+      message: response.message,
+      statistics: JSON.parse(response.statistics_json || "{}"),
+    };
+  }
+
+  // Health check method: readiness of the gRPC chat process, without running a chat turn
   async healthCheck() {
     try {
-      const response = await this.chat("health check", "system");
-      return response.success;
+      const response = await this.ready();
+      return response.ready;
     } catch (error) {
       console.error("❌ gRPC Health check failed:", error);
       return false;
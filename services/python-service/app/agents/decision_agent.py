@@ -1,5 +1,6 @@
 import json
 from .base_agent import BaseAgent
+from app.core.loan_rules import FEATURE_NAMES, evaluate_rules, rule_features
 from llama_index.llms.openai import OpenAI
 import os
 import re
@@ -153,14 +154,10 @@ class DecisionAgent(BaseAgent):
                 loan_amount = loan_val
                 break
         
-        # Apply RULE-BASED LOGIC (QUY ĐỊNH 2025)
-        feature_1_thu_nhap = family_income <= 8000000  # Thu nhập ≤ 10M = ưu tiên (PASS)
-        feature_2_hoc_luc = gpa_normalized >= 0.65  # SPECIAL
-        feature_3_truong_hoc = is_public_university  # UPDATED: Trường công lập = PASS
-        feature_4_nganh_uu_tien = major_priority
-        feature_5_bao_lanh = has_guarantor  # UPDATED: Có người bảo lãnh = PASS
-        feature_6_khoan_vay = loan_amount <= 60000000 or loan_amount <= 3000000 * 12  # per year
-        feature_7_no_existing_debt = not has_debt  # SPECIAL - existing_debt=false (không có nợ) = PASS
+        # Apply RULE-BASED LOGIC (QUY ĐỊNH 2025) - shared with the gRPC Predict RPCs (app/core/loan_rules.py)
+        features = rule_features(family_income, gpa_normalized, is_public_university, major_priority, has_guarantor, loan_amount, has_debt)
+        (feature_1_thu_nhap, feature_2_hoc_luc, feature_3_truong_hoc, feature_4_nganh_uu_tien,
+         feature_5_bao_lanh, feature_6_khoan_vay, feature_7_no_existing_debt) = (features[name] for name in FEATURE_NAMES)
         
         # Debug log features
         print(f"[DecisionAgent] 🔍 Feature Analysis:")
@@ -172,15 +169,7 @@ class DecisionAgent(BaseAgent):
         print(f"  F6 Khoản vay: {loan_amount:,} VND ≤ 60M? → {feature_6_khoan_vay}")
         print(f"  F7 Không nợ: Không có nợ hiện tại? → {feature_7_no_existing_debt}")
         
-        return {
-            'feature_1_thu_nhap': feature_1_thu_nhap,
-            'feature_2_hoc_luc': feature_2_hoc_luc,
-            'feature_3_truong_hoc': feature_3_truong_hoc,
-            'feature_4_nganh_uu_tien': feature_4_nganh_uu_tien,
-            'feature_5_bao_lanh': feature_5_bao_lanh,
-            'feature_6_khoan_vay': feature_6_khoan_vay,
-            'feature_7_no_existing_debt': feature_7_no_existing_debt
-        }
+        return features
     
     def _get_default_features(self):
         """Default conservative features when profile parsing fails"""
@@ -231,41 +220,14 @@ class DecisionAgent(BaseAgent):
         # CONVERT SUBJECTIVE TO OBJECTIVE RULES
         features = self.extract_rule_features_from_profile(profile_for_extraction)
         
-        # ÁP DỤNG CHÍNH XÁC QUY ĐỊNH 2025
-        all_features = [
-            features['feature_1_thu_nhap'],    # Feature 1
-            features['feature_2_hoc_luc'],     # Feature 2 (SPECIAL)
-            features['feature_3_truong_hoc'],  # Feature 3
-            features['feature_4_nganh_uu_tien'], # Feature 4
-            features['feature_5_bao_lanh'],    # Feature 5 (SPECIAL)
-            features['feature_6_khoan_vay'],   # Feature 6
-            features['feature_7_no_existing_debt'] # Feature 7 (SPECIAL) - Không có nợ
-        ]
-        
-        # Tính passed_count = số feature passed (True)
-        passed_count = sum(all_features)
-        
-        # Tính special_violations = số failed (False) trong [2,5,7]
-        special_features = [features['feature_2_hoc_luc'], features['feature_5_bao_lanh'], features['feature_7_no_existing_debt']]
-        special_violations = sum(1 for f in special_features if not f)
+        # ÁP DỤNG CHÍNH XÁC QUY ĐỊNH 2025 (app/core/loan_rules.py)
+        rules = evaluate_rules(features)
+        passed_count = rules["passed_count"]
+        special_violations = rules["special_violations"]
         
         # STEP 1: Rule-based Decision (preliminary)
-        rule_based_decision = None
-        rule_based_reason = None
-        
-        if special_violations > 1:
-            rule_based_decision = "reject"
-            rule_based_reason = f"Vi phạm {special_violations} special features (F2,F5,F7) - TỰ ĐỘNG TỪ CHỐI theo quy định."
-        elif special_violations == 1:
-            if passed_count >= 6:
-                rule_based_decision = "approve"
-                rule_based_reason = f"Vi phạm 1 special feature nhưng passed_count = {passed_count} >= 6 - CHẤP NHẬN có điều kiện theo quy định."
-            else:
-                rule_based_decision = "reject"
-                rule_based_reason = f"Vi phạm 1 special feature và passed_count = {passed_count} < 6 - TỪ CHỐI theo quy định."
-        else:  # special_violations == 0 - PASS CẢ 3 SPECIAL FEATURES
-            rule_based_decision = "approve"
-            rule_based_reason = f"PASS cả 3 special features (F2,F5,F7) - CHẤP NHẬN theo quy định (passed_count = {passed_count}/7)."
+        rule_based_decision = rules["decision"]
+        rule_based_reason = rules["reason"]
         
         # STEP 2: Check Agent Consensus (only if rule-based PASS)
         academic_approve = academic_data.get("decision", "").lower() == "approve"
@@ -0,0 +1,188 @@
+"""
+Semantic answer cache for knowledge-base questions
+Near-duplicate questions ("Quy trình vay vốn như thế nào?" / "Quy trình vay vốn ra sao?") reuse a previous
+RAG answer instead of running retrieval and answer synthesis again
+"""
+
+import copy
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.botagent.kb_version import get_knowledge_base_version
+
+
+class SemanticAnswerCache:
+    """
+    In-process cache of (question embedding -> answer) pairs.
+
+    - A lookup returns the most similar cached answer in the same `scope` (e.g. login state) if its cosine
+      similarity is >= `threshold`
+    - Answers are copied on store and on lookup, so callers can't mutate a cached entry (e.g. its sources)
+    - Entries expire after `ttl_seconds`; past `max_entries` the least recently used entry is evicted
+    - The cache remembers the knowledge-base version its answers came from; when `version_fn`
+      reports a new version (documents re-uploaded) the whole cache is dropped
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        ttl_seconds: float = 3600,
+        max_entries: int = 500,
+        version_fn: Optional[Callable[[], str]] = None,
+        name: str = "answer_cache"
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (n, dim) L2-normalized embeddings
+        self._entries: List[Dict[str, Any]] = []
+        self._version: Optional[str] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _check_version(self):
+        """Drop everything if the knowledge base changed since the entries were stored"""
+        if self.version_fn is None:
+            return
+        try:
+            version = self.version_fn()
+        except Exception:
+            return
+        if version != self._version:
+            if self._entries:
+                self._clear_locked()
+                self.invalidations += 1
+                print(f"🧹 Knowledge base changed ({self._version} -> {version}), answer cache cleared")
+            self._version = version
+
+    def _clear_locked(self):
+        self._matrix = None
+        self._entries = []
+
+    def _remove_locked(self, indexes: List[int]):
+        if not indexes:
+            return
+        keep = [i for i in range(len(self._entries)) if i not in set(indexes)]
+        self._entries = [self._entries[i] for i in keep]
+        self._matrix = self._matrix[keep] if keep else None
+
+    def lookup(self, embedding, scope: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a question embedding, among entries stored with the same scope
+
+        Returns:
+            {"answer", "question", "similarity"} or None
+        """
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            self._check_version()
+
+            if vector is None or self._matrix is None:
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            expired = [i for i, entry in enumerate(self._entries) if entry["expires_at"] < now]
+            self._remove_locked(expired)
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            scores = self._matrix @ vector
+            scores[[entry["scope"] != scope for entry in self._entries]] = -np.inf
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best]
+            entry["last_used"] = now
+            entry["hits"] += 1
+            self.hits += 1
+            return {"answer": copy.deepcopy(entry["answer"]), "question": entry["question"], "similarity": round(similarity, 4)}
+
+    def store(self, embedding, question: str, answer: Dict[str, Any], scope: Any = None):
+        """Cache an answer for a question embedding (only looked up again with the same scope)"""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+
+        with self._lock:
+            self._check_version()
+
+            now = time.monotonic()
+            entry = {
+                "question": question,
+                "answer": copy.deepcopy(answer),
+                "scope": scope,
+                "expires_at": now + self.ttl_seconds,
+                "last_used": now,
+                "hits": 0
+            }
+
+            if self._matrix is not None and self._matrix.shape[1] != vector.shape[0]:
+                # Embedding model/dimension changed: old vectors are not comparable
+                self._clear_locked()
+
+            self._entries.append(entry)
+            self._matrix = vector[None, :] if self._matrix is None else np.vstack([self._matrix, vector])
+            self.stores += 1
+
+            while len(self._entries) > self.max_entries:
+                oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]["last_used"])
+                self._remove_locked([oldest])
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._clear_locked()
+            self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.threshold,
+            "knowledge_base_version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global instance for /chat knowledge-base answers
+knowledge_base_answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.92")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500")),
+    version_fn=get_knowledge_base_version,
+    name="knowledge_base_answers"
+)
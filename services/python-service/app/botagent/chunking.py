@@ -1,24 +1,67 @@
 """
 Section-based Text Chunking for RAG Bot
 Split documents into chunks based on logical sections (PHẦN X:)
+
+Chunking is a single pass over lines (chunk_stream): whole documents, page/block streams and
+memory-mapped files (chunk_file) all go through it and produce the same chunks and metadata
+
+Chunks are sized by characters, or by tokenizer count when a token budget is set (CHUNK_MAX_TOKENS):
+token-mode chunks never cross a section, overlap by CHUNK_OVERLAP_TOKENS and carry `token_count`
 """
+import mmap
+import os
 import re
-from typing import List, Dict, Any
-from llama_index.core import Document
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+from llama_index.core import Document, Settings
+
+# Section headers recognised by chunk_stream (at line start, after a blank line)
+STREAM_HEADER_PATTERNS = [
+    re.compile(r'PHẦN\s+\d+[:\.]'),
+    re.compile(r'(?:CHAPTER|SECTION)\s+\d+', re.IGNORECASE)
+]
+# Text buffered by chunk_stream before the document is known to have sections
+STREAM_BUFFER_LIMIT_CHARS = 256 * 1024
+
+# Token budget per chunk (0 = size chunks by characters) and tokens repeated from the previous chunk
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "0"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "40"))
+# Sentence ends, keeping the whitespace after them so chunks reproduce the original text
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])(\s+)')
+WORD_BREAK = re.compile(r'(\s+)')
+
+
+def count_tokens(text: str, tokenizer: Optional[Callable[[str], Sequence]] = None) -> int:
+    """Tokens in text with the given tokenizer, else the LlamaIndex global one (tiktoken cl100k_base)"""
+    return len((tokenizer or Settings.tokenizer)(text))
+
 
 class DocumentChunker:
     """Split documents into chunks based on sections for better RAG performance"""
     
-    def __init__(self, max_section_length: int = 3000, fallback_chunk_size: int = 1000):
+    def __init__(
+        self,
+        max_section_length: int = 3000,
+        fallback_chunk_size: int = 1000,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        tokenizer: Optional[Callable[[str], Sequence]] = None
+    ):
         """
         Initialize chunker with section-based approach
         
         Args:
             max_section_length: Maximum length for a single section before splitting
             fallback_chunk_size: Fallback chunk size for non-sectioned content
+            max_tokens: Token budget per chunk, replaces both character sizes (default CHUNK_MAX_TOKENS, 0 = off)
+            overlap_tokens: Tokens repeated from the end of the previous chunk of the same section (token mode)
+            tokenizer: text -> tokens (default: Settings.tokenizer)
         """
         self.max_section_length = max_section_length
         self.fallback_chunk_size = fallback_chunk_size
+        self.max_tokens = CHUNK_MAX_TOKENS if max_tokens is None else max_tokens
+        overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+        self.tokenizer = tokenizer
     
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
         """Main method to chunk all documents based on sections"""
@@ -35,56 +78,222 @@ class DocumentChunker:
         """
         Chunk document by sections (PHẦN X:, SECTION, CHAPTER, etc.)
         """
-        text = document.text.strip()
+        return list(self.chunk_stream([document]))
+    
+    def chunk_file(self, file_path: str, metadata: Optional[Dict[str, Any]] = None) -> Iterator[Document]:
+        """Lazily chunk a UTF-8 text file through a memory map (pages are read on demand, never the whole file)"""
+        metadata = metadata or {"source": file_path, "filename": file_path.replace("\\", "/").rsplit("/", 1)[-1]}
+        return self.chunk_stream(iter_mmap_blocks(file_path, metadata))
+    
+    def _section_chunks(self, metadata: Dict[str, Any], section_title: str, section_number: int, section_content: str) -> List[Document]:
+        """Chunk documents of one section (split further when longer than max_section_length / max_tokens)"""
         chunks = []
         
-        # Try different section patterns
-        sections = self._extract_sections(text)
+        if self.max_tokens:
+            subsections = self._split_by_tokens(section_content)
+            is_split = len(subsections) > 1
+        else:
+            subsections = [section_content]
+            is_split = len(section_content) > self.max_section_length
+            if is_split:
+                subsections = self._split_long_section(section_content)
+        
+        # If section is too long, split it further
+        if is_split:
+            for j, subsection in enumerate(subsections):
+                chunk_doc = Document(
+                    text=subsection,
+                    metadata={
+                        **metadata,
+                        "section_title": section_title,
+                        "section_number": section_number,
+                        "subsection_number": j + 1,
+                        "chunk_id": f"section_{section_number}_{j+1}",
+                        "chunk_type": "section_based",
+                        "is_subsection": True,
+                        **self._token_metadata(subsection)
+                    }
+                )
+                chunks.append(chunk_doc)
+        else:
+            # Section fits in one chunk
+            chunk_doc = Document(
+                text=subsections[0],
+                metadata={
+                    **metadata,
+                    "section_title": section_title,
+                    "section_number": section_number,
+                    "chunk_id": f"section_{section_number}",
+                    "chunk_type": "section_based",
+                    "is_subsection": False,
+                    **self._token_metadata(subsections[0])
+                }
+            )
+            chunks.append(chunk_doc)
+        
+        return chunks
+    
+    def chunk_stream(self, parts: Iterable[Document]) -> Iterator[Document]:
+        """
+        Streaming version of chunk_by_sections over consecutive parts of ONE document
+        (pages / blocks from DocumentLoader.stream_document).
+        
+        Sections are assembled line by line at PHẦN N: / CHAPTER N headers and chunked as soon as the
+        next header arrives, so only the current section is held in memory. Like chunk_by_sections,
+        text before the first header is dropped and documents with fewer than two sections are
+        chunked by size; that decision needs the text seen so far, which is buffered only up to
+        STREAM_BUFFER_LIMIT_CHARS before the document is treated as unsectioned.
+        """
+        metadata: Dict[str, Any] = {}
+        
+        def lines() -> Iterator[str]:
+            for part in parts:
+                if not metadata:
+                    metadata.update({key: value for key, value in part.metadata.items() if key != "page"})
+                elif "page" in part.metadata:
+                    # A page break separates paragraphs, so a header at the top of a page still counts
+                    yield ""
+                yield from part.text.splitlines()
         
+        line_iter = lines()
+        header_pattern = None
+        raw: Optional[List[str]] = []  # all lines until two sections confirm the structure
+        raw_chars = 0
+        held: Optional[List[str]] = None  # first section, emitted once a second one confirms the structure
+        current: Optional[List[str]] = None
+        confirmed = False
+        section_number = 0
+        previous_blank = True
+        
+        def section_text(section_lines: List[str]) -> Optional[tuple]:
+            title = section_lines[0].strip()
+            body = "\n".join(section_lines[1:]).strip()
+            return (title, f"{title}\n{body}") if body else None
+        
+        def emit(section: tuple) -> List[Document]:
+            nonlocal section_number
+            section_number += 1
+            return self._section_chunks(metadata, section[0], section_number, section[1])
+        
+        for line in line_iter:
+            is_header = False
+            if previous_blank:
+                if header_pattern is None:
+                    header_pattern = next((pattern for pattern in STREAM_HEADER_PATTERNS if pattern.match(line)), None)
+                    is_header = header_pattern is not None
+                else:
+                    is_header = header_pattern.match(line) is not None
+            previous_blank = not line.strip()
+            
+            if not confirmed:
+                raw.append(line)
+                raw_chars += len(line) + 1
+            
+            if is_header:
+                finished = section_text(current) if current else None
+                current = [line]
+                if finished:
+                    if confirmed:
+                        yield from emit(finished)
+                    elif held is None:
+                        held = finished
+                    else:
+                        confirmed, raw = True, None
+                        yield from emit(held)
+                        yield from emit(finished)
+                        held = None
+            elif current is not None:
+                current.append(line)
+            
+            if not confirmed and raw_chars > STREAM_BUFFER_LIMIT_CHARS:
+                # No section structure yet after a long stretch: size-based chunks for the rest
+                print(f"⚠️ No clear sections found in the first {raw_chars} chars, using fallback chunking")
+                yield from self._stream_fallback(metadata, raw, line_iter)
+                return
+        
+        finished = section_text(current) if current else None
+        if confirmed:
+            if finished:
+                yield from emit(finished)
+            print(f"🔍 Found {section_number} sections in document")
+            return
+        if held is not None and finished:
+            yield from emit(held)
+            yield from emit(finished)
+            print(f"🔍 Found {section_number} sections in document")
+            return
+        
+        # No headers: the whole (short) text is buffered, try layout-based sections before size-based chunks
+        text = "\n".join(raw).strip()
+        sections = self._extract_layout_sections(text)
         if len(sections) > 1:
             print(f"🔍 Found {len(sections)} sections in document")
-            
-            for i, section in enumerate(sections):
-                section_title = section.get('title', f'Section {i+1}')
-                section_content = section.get('content', '')
-                
-                # If section is too long, split it further
-                if len(section_content) > self.max_section_length:
-                    subsections = self._split_long_section(section_content)
-                    
-                    for j, subsection in enumerate(subsections):
-                        chunk_doc = Document(
-                            text=subsection,
-                            metadata={
-                                **document.metadata,
-                                "section_title": section_title,
-                                "section_number": i + 1,
-                                "subsection_number": j + 1,
-                                "chunk_id": f"section_{i+1}_{j+1}",
-                                "chunk_type": "section_based",
-                                "is_subsection": True
-                            }
-                        )
-                        chunks.append(chunk_doc)
-                else:
-                    # Section fits in one chunk
-                    chunk_doc = Document(
-                        text=section_content,
+            for section in sections:
+                yield from emit((section['title'], section['content']))
+        else:
+            print(f"⚠️ No clear sections found, using fallback chunking")
+            yield from self._fallback_chunking(Document(text=text, metadata=metadata))
+    
+    def _stream_fallback(self, metadata: Dict[str, Any], head: List[str], rest: Iterator[str]) -> Iterator[Document]:
+        """_fallback_chunking over a line stream, keeping only the unchunked tail in memory"""
+        if self.max_tokens:
+            yield from self._stream_token_fallback(metadata, head, rest)
+            return
+        
+        buffer = "\n".join(head)
+        offset = 0  # position of buffer[0] in the whole text
+        chunk_id = 0
+        
+        def cut(final: bool) -> Iterator[Document]:
+            nonlocal buffer, offset, chunk_id
+            # Without `final`, only cut where the sentence-boundary lookahead window is fully buffered
+            while buffer and (final or len(buffer) > self.fallback_chunk_size + 200):
+                end = self.fallback_chunk_size
+                if end < len(buffer):
+                    sentence_end = max(buffer.rfind(mark, end, end + 200) for mark in ".!?")
+                    if sentence_end != -1:
+                        end = sentence_end + 1
+                chunk_text = buffer[:end].strip()
+                if chunk_text:
+                    yield Document(
+                        text=chunk_text,
                         metadata={
-                            **document.metadata,
-                            "section_title": section_title,
-                            "section_number": i + 1,
-                            "chunk_id": f"section_{i+1}",
-                            "chunk_type": "section_based",
-                            "is_subsection": False
+                            **metadata,
+                            "chunk_id": f"fallback_{chunk_id}",
+                            "chunk_type": "fallback",
+                            "start_pos": offset,
+                            "end_pos": offset + end
                         }
                     )
-                    chunks.append(chunk_doc)
-        else:
-            print(f"⚠️ No clear sections found, using fallback chunking")
-            chunks = self._fallback_chunking(document)
+                    chunk_id += 1
+                buffer = buffer[end:]
+                offset += end
         
-        return chunks
+        yield from cut(final=False)
+        for line in rest:
+            buffer += "\n" + line
+            yield from cut(final=False)
+        yield from cut(final=True)
+    
+    def _stream_token_fallback(self, metadata: Dict[str, Any], head: List[str], rest: Iterator[str]) -> Iterator[Document]:
+        """Token-mode fallback over a line stream: blocks of ~STREAM_BUFFER_LIMIT_CHARS cut at blank lines"""
+        block: List[str] = []
+        block_chars = 0
+        chunk_id = 0
+        
+        def flush() -> Iterator[Document]:
+            nonlocal block, block_chars, chunk_id
+            for chunk_text in self._split_by_tokens("\n".join(block)):
+                yield self._fallback_document(metadata, chunk_text, chunk_id)
+                chunk_id += 1
+            block, block_chars = [], 0
+        
+        for line in (line for lines in (head, rest) for line in lines):
+            if not line.strip() and block_chars >= STREAM_BUFFER_LIMIT_CHARS:
+                yield from flush()
+            block.append(line)
+            block_chars += len(line) + 1
+        yield from flush()
     
     def _extract_sections(self, text: str) -> List[Dict[str, str]]:
         """
@@ -93,7 +302,7 @@ class DocumentChunker:
         sections = []
         
         # Pattern 1: PHẦN X: (Vietnamese sections)
-        section_pattern = r'(?:^|\n\n)(PHẦN\s+\d+[:\.].*?)(?=\n\n(?:PHẦN\s+\d+[:\.]|\Z))'
+        section_pattern = r'(?:^|\n\n)(PHẦN\s+\d+[:\.].*?)(?=\n\nPHẦN\s+\d+[:\.]|\Z)'
         matches = re.findall(section_pattern, text, re.MULTILINE | re.DOTALL)
         
         if matches:
@@ -124,21 +333,31 @@ class DocumentChunker:
                         'content': f"{title}\n{content}"
                     })
         
-        # Pattern 3: Numbered headings (1. 2. 3.)
         if not sections:
-            numbered_pattern = r'(?:^|\n\n)(\d+\.\s+.*?)(?=\n\n\d+\.\s+|\Z)'
-            matches = re.findall(numbered_pattern, text, re.MULTILINE | re.DOTALL)
+            sections = self._extract_layout_sections(text)
+        
+        return sections
+    
+    def _extract_layout_sections(self, text: str) -> List[Dict[str, str]]:
+        """
+        Sections of documents without PHẦN/CHAPTER headers: numbered headings or blank-line blocks
+        """
+        sections = []
+        
+        # Pattern 3: Numbered headings (1. 2. 3.)
+        numbered_pattern = r'(?:^|\n\n)(\d+\.\s+.*?)(?=\n\n\d+\.\s+|\Z)'
+        matches = re.findall(numbered_pattern, text, re.MULTILINE | re.DOTALL)
+        
+        for match in matches:
+            lines = match.strip().split('\n', 1)
+            title = lines[0].strip()
+            content = lines[1].strip() if len(lines) > 1 else ""
             
-            for match in matches:
-                lines = match.strip().split('\n', 1)
-                title = lines[0].strip()
-                content = lines[1].strip() if len(lines) > 1 else ""
-                
-                if content:
-                    sections.append({
-                        'title': title,
-                        'content': f"{title}\n{content}"
-                    })
+            if content:
+                sections.append({
+                    'title': title,
+                    'content': f"{title}\n{content}"
+                })
         
         # Pattern 4: Double line breaks as simple section separator
         if not sections:
@@ -172,27 +391,28 @@ class DocumentChunker:
         # Try to split by paragraphs first
         paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
         
-        current_chunk = ""
+        # Paragraphs of the chunk being built and its joined length (joined once, not re-copied per paragraph)
+        current = []
+        current_length = 0
         
         for paragraph in paragraphs:
             # If adding this paragraph would exceed max length
-            if len(current_chunk) + len(paragraph) + 2 > self.max_section_length:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = paragraph
+            if current_length + len(paragraph) + 2 > self.max_section_length:
+                if current:
+                    chunks.append("\n\n".join(current))
+                    current = [paragraph]
+                    current_length = len(paragraph)
                 else:
                     # Single paragraph too long, split by sentences
                     sentence_chunks = self._split_by_sentences(paragraph)
                     chunks.extend(sentence_chunks)
             else:
-                if current_chunk:
-                    current_chunk += "\n\n" + paragraph
-                else:
-                    current_chunk = paragraph
+                current_length += len(paragraph) + (2 if current else 0)
+                current.append(paragraph)
         
         # Add final chunk
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        if current:
+            chunks.append("\n\n".join(current))
         
         return chunks
     
@@ -204,30 +424,122 @@ class DocumentChunker:
         sentences = re.split(r'(?<=[.!?])\s+', text)
         
         chunks = []
-        current_chunk = ""
+        current = []
+        current_length = 0
         
         for sentence in sentences:
-            if len(current_chunk) + len(sentence) > self.max_section_length:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = sentence
+            if current_length + len(sentence) > self.max_section_length:
+                if current_length:
+                    chunks.append(" ".join(current).strip())
+                    current = [sentence]
+                    current_length = len(sentence)
                 else:
                     # Single sentence too long, just split it
                     chunks.append(sentence[:self.max_section_length])
-                    current_chunk = sentence[self.max_section_length:]
+                    current = [sentence[self.max_section_length:]]
+                    current_length = len(current[0])
+            elif current_length:
+                current.append(sentence)
+                current_length += len(sentence) + 1
             else:
-                current_chunk += (" " if current_chunk else "") + sentence
+                current = [sentence]
+                current_length = len(sentence)
         
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        if current_length and " ".join(current).strip():
+            chunks.append(" ".join(current).strip())
         
         return chunks
     
+    def _token_metadata(self, text: str) -> Dict[str, Any]:
+        return {"token_count": count_tokens(text, self.tokenizer)} if self.max_tokens else {}
+    
+    def _split_by_tokens(self, text: str) -> List[str]:
+        """
+        Pack sentences into chunks of at most max_tokens, keeping the original whitespace between them.
+        Each chunk after the first starts with the last sentences (up to overlap_tokens) of the previous one;
+        sentences over the budget are split by words. Separators are counted as one token each.
+        """
+        # (text, tokens, whitespace before it)
+        units: List[Tuple[str, int, str]] = []
+        for paragraph in (p.strip() for p in text.split('\n\n')):
+            if not paragraph:
+                continue
+            separator = "\n\n"
+            parts = SENTENCE_BREAK.split(paragraph)
+            for sentence, following in zip(parts[::2], parts[1::2] + [""]):
+                tokens = count_tokens(sentence, self.tokenizer)
+                pieces = self._split_words_by_tokens(sentence) if tokens > self.max_tokens else [(sentence, tokens, "")]
+                for k, (piece, piece_tokens, piece_separator) in enumerate(pieces):
+                    units.append((piece, piece_tokens, separator if k == 0 else piece_separator))
+                separator = following
+        
+        chunks = []
+        current: List[Tuple[str, int, str]] = []
+        current_tokens = 0
+        for unit in units:
+            if current and current_tokens + unit[1] + 1 > self.max_tokens:
+                chunks.append("".join(u[0] if i == 0 else u[2] + u[0] for i, u in enumerate(current)))
+                
+                # Overlap: trailing units of the finished chunk, leaving room for this one
+                overlap_budget = min(self.overlap_tokens, self.max_tokens - unit[1] - 1)
+                overlap: List[Tuple[str, int, str]] = []
+                overlap_tokens = 0
+                for previous in reversed(current):
+                    if overlap_tokens + previous[1] + 1 > overlap_budget:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_tokens += previous[1] + 1
+                current, current_tokens = overlap, overlap_tokens
+            
+            current_tokens += unit[1] + (1 if current else 0)
+            current.append(unit)
+        
+        if current:
+            chunks.append("".join(u[0] if i == 0 else u[2] + u[0] for i, u in enumerate(current)))
+        
+        return chunks
+    
+    def _split_words_by_tokens(self, sentence: str) -> List[Tuple[str, int, str]]:
+        """Pieces of an over-budget sentence as (text, tokens, whitespace before it); giant words are cut by characters"""
+        pieces = []
+        current = ""
+        separator = ""  # whitespace before the piece being built
+        gap = ""  # whitespace before the next word
+        parts = WORD_BREAK.split(sentence)
+        for word, following in zip(parts[::2], parts[1::2] + [""]):
+            candidate = f"{current}{gap}{word}" if current else word
+            if current and count_tokens(candidate, self.tokenizer) > self.max_tokens:
+                pieces.append((current, count_tokens(current, self.tokenizer), separator))
+                separator, candidate = gap, word
+            # A UTF-8 character is at most 4 byte-level tokens
+            while count_tokens(candidate, self.tokenizer) > self.max_tokens:
+                cut = max(1, self.max_tokens // 4)
+                pieces.append((candidate[:cut], count_tokens(candidate[:cut], self.tokenizer), separator))
+                separator, candidate = "", candidate[cut:]
+            current, gap = candidate, following
+        if current:
+            pieces.append((current, count_tokens(current, self.tokenizer), separator))
+        return pieces
+    
+    def _fallback_document(self, metadata: Dict[str, Any], text: str, chunk_id: int) -> Document:
+        return Document(
+            text=text,
+            metadata={
+                **metadata,
+                "chunk_id": f"fallback_{chunk_id}",
+                "chunk_type": "fallback",
+                **self._token_metadata(text)
+            }
+        )
+    
     def _fallback_chunking(self, document: Document) -> List[Document]:
         """
         Fallback to simple chunking when no sections are detected
         """
         text = document.text
+        if self.max_tokens:
+            return [self._fallback_document(document.metadata, chunk_text, i) for i, chunk_text in enumerate(self._split_by_tokens(text))]
+        
         chunks = []
         
         # Simple chunking by character count
@@ -269,12 +581,39 @@ class DocumentChunker:
         
         return chunks
 
+def iter_mmap_blocks(file_path: str, metadata: Dict[str, Any], block_bytes: int = 1024 * 1024) -> Iterator[Document]:
+    """
+    Line-aligned text blocks of a UTF-8 file read through mmap: the OS pages the file in on demand,
+    and blocks always end on a newline, so multi-byte characters are never split
+    """
+    with open(file_path, 'rb') as file:
+        if not file.seek(0, 2):
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            start = 0
+            while start < size:
+                end = mapped.find(b'\n', min(start + block_bytes, size) - 1)
+                end = size if end == -1 else end + 1
+                yield Document(text=mapped[start:end].decode('utf-8'), metadata=metadata)
+                start = end
+
 # Simple usage functions
 def chunk_documents_by_sections(documents: List[Document], max_section_length: int = 3000) -> List[Document]:
     """Simple wrapper for section-based chunking"""
     chunker = DocumentChunker(max_section_length=max_section_length)
     return chunker.chunk_documents(documents)
 
+def chunk_document_stream(parts: Iterable[Document], max_section_length: int = 3000) -> Iterator[Document]:
+    """Simple wrapper for streaming section-based chunking of one document's pages/blocks"""
+    chunker = DocumentChunker(max_section_length=max_section_length)
+    return chunker.chunk_stream(parts)
+
+def chunk_file_by_sections(file_path: str, max_section_length: int = 3000, metadata: Optional[Dict[str, Any]] = None) -> Iterator[Document]:
+    """Simple wrapper for lazy section-based chunking of a (large) text file via mmap"""
+    chunker = DocumentChunker(max_section_length=max_section_length)
+    return chunker.chunk_file(file_path, metadata)
+
 def analyze_document_structure(document: Document) -> Dict[str, Any]:
     """Analyze document structure to see how it would be chunked"""
     chunker = DocumentChunker()
@@ -0,0 +1,72 @@
+"""
+Context packing for the RAG synthesizer
+Retrieved chunks are sent to the LLM only up to a fixed token budget (RAG_CONTEXT_TOKENS), so one
+oversized chunk or a long top-k can't blow up prompt size and answer latency
+"""
+
+import os
+from typing import Callable, List, Optional, Sequence
+
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle
+
+from app.botagent.chunking import count_tokens
+
+# Token budget for the retrieved context in one RAG prompt (0 = no limit)
+RAG_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "1500"))
+# A truncated chunk shorter than this isn't worth sending
+MIN_PARTIAL_TOKENS = 50
+
+
+class TokenBudgetPostprocessor(BaseNodePostprocessor):
+    """
+    Keep retrieved nodes in rank order while their LLM-visible text (metadata included) fits `max_tokens`.
+    Nodes that don't fit are skipped in favour of smaller lower-ranked ones; if the best node alone is
+    over budget it is truncated rather than dropped, so the answer always has some context.
+    """
+
+    max_tokens: int = Field(default=RAG_CONTEXT_TOKENS)
+    _tokenizer: Optional[Callable[[str], Sequence]] = PrivateAttr(default=None)
+
+    def __init__(self, max_tokens: int = RAG_CONTEXT_TOKENS, tokenizer: Optional[Callable[[str], Sequence]] = None, **kwargs):
+        super().__init__(max_tokens=max_tokens, **kwargs)
+        self._tokenizer = tokenizer
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "TokenBudgetPostprocessor"
+
+    def _truncate(self, node: NodeWithScore, budget: int) -> NodeWithScore:
+        """Copy of node whose text is cut (at a space) so the LLM-visible content fits budget"""
+        truncated = node.node.model_copy()
+        text = node.node.get_content()
+        while text:
+            truncated.set_content(text)
+            tokens = count_tokens(truncated.get_content(metadata_mode=MetadataMode.LLM), self._tokenizer)
+            if tokens <= budget:
+                break
+            cut = int(len(text) * budget / tokens * 0.9)
+            space = text.rfind(" ", 0, cut)
+            text = text[:space if space > 0 else cut]
+        return NodeWithScore(node=truncated, score=node.score)
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None
+    ) -> List[NodeWithScore]:
+        if self.max_tokens <= 0 or not nodes:
+            return nodes
+
+        packed = []
+        used = 0
+        for node in nodes:
+            tokens = count_tokens(node.node.get_content(metadata_mode=MetadataMode.LLM), self._tokenizer)
+            if used + tokens <= self.max_tokens:
+                packed.append(node)
+                used += tokens
+
+        if not packed and self.max_tokens >= MIN_PARTIAL_TOKENS:
+            packed.append(self._truncate(nodes[0], self.max_tokens))
+        return packed
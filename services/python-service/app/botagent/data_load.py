@@ -1,11 +1,17 @@
 """
 Simple Document Loader for RAG Bot
 Supports: PDF, TXT, MD, Web pages
+
+stream_document() yields a file page by page (PDF) or in line-aligned blocks (TXT/MD) so peak memory
+doesn't grow with the document; feed it to DocumentChunker.chunk_stream()
+load_web_pages() fetches many pages concurrently with HTTP caching (web_crawler.WebCrawler)
 """
 import os
 import aiofiles
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 import requests
 from bs4 import BeautifulSoup
 import PyPDF2
@@ -20,6 +26,18 @@ except ImportError:
     DOC_SUPPORT = False
     print("⚠️  Install docx2txt for .doc/.docx support: pip install docx2txt")
 
+# PDFs with at least this many pages are extracted in a process pool
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+PDF_PAGES_PER_TASK = 8
+TEXT_BLOCK_CHARS = 64 * 1024
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Process-pool worker: open the PDF in this process and extract pages [start, end)"""
+    reader = PyPDF2.PdfReader(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
 class DocumentLoader:
     """Load documents from various sources"""
     
@@ -51,30 +69,101 @@ class DocumentLoader:
         """Load PDF documents"""
         documents = []
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Extract all text
-                full_text = ""
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    full_text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                
-                documents.append(Document(
-                    text=full_text,
-                    metadata={
-                        "source": file_path,
-                        "type": "pdf",
-                        "filename": Path(file_path).name,
-                        "pages": len(pdf_reader.pages)
-                    }
-                ))
+            # Collect page texts and join once (repeated += re-copies the whole text for every page)
+            parts = []
+            page_count = 0
+            for page in self.iter_pdf_pages(file_path):
+                parts.append(f"\n--- Page {page.metadata['page']} ---\n{page.text}\n")
+                page_count = page.metadata["pages"]
+            
+            documents.append(Document(
+                text="".join(parts),
+                metadata={
+                    "source": file_path,
+                    "type": "pdf",
+                    "filename": Path(file_path).name,
+                    "pages": page_count
+                }
+            ))
                 
         except Exception as e:
             print(f"❌ Error loading PDF {file_path}: {e}")
         
         return documents
     
+    def iter_pdf_pages(self, file_path: str, workers: Optional[int] = None) -> Iterator[Document]:
+        """
+        Yield one Document per PDF page, in page order.
+        Large PDFs are extracted in a process pool; at most 2 tasks per worker are in flight,
+        so only a bounded window of pages is ever held in memory.
+        """
+        reader = PyPDF2.PdfReader(file_path)
+        page_count = len(reader.pages)
+        base_metadata = {
+            "source": file_path,
+            "type": "pdf",
+            "filename": Path(file_path).name,
+            "pages": page_count
+        }
+        
+        def page_document(index: int, text: str) -> Document:
+            return Document(text=text, metadata={**base_metadata, "page": index + 1})
+        
+        workers = workers or os.cpu_count() or 1
+        if page_count < PDF_PARALLEL_MIN_PAGES or workers == 1:
+            for index in range(page_count):
+                yield page_document(index, reader.pages[index].extract_text() or "")
+            return
+        
+        del reader
+        ranges = iter([(start, min(start + PDF_PAGES_PER_TASK, page_count)) for start in range(0, page_count, PDF_PAGES_PER_TASK)])
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            
+            def submit_next():
+                page_range = next(ranges, None)
+                if page_range is not None:
+                    pending.append((page_range[0], pool.submit(_extract_page_range, file_path, *page_range)))
+            
+            for _ in range(workers * 2):
+                submit_next()
+            
+            while pending:
+                start, future = pending.popleft()
+                texts = future.result()
+                submit_next()
+                for offset, text in enumerate(texts):
+                    yield page_document(start + offset, text)
+    
+    def iter_text_blocks(self, file_path: str, block_chars: int = TEXT_BLOCK_CHARS) -> Iterator[Document]:
+        """Yield a text/markdown file in line-aligned blocks of about block_chars characters"""
+        base_metadata = {
+            "source": file_path,
+            "type": Path(file_path).suffix[1:],
+            "filename": Path(file_path).name
+        }
+        with open(file_path, 'r', encoding='utf-8') as file:
+            lines, size = [], 0
+            for line in file:
+                lines.append(line)
+                size += len(line)
+                if size >= block_chars:
+                    yield Document(text="".join(lines), metadata=base_metadata)
+                    lines, size = [], 0
+            if lines:
+                yield Document(text="".join(lines), metadata=base_metadata)
+    
+    def stream_document(self, file_path: str) -> Iterator[Document]:
+        """Stream any supported file as consecutive text parts (pages or blocks) for chunk_stream()"""
+        suffix = Path(file_path).suffix.lower()
+        if suffix == '.pdf':
+            yield from self.iter_pdf_pages(file_path)
+        elif suffix in ['.doc', '.docx']:
+            # docx2txt only returns whole documents
+            yield from self.load_doc_file(file_path)
+        else:
+            yield from self.iter_text_blocks(file_path)
+    
     def load_doc_file(self, file_path: str) -> List[Document]:
         """Load .doc/.docx files"""
         documents = []
@@ -157,6 +246,13 @@ class DocumentLoader:
         
         return documents
     
+    async def load_web_pages(self, urls: List[str], include_unchanged: bool = True) -> List[Document]:
+        """Scrape many web pages concurrently; cached pages are revalidated instead of re-downloaded"""
+        from app.botagent.web_crawler import WebCrawler
+        
+        async with WebCrawler() as crawler:
+            return [page["document"] async for page in crawler.crawl(urls, include_unchanged)]
+    
     async def load_directory(self, directory_path: str) -> List[Document]:
         """Load all supported documents from directory"""
         all_documents = []
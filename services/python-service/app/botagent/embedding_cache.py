@@ -0,0 +1,227 @@
+"""
+Query embedding cache
+Repeated queries skip the embedding API round trip: an in-memory LRU tier plus an optional
+on-disk tier of float16 .npy files that other processes (e.g. upload_data.py test queries) share
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from llama_index.embeddings.openai import OpenAIEmbedding
+except ImportError:
+    from llama_index_embeddings_openai import OpenAIEmbedding
+
+
+def normalize_query(text: str) -> str:
+    """Cache key text: Unicode NFC, lowercase, collapsed whitespace"""
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed on (model, dimensions, normalized text).
+
+    - Memory tier: LRU of float32 vectors, bounded by `max_entries`
+    - Disk tier (opt-in, when `cache_dir` is set): one float16 .npy per key, roughly 2 KB for 1024 dims,
+      bounded by `max_disk_entries` (least recently used files are pruned first)
+
+    The async methods do the disk I/O in a worker thread so the event loop never waits on the filesystem.
+    """
+
+    def __init__(self, max_entries: int = 2048, cache_dir: Optional[str] = None, max_disk_entries: int = 50000):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir or None
+        self.max_disk_entries = max_disk_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Files in the disk tier, counted on first write (None until then)
+        self._disk_entries: Optional[int] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def make_key(model: str, dimensions: Optional[int], text: str) -> str:
+        raw = f"{model}|{dimensions}|{normalize_query(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npy")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ---- Memory tier ----
+
+    def _memory_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+            return vector
+
+    # ---- Disk tier (blocking, run via asyncio.to_thread from async code) ----
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            vector = np.load(path).astype(np.float32)
+            os.utime(path)  # mtime = last use, for LRU pruning
+        except Exception:
+            self.disk_errors += 1
+            return None
+        self._remember(key, vector)
+        self.disk_hits += 1
+        return vector
+
+    def _disk_files(self) -> List[os.DirEntry]:
+        files = []
+        if os.path.isdir(self.cache_dir):
+            for shard in os.scandir(self.cache_dir):
+                if shard.is_dir():
+                    files.extend(entry for entry in os.scandir(shard.path) if entry.name.endswith(".npy"))
+        return files
+
+    def _prune_disk(self):
+        """Delete the least recently used files down to 90% of max_disk_entries"""
+        files = sorted(self._disk_files(), key=lambda entry: entry.stat().st_mtime)
+        excess = len(files) - int(self.max_disk_entries * 0.9)
+        for entry in files[:max(excess, 0)]:
+            try:
+                os.remove(entry.path)
+                self.disk_evictions += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_entries = len(files) - max(excess, 0)
+
+    def _disk_set(self, key: str, vector: np.ndarray):
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            is_new = not os.path.exists(path)
+            # Write to a temp file and rename so concurrent readers never see a partial array
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+            np.save(tmp_path, vector.astype(np.float16))
+            os.replace(tmp_path, path)
+        except Exception:
+            self.disk_errors += 1
+            return
+
+        # Approximate when several processes share the directory; pruning recounts from the filesystem
+        with self._lock:
+            count = self._disk_entries
+        if count is None:
+            count = len(self._disk_files())
+        elif is_new:
+            count += 1
+        with self._lock:
+            self._disk_entries = count
+        if count > self.max_disk_entries:
+            self._prune_disk()
+
+    # ---- Public API ----
+
+    def get(self, model: str, dimensions: Optional[int], text: str) -> Optional[List[float]]:
+        """Cached embedding or None"""
+        key = self.make_key(model, dimensions, text)
+        vector = self._memory_get(key)
+        if vector is None and self.cache_dir:
+            vector = self._disk_get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+        return vector.tolist()
+
+    async def aget(self, model: str, dimensions: Optional[int], text: str) -> Optional[List[float]]:
+        """get() with the disk lookup off the event loop"""
+        key = self.make_key(model, dimensions, text)
+        vector = self._memory_get(key)
+        if vector is None and self.cache_dir:
+            vector = await asyncio.to_thread(self._disk_get, key)
+        if vector is None:
+            self.misses += 1
+            return None
+        return vector.tolist()
+
+    def set(self, model: str, dimensions: Optional[int], text: str, embedding: List[float]):
+        """Store an embedding in both tiers"""
+        key = self.make_key(model, dimensions, text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._remember(key, vector)
+        if self.cache_dir:
+            self._disk_set(key, vector)
+
+    async def aset(self, model: str, dimensions: Optional[int], text: str, embedding: List[float]):
+        """set() with the disk write off the event loop"""
+        key = self.make_key(model, dimensions, text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._remember(key, vector)
+        if self.cache_dir:
+            await asyncio.to_thread(self._disk_set, key, vector)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_tier": self.cache_dir,
+            "disk_entries": self._disk_entries,
+            "max_disk_entries": self.max_disk_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_errors": self.disk_errors,
+            "disk_evictions": self.disk_evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global instance shared by every CachedOpenAIEmbedding in this process
+query_embedding_cache = EmbeddingCache(
+    max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048")),
+    # Disk tier is opt-in: set EMBEDDING_CACHE_DIR to share embeddings across processes
+    cache_dir=os.getenv("EMBEDDING_CACHE_DIR", ""),
+    max_disk_entries=int(os.getenv("EMBEDDING_CACHE_MAX_DISK_ENTRIES", "50000"))
+)
+
+
+class CachedOpenAIEmbedding(OpenAIEmbedding):
+    """OpenAIEmbedding whose query embeddings go through query_embedding_cache"""
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        cached = query_embedding_cache.get(self.model_name, self.dimensions, query)
+        if cached is not None:
+            return cached
+
+        embedding = super()._get_query_embedding(query)
+        query_embedding_cache.set(self.model_name, self.dimensions, query, embedding)
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        cached = await query_embedding_cache.aget(self.model_name, self.dimensions, query)
+        if cached is not None:
+            return cached
+
+        embedding = await super()._aget_query_embedding(query)
+        await query_embedding_cache.aset(self.model_name, self.dimensions, query, embedding)
+        return embedding
@@ -0,0 +1,308 @@
+"""
+Hybrid retrieval: local BM25 keyword index + dense vector retrieval, fused with reciprocal rank fusion
+Keyword matching catches regulation-style queries ("Nghị định 07/2021", "Điều 5") that dense retrieval misses
+
+Async retrieval never blocks the event loop: sync-only pieces (Pinecone client, BM25 scoring) run in a thread pool
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from llama_index.core.retrievers import BaseRetriever, VectorIndexRetriever
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
+from llama_index.core.schema import BaseNode, NodeWithScore, QueryBundle, TextNode
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), ".bm25_index.json")
+
+SYLLABLE_PATTERN = re.compile(r"\d+(?:[./-]\d+)*|\w+", re.UNICODE)
+NUMBER_SEPARATORS = re.compile(r"[./-]")
+
+
+def strip_diacritics(text: str) -> str:
+    """'Nghị định' -> 'Nghi dinh' (đ is a separate letter, not a combining mark)"""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+
+def tokenize_vietnamese(text: str) -> List[str]:
+    """
+    Diacritic-aware tokens for BM25:
+    - every syllable as written, plus its diacritic-free form (queries typed without accents still match)
+    - compound numbers ("07/2021", "1.5") whole and split into parts
+    - adjacent-syllable bigrams (diacritic-free), since most Vietnamese words span two syllables
+    """
+    syllables = SYLLABLE_PATTERN.findall(unicodedata.normalize("NFC", text.lower()))
+
+    tokens: List[str] = []
+    plain_syllables: List[str] = []
+    for syllable in syllables:
+        plain = strip_diacritics(syllable)
+        tokens.append(syllable)
+        if plain != syllable:
+            tokens.append(plain)
+        if NUMBER_SEPARATORS.search(syllable):
+            tokens.extend(part for part in NUMBER_SEPARATORS.split(syllable) if part)
+        plain_syllables.append(plain)
+
+    tokens.extend(f"{first}_{second}" for first, second in zip(plain_syllables, plain_syllables[1:]))
+    return tokens
+
+
+class BM25Index:
+    """
+    Incremental in-memory BM25 (Okapi) inverted index over text chunks, persisted as JSON.
+    Nodes keep the same ids as in the vector store so results can be fused by id.
+    When `version_fn` reports a new knowledge-base version (an upload from another process rewrote the
+    JSON file), the next search reloads the index from disk instead of serving the stale copy.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_INDEX_PATH,
+        k1: float = 1.5,
+        b: float = 0.75,
+        version_fn: Optional[Callable[[], str]] = None
+    ):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.version_fn = version_fn
+
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, Any]] = {}  # node_id -> {"text", "metadata", "ref_doc_id", "terms", "length"}
+        self._postings: Dict[str, Dict[str, int]] = {}  # term -> {node_id: term frequency}
+        self._total_length = 0
+        self._version: Optional[str] = None
+        self.reloads = 0
+
+        self._version = self._current_version()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ---- Persistence ----
+
+    def _current_version(self) -> Optional[str]:
+        if self.version_fn is None:
+            return None
+        try:
+            return self.version_fn()
+        except Exception:
+            return self._version
+
+    def _load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            with self._lock:
+                self._docs.clear()
+                self._postings.clear()
+                self._total_length = 0
+                for record in records:
+                    self._add_locked(record["id"], record["text"], record.get("metadata", {}), record.get("ref_doc_id"))
+            print(f"📂 BM25 index loaded: {len(self._docs)} chunks")
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not load BM25 index: {e}")
+            return False
+
+    def _check_version(self):
+        """Reload from disk if the knowledge base changed since the index was loaded"""
+        version = self._current_version()
+        if version == self._version:
+            return
+        self._version = version
+        if self._load():
+            self.reloads += 1
+
+    def persist(self):
+        if not self.path:
+            return
+        with self._lock:
+            records = [
+                {"id": node_id, "text": doc["text"], "metadata": doc["metadata"], "ref_doc_id": doc["ref_doc_id"]}
+                for node_id, doc in self._docs.items()
+            ]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    # ---- Writes ----
+
+    def _add_locked(self, node_id: str, text: str, metadata: Dict[str, Any], ref_doc_id: Optional[str]):
+        if node_id in self._docs:
+            self._remove_locked(node_id)
+
+        # Section titles are short and highly indicative, index them with the body
+        title = metadata.get("section_title", "") if isinstance(metadata, dict) else ""
+        terms = Counter(tokenize_vietnamese(f"{title} {text}" if title else text))
+        length = sum(terms.values())
+
+        self._docs[node_id] = {"text": text, "metadata": metadata, "ref_doc_id": ref_doc_id, "terms": terms, "length": length}
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[node_id] = frequency
+
+    def _remove_locked(self, node_id: str):
+        doc = self._docs.pop(node_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc["length"]
+        for term in doc["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(node_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def add_nodes(self, nodes: Sequence[BaseNode], persist: bool = True):
+        """Index (or re-index) chunks; called while uploading documents"""
+        with self._lock:
+            for node in nodes:
+                self._add_locked(node.node_id, node.get_content(), dict(node.metadata or {}), node.ref_doc_id)
+        if persist:
+            self.persist()
+
+    def remove_nodes(self, node_ids: Sequence[str], persist: bool = True):
+        with self._lock:
+            for node_id in node_ids:
+                self._remove_locked(node_id)
+        if persist:
+            self.persist()
+
+    def clear(self, persist: bool = True):
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._total_length = 0
+        if persist:
+            self.persist()
+
+    # ---- Search ----
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k (node_id, BM25 score)"""
+        self._check_version()
+        with self._lock:
+            doc_count = len(self._docs)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+
+            scores: Dict[str, float] = {}
+            for term, query_frequency in Counter(tokenize_vietnamese(query)).items():
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for node_id, frequency in postings.items():
+                    length_norm = 1 - self.b + self.b * self._docs[node_id]["length"] / avg_length
+                    scores[node_id] = scores.get(node_id, 0.0) + query_frequency * idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def get_node(self, node_id: str) -> Optional[TextNode]:
+        doc = self._docs.get(node_id)
+        if doc is None:
+            return None
+        return TextNode(id_=node_id, text=doc["text"], metadata=doc["metadata"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": len(self._docs),
+            "terms": len(self._postings),
+            "avg_chunk_tokens": round(self._total_length / len(self._docs), 1) if self._docs else 0,
+            "path": self.path,
+            "knowledge_base_version": self._version,
+            "reloads": self.reloads
+        }
+
+
+class ThreadedVectorIndexRetriever(VectorIndexRetriever):
+    """
+    VectorIndexRetriever whose async path stays non-blocking with sync-only vector stores.
+    Query embedding uses the async OpenAI client; if the vector store doesn't implement its own
+    `aquery` (PineconeVectorStore, LocalVectorStore) the search runs in the default thread pool.
+    """
+
+    def _store_is_sync_only(self) -> bool:
+        return type(self._vector_store).aquery is BasePydanticVectorStore.aquery
+
+    async def _aget_nodes_with_embeddings(self, query_bundle_with_embeddings: QueryBundle) -> List[NodeWithScore]:
+        if self._store_is_sync_only():
+            return await asyncio.to_thread(self._get_nodes_with_embeddings, query_bundle_with_embeddings)
+        return await super()._aget_nodes_with_embeddings(query_bundle_with_embeddings)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense + BM25 retrieval fused with reciprocal rank fusion: score(d) = sum 1 / (rrf_k + rank)
+    Dense results under `similarity_cutoff` are dropped before fusion (fused scores are rank based,
+    so a SimilarityPostprocessor can't be applied afterwards).
+    """
+
+    def __init__(
+        self,
+        vector_retriever: BaseRetriever,
+        keyword_index: BM25Index,
+        keyword_top_k: int = 5,
+        top_k: int = 4,
+        rrf_k: int = 60,
+        similarity_cutoff: Optional[float] = 0.3,
+        **kwargs: Any
+    ):
+        self.vector_retriever = vector_retriever
+        self.keyword_index = keyword_index
+        self.keyword_top_k = keyword_top_k
+        self.top_k = top_k
+        self.rrf_k = rrf_k
+        self.similarity_cutoff = similarity_cutoff
+        super().__init__(**kwargs)
+
+    def _fuse(self, dense: List[NodeWithScore], keyword: List[Tuple[str, float]]) -> List[NodeWithScore]:
+        if self.similarity_cutoff is not None:
+            dense = [result for result in dense if result.score is None or result.score >= self.similarity_cutoff]
+
+        fused: Dict[str, float] = {}
+        nodes: Dict[str, BaseNode] = {}
+
+        for rank, result in enumerate(dense, start=1):
+            node_id = result.node.node_id
+            fused[node_id] = fused.get(node_id, 0.0) + 1 / (self.rrf_k + rank)
+            nodes[node_id] = result.node
+
+        for rank, (node_id, _) in enumerate(keyword, start=1):
+            fused[node_id] = fused.get(node_id, 0.0) + 1 / (self.rrf_k + rank)
+            if node_id not in nodes:
+                node = self.keyword_index.get_node(node_id)
+                if node is not None:
+                    nodes[node_id] = node
+
+        ranked = sorted((item for item in fused.items() if item[0] in nodes), key=lambda item: item[1], reverse=True)
+        return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in ranked[:self.top_k]]
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        dense = self.vector_retriever.retrieve(query_bundle)
+        keyword = self.keyword_index.search(query_bundle.query_str, top_k=self.keyword_top_k)
+        return self._fuse(dense, keyword)
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        # Dense (async embedding + vector search) and BM25 (thread pool) run concurrently
+        dense, keyword = await asyncio.gather(
+            self.vector_retriever.aretrieve(query_bundle),
+            asyncio.to_thread(self.keyword_index.search, query_bundle.query_str, self.keyword_top_k)
+        )
+        return self._fuse(dense, keyword)
@@ -0,0 +1,408 @@
+"""
+Incremental knowledge-base ingestion
+Chunks get stable ids derived from a hash of their content, and a local manifest records which ids are
+already in the vector store for each source document. A re-upload only embeds new/changed chunks and
+deletes the vectors of chunks that disappeared, so a one-paragraph edit re-embeds one chunk, not the corpus.
+
+Embedding runs in batches with bounded concurrency and rate-limit-aware retry; every upserted batch is
+checkpointed in the manifest, so a failed large load resumes where it stopped instead of starting over.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from llama_index.core import Document, Settings
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.schema import BaseNode, MetadataMode, NodeRelationship
+
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(__file__), ".ingest_manifest.json")
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))  # chunks per embedding request / upsert
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))  # embedding requests in flight
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+INGEST_STREAM_WINDOW = int(os.getenv("INGEST_STREAM_WINDOW", "512"))  # chunks held in memory by aingest_stream
+DELETE_BATCH_SIZE = 1000  # Pinecone accepts at most 1000 ids per delete call
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceException"}
+
+# Document-level stats (file size, word count...) change with any edit anywhere in the file and
+# positional keys shift when a section is inserted; neither says anything about a chunk's content,
+# so they are kept out of the chunk hash and out of the embedded text (token_count is bookkeeping, not content)
+VOLATILE_METADATA_KEYS = [
+    "size", "word_count", "pages",
+    "section_number", "subsection_number", "chunk_id", "token_count"
+]
+
+
+def content_hash(source: str, text: str) -> str:
+    """Stable chunk id: sha256 over the source document and the exact text that gets embedded"""
+    return hashlib.sha256(f"{source}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, timeouts and 5xx from OpenAI or Pinecone"""
+    status = (
+        getattr(error, "status_code", None)
+        or getattr(error, "status", None)
+        or getattr(getattr(error, "response", None), "status_code", None)
+    )
+    return status in RETRYABLE_STATUS_CODES or type(error).__name__ in RETRYABLE_ERRORS
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Server-suggested wait from a Retry-After header, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def with_retry(
+    operation: Callable[[], Awaitable[Any]],
+    description: str,
+    max_retries: int = INGEST_MAX_RETRIES,
+    retryable: Callable[[Exception], bool] = _is_retryable
+) -> Any:
+    """Run an async operation, retrying retryable errors with exponential backoff + jitter"""
+    for attempt in range(max_retries + 1):
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt == max_retries or not retryable(e):
+                raise
+            delay = _retry_after(e) or min(60.0, 2 ** attempt) * (0.5 + random.random())
+            print(f"⏳ {description} failed ({type(e).__name__}), retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def _aiterate(items: Union[Iterable[Any], AsyncIterable[Any]]):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class IngestionProgress:
+    """Chunks embedded + upserted so far, throughput and ETA (total=None when streaming: no ETA)"""
+
+    def __init__(self, total: Optional[int]):
+        self.total = total
+        self.done = 0
+        self.start = time.time()
+
+    def advance(self, count: int):
+        self.done += count
+        elapsed = max(time.time() - self.start, 1e-6)
+        rate = self.done / elapsed
+        if self.total is None:
+            print(f"📈 {self.done} chunks ({rate:.1f} chunks/s)")
+            return
+        eta = (self.total - self.done) / rate if rate else 0
+        print(f"📈 {self.done}/{self.total} chunks ({self.done / self.total:.0%}, {rate:.1f} chunks/s, ETA {eta:.0f}s)")
+
+
+class IngestionManifest:
+    """
+    JSON manifest of embedded chunks: {"sources": {source: {chunk_id: {"section_title", "chars", "ingested_at"}}}}
+    Written atomically after every successful vector store write, so an interrupted run resumes cleanly.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.sources: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._load()
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.path) and os.path.exists(self.path)
+
+    def _load(self):
+        if not self.exists:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.sources = json.load(f).get("sources", {})
+        except Exception as e:
+            print(f"⚠️ Could not read ingestion manifest, starting empty: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "sources": self.sources}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def chunk_ids(self, source: str) -> set:
+        return set(self.sources.get(source, {}))
+
+    def record(self, source: str, nodes: Sequence[BaseNode]):
+        entries = self.sources.setdefault(source, {})
+        now = time.time()
+        for node in nodes:
+            entries[node.node_id] = {
+                "section_title": node.metadata.get("section_title", ""),
+                "chars": len(node.get_content()),
+                "ingested_at": now
+            }
+
+    def forget(self, source: str, chunk_ids: Sequence[str]):
+        entries = self.sources.get(source, {})
+        for chunk_id in chunk_ids:
+            entries.pop(chunk_id, None)
+        if not entries:
+            self.sources.pop(source, None)
+
+    def clear(self):
+        """Forget every chunk (the vector store was cleared)"""
+        self.sources = {}
+        self.save()
+
+    def total_chunks(self) -> int:
+        return sum(len(entries) for entries in self.sources.values())
+
+
+class IncrementalIngestor:
+    """
+    Delta upload of (section-chunked) documents through a PineconeManager.
+
+    Usage:
+        ingestor = IncrementalIngestor(manager)
+        stats = await ingestor.aingest(chunks)  # chunks from chunk_documents_by_sections
+        stats = await ingestor.aingest_stream(chunk_document_stream(...))  # large corpora, bounded memory
+    """
+
+    def __init__(
+        self,
+        manager,
+        manifest_path: Optional[str] = None,
+        batch_size: int = INGEST_BATCH_SIZE,
+        concurrency: int = INGEST_CONCURRENCY,
+        max_retries: int = INGEST_MAX_RETRIES
+    ):
+        self.manager = manager
+        self.manifest = IngestionManifest(manifest_path or os.getenv("INGEST_MANIFEST_PATH", DEFAULT_MANIFEST_PATH))
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+
+    @staticmethod
+    def _source_of(metadata: Dict[str, Any]) -> str:
+        return metadata.get("source") or metadata.get("filename") or "unknown"
+
+    def build_nodes(self, documents: Sequence[Document]) -> Dict[str, List[BaseNode]]:
+        """Split documents into nodes with content-hash ids, grouped by source (duplicate chunks collapse)"""
+        for document in documents:
+            document.excluded_embed_metadata_keys = sorted(set(document.excluded_embed_metadata_keys) | set(VOLATILE_METADATA_KEYS))
+            document.excluded_llm_metadata_keys = sorted(set(document.excluded_llm_metadata_keys) | set(VOLATILE_METADATA_KEYS))
+
+        nodes = run_transformations(list(documents), Settings.transformations)
+
+        grouped: Dict[str, Dict[str, BaseNode]] = {}
+        renamed: Dict[str, str] = {}
+        for node in nodes:
+            source = self._source_of(node.metadata)
+            node_id = content_hash(source, node.get_content(metadata_mode=MetadataMode.EMBED))
+            renamed[node.node_id] = node_id
+            node.id_ = node_id
+            grouped.setdefault(source, {}).setdefault(node_id, node)
+
+        # Keep prev/next links pointing at the renamed neighbours
+        for node in nodes:
+            for relationship in (NodeRelationship.PREVIOUS, NodeRelationship.NEXT):
+                related = node.relationships.get(relationship)
+                if related is not None and related.node_id in renamed:
+                    related.node_id = renamed[related.node_id]
+
+        return {source: list(by_id.values()) for source, by_id in grouped.items()}
+
+    def plan(self, documents: Sequence[Document]) -> Dict[str, Dict[str, Any]]:
+        """Per source: nodes to embed, chunk ids to delete, count of unchanged chunks"""
+        plan = {}
+        for source, nodes in self.build_nodes(documents).items():
+            known = self.manifest.chunk_ids(source)
+            current = {node.node_id for node in nodes}
+            plan[source] = {
+                "add": [node for node in nodes if node.node_id not in known],
+                "delete": sorted(known - current),
+                "unchanged": len(current & known)
+            }
+        return plan
+
+    async def _embed_batch(self, nodes: List[BaseNode]):
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        embeddings = await with_retry(
+            lambda: Settings.embed_model.aget_text_embedding_batch(texts),
+            f"Embedding {len(nodes)} chunks",
+            self.max_retries
+        )
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+
+    async def _upsert_batch(self, nodes: List[BaseNode]):
+        # Nodes already carry embeddings, so the vector index only upserts them (sync client: thread pool).
+        # Only rate limits / timeouts / 5xx are retried; bad requests (dimension mismatch, auth) fail fast.
+        # BM25 is only updated in memory here: _commit writes it (and bumps the KB version) once per ingest
+        await with_retry(
+            lambda: asyncio.to_thread(self.manager.add_nodes, nodes, raise_on_error=True, persist=False),
+            f"Upserting {len(nodes)} chunks",
+            self.max_retries
+        )
+
+    async def _add_source(self, source: str, nodes: List[BaseNode], progress: IngestionProgress) -> Dict[str, int]:
+        """Embed + upsert one source in batches: chunks checkpointed and batches that failed"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        upsert_lock = asyncio.Lock()
+        batches = [nodes[i:i + self.batch_size] for i in range(0, len(nodes), self.batch_size)]
+
+        async def run(batch: List[BaseNode]) -> int:
+            async with semaphore:
+                await self._embed_batch(batch)
+            async with upsert_lock:
+                await self._upsert_batch(batch)
+                # Checkpoint: a rerun after a crash skips everything recorded here
+                self.manifest.record(source, batch)
+                self.manifest.save()
+            progress.advance(len(batch))
+            return len(batch)
+
+        results = await asyncio.gather(*(run(batch) for batch in batches), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, Exception)]
+        for error in failures[:3]:
+            print(f"❌ Batch failed for {source}: {error}")
+        if failures:
+            print(f"⚠️ {len(failures)}/{len(batches)} batches failed for {source}; rerun to resume from the checkpoint")
+        return {
+            "added": sum(result for result in results if not isinstance(result, Exception)),
+            "failed_batches": len(failures)
+        }
+
+    async def aingest(self, documents: Sequence[Document], dry_run: bool = False) -> Dict[str, Any]:
+        """Embed and upsert new/changed chunks, delete removed ones, and update the manifest"""
+        start_time = time.time()
+        plan = self.plan(documents)
+        stats = {"sources": len(plan), "added": 0, "deleted": 0, "unchanged": 0, "failed_batches": 0, "success": True, "dry_run": dry_run}
+        progress = IngestionProgress(sum(len(changes["add"]) for changes in plan.values()))
+
+        try:
+            for source, changes in plan.items():
+                print(f"📑 {source}: {len(changes['add'])} new/changed, {len(changes['delete'])} removed, {changes['unchanged']} unchanged")
+                stats["unchanged"] += changes["unchanged"]
+                if dry_run:
+                    stats["added"] += len(changes["add"])
+                    stats["deleted"] += len(changes["delete"])
+                    continue
+
+                # Upsert first: if deleting fails afterwards the old chunks linger, but nothing goes missing
+                if changes["add"]:
+                    result = await self._add_source(source, changes["add"], progress)
+                    stats["added"] += result["added"]
+                    if result["failed_batches"]:
+                        stats["failed_batches"] += result["failed_batches"]
+                        stats["success"] = False
+                        continue
+
+                await self._delete_removed(source, changes["delete"], stats)
+        finally:
+            # Also after an error: the manifest already checkpoints these chunks, so a rerun would not re-add them
+            await self._commit(stats)
+
+        stats["manifest_chunks"] = self.manifest.total_chunks()
+        stats["processing_time"] = round(time.time() - start_time, 2)
+        print(f"✅ Ingestion done: +{stats['added']} / -{stats['deleted']} chunks, {stats['unchanged']} unchanged ({stats['processing_time']}s)")
+        return stats
+
+    async def _commit(self, stats: Dict[str, Any]):
+        """Persist BM25 and bump the knowledge-base version once, if this ingest changed anything"""
+        if not stats["dry_run"] and (stats["added"] or stats["deleted"]):
+            await asyncio.to_thread(self.manager.commit)
+
+    async def _delete_removed(self, source: str, chunk_ids: List[str], stats: Dict[str, Any]):
+        """Delete vectors of chunks that disappeared from a source, checkpointing each batch"""
+        for i in range(0, len(chunk_ids), DELETE_BATCH_SIZE):
+            batch = chunk_ids[i:i + DELETE_BATCH_SIZE]
+            if not await asyncio.to_thread(self.manager.delete_documents, batch, persist=False):
+                stats["success"] = False
+                return
+            self.manifest.forget(source, batch)
+            self.manifest.save()
+            stats["deleted"] += len(batch)
+
+    async def aingest_stream(
+        self,
+        documents: Union[Iterable[Document], AsyncIterable[Document]],
+        dry_run: bool = False,
+        window: int = INGEST_STREAM_WINDOW
+    ) -> Dict[str, Any]:
+        """
+        aingest over a (async) stream of chunks: they are consumed `window` at a time and only the ids of the
+        chunks seen so far stay in memory. Removed chunks are deleted once the stream is exhausted.
+        """
+        start_time = time.time()
+        stats = {"sources": 0, "added": 0, "deleted": 0, "unchanged": 0, "failed_batches": 0, "success": True, "dry_run": dry_run}
+        progress = IngestionProgress(None)
+        seen: Dict[str, set] = {}
+        failed_sources = set()
+
+        async def process(batch: List[Document]):
+            for source, nodes in self.build_nodes(batch).items():
+                known = self.manifest.sources.get(source, {})
+                source_seen = seen.setdefault(source, set())
+                fresh = [node for node in nodes if node.node_id not in source_seen]
+                source_seen.update(node.node_id for node in fresh)
+
+                new = [node for node in fresh if node.node_id not in known]
+                stats["unchanged"] += len(fresh) - len(new)
+                if not new:
+                    continue
+                if dry_run:
+                    stats["added"] += len(new)
+                    continue
+                result = await self._add_source(source, new, progress)
+                stats["added"] += result["added"]
+                if result["failed_batches"]:
+                    stats["failed_batches"] += result["failed_batches"]
+                    stats["success"] = False
+                    failed_sources.add(source)
+
+        try:
+            batch: List[Document] = []
+            async for document in _aiterate(documents):
+                batch.append(document)
+                if len(batch) >= window:
+                    await process(batch)
+                    batch = []
+            if batch:
+                await process(batch)
+
+            stats["sources"] = len(seen)
+            for source, source_seen in seen.items():
+                removed = sorted(set(self.manifest.sources.get(source, {})) - source_seen)
+                print(f"📑 {source}: {len(source_seen)} chunks, {len(removed)} removed")
+                if dry_run:
+                    stats["deleted"] += len(removed)
+                elif source not in failed_sources:
+                    # Same order as aingest: a source is only pruned after all of its upserts succeeded
+                    await self._delete_removed(source, removed, stats)
+        finally:
+            # One BM25 write and one version bump per ingest, not per batch (also after an error, see aingest)
+            await self._commit(stats)
+
+        stats["manifest_chunks"] = self.manifest.total_chunks()
+        stats["processing_time"] = round(time.time() - start_time, 2)
+        print(f"✅ Ingestion done: +{stats['added']} / -{stats['deleted']} chunks, {stats['unchanged']} unchanged ({stats['processing_time']}s)")
+        return stats
+
+    def ingest(self, documents: Sequence[Document], dry_run: bool = False) -> Dict[str, Any]:
+        """Synchronous wrapper for scripts without an event loop"""
+        return asyncio.run(self.aingest(documents, dry_run))
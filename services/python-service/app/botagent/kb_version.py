@@ -0,0 +1,34 @@
+"""
+Knowledge-base version marker
+Bumped whenever documents are added to / removed from the vector index so caches built from
+the old contents (e.g. the semantic answer cache) can be dropped, also across processes
+"""
+
+import os
+import time
+import uuid
+
+KB_VERSION_PATH = os.getenv("KB_VERSION_PATH", os.path.join(os.path.dirname(__file__), "kb_version.txt"))
+
+
+def get_knowledge_base_version() -> str:
+    """Current version ("initial" until the first upload from this checkout)"""
+    try:
+        with open(KB_VERSION_PATH, "r", encoding="utf-8") as f:
+            return f.read().strip() or "initial"
+    except FileNotFoundError:
+        return "initial"
+
+
+def bump_knowledge_base_version() -> str:
+    """Record that the knowledge base changed; returns the new version"""
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    try:
+        tmp_path = f"{KB_VERSION_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp_path, KB_VERSION_PATH)
+        print(f"🔖 Knowledge base version: {version}")
+    except Exception as e:
+        print(f"⚠️ Could not write knowledge base version: {e}")
+    return version
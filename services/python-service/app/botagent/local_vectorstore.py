@@ -0,0 +1,358 @@
+"""
+Local in-process vector store (alternative to Pinecone)
+Flat cosine index over NumPy arrays, persisted as a memory-mapped .npy file plus a JSON metadata file,
+with writes appended to a journal in between compactions. The knowledge base is a few hundred section chunks, so exact top-k search is sub-millisecond
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import (
+    build_metadata_filter_fn,
+    metadata_dict_to_node,
+    node_to_metadata_dict,
+)
+
+DEFAULT_PERSIST_DIR = os.path.join(os.path.dirname(__file__), ".vector_index")
+EMBEDDINGS_FILE = "embeddings.npy"
+NODES_FILE = "nodes.json"
+JOURNAL_FILE = "journal.jsonl"
+# The journal is folded into embeddings.npy/nodes.json once it holds as many rows as they do (and at least this many)
+COMPACT_MIN_ROWS = int(os.getenv("LOCAL_VECTOR_COMPACT_MIN_ROWS", "1000"))
+
+
+class LocalVectorStore(BasePydanticVectorStore):
+    """
+    Exact (flat) cosine-similarity vector store.
+
+    - Embeddings are L2-normalized on insert and kept in one (n, dim) float32 matrix
+    - On disk: embeddings.npy (opened with mmap_mode="r") + nodes.json (ids, ref_doc_ids, node payloads)
+      as of the last compaction, plus journal.jsonl: every add/delete appends one line (only the rows it
+      touches), so an ingest of n chunks in batches writes O(n) instead of rewriting the index per batch
+    - Stores node text, so llama_index gets full nodes back like with PineconeVectorStore
+    - When `version_fn` reports a new knowledge-base version (an upload from another process), the next
+      query reloads the index from disk, like BM25Index
+    """
+
+    stores_text: bool = True
+    persist_dir: Optional[str] = None
+
+    _lock: Any = PrivateAttr()
+    _matrix: Optional[np.ndarray] = PrivateAttr(default=None)
+    _ids: List[str] = PrivateAttr(default_factory=list)
+    _ref_doc_ids: List[Optional[str]] = PrivateAttr(default_factory=list)
+    _payloads: List[Dict[str, Any]] = PrivateAttr(default_factory=list)
+    _journal_rows: int = PrivateAttr(default=0)
+    _base_rows: int = PrivateAttr(default=0)
+    _version_fn: Optional[Callable[[], str]] = PrivateAttr(default=None)
+    _version: Optional[str] = PrivateAttr(default=None)
+    _reloads: int = PrivateAttr(default=0)
+
+    def __init__(
+        self,
+        persist_dir: Optional[str] = DEFAULT_PERSIST_DIR,
+        version_fn: Optional[Callable[[], str]] = None,
+        **kwargs: Any
+    ):
+        super().__init__(persist_dir=persist_dir, **kwargs)
+        self._lock = threading.Lock()
+        self._version_fn = version_fn
+        self._version = self._current_version()
+        self._load()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    # ---- Persistence ----
+
+    def _paths(self):
+        return os.path.join(self.persist_dir, EMBEDDINGS_FILE), os.path.join(self.persist_dir, NODES_FILE)
+
+    def _journal_path(self) -> str:
+        return os.path.join(self.persist_dir, JOURNAL_FILE)
+
+    def _current_version(self) -> Optional[str]:
+        if self._version_fn is None:
+            return None
+        try:
+            return self._version_fn()
+        except Exception:
+            return self._version
+
+    def _check_version(self):
+        """Reload from disk if the knowledge base changed since the index was loaded"""
+        version = self._current_version()
+        if version == self._version or not self.persist_dir:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self._version = version
+            self._matrix = None
+            self._ids, self._ref_doc_ids, self._payloads = [], [], []
+            self._journal_rows = self._base_rows = 0
+            self._load()
+            self._reloads += 1
+
+    def _load(self):
+        if not self.persist_dir:
+            return
+        embeddings_path, nodes_path = self._paths()
+        if os.path.exists(embeddings_path) and os.path.exists(nodes_path):
+            with open(nodes_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            self._matrix = np.load(embeddings_path, mmap_mode="r") if records else None
+            self._ids = [record["id"] for record in records]
+            self._ref_doc_ids = [record.get("ref_doc_id") for record in records]
+            self._payloads = [record["payload"] for record in records]
+            self._base_rows = len(records)
+
+        replayed = self._replay_journal()
+        if self._ids or replayed:
+            print(f"📂 Local vector index loaded: {len(self._ids)} vectors from {self.persist_dir} ({replayed} journal entries)")
+
+    def _replay_journal(self) -> int:
+        journal_path = self._journal_path()
+        if not os.path.exists(journal_path):
+            return 0
+
+        replayed = 0
+        good_bytes = 0
+        with open(journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated journal line")
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash mid-write: that write never completed
+                    break
+                if entry["op"] == "add":
+                    records = entry["records"]
+                    self._add_locked(
+                        [record["id"] for record in records],
+                        [record.get("ref_doc_id") for record in records],
+                        [record["payload"] for record in records],
+                        np.asarray(entry["embeddings"], dtype=np.float32)
+                    )
+                    self._journal_rows += len(records)
+                elif entry["op"] == "delete":
+                    wanted = set(entry["ids"])
+                    self._remove_locked([i for i, node_id in enumerate(self._ids) if node_id in wanted])
+                    self._journal_rows += len(wanted)
+                good_bytes += len(line)
+                replayed += 1
+
+        if good_bytes < os.path.getsize(journal_path):
+            # Cut the torn tail off: later appends would land after it and be dropped by the next replay
+            with open(journal_path, "r+b") as f:
+                f.truncate(good_bytes)
+            print(f"⚠️ Local vector journal had a torn last entry, truncated to {replayed} entries")
+        return replayed
+
+    def _journal_locked(self, entry: Dict[str, Any], rows: int):
+        """Append one write to the journal, compacting once the journal outgrows the compacted files"""
+        if not self.persist_dir:
+            return
+        os.makedirs(self.persist_dir, exist_ok=True)
+        with open(self._journal_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._journal_rows += rows
+        if self._journal_rows >= max(self._base_rows, COMPACT_MIN_ROWS):
+            self._persist_locked()
+
+    def _persist_locked(self):
+        """Compaction: rewrite embeddings.npy/nodes.json from memory and drop the journal"""
+        if not self.persist_dir:
+            return
+        os.makedirs(self.persist_dir, exist_ok=True)
+        embeddings_path, nodes_path = self._paths()
+
+        records = [
+            {"id": node_id, "ref_doc_id": ref_doc_id, "payload": payload}
+            for node_id, ref_doc_id, payload in zip(self._ids, self._ref_doc_ids, self._payloads)
+        ]
+        matrix = self._matrix if self._matrix is not None else np.zeros((0, 0), dtype=np.float32)
+
+        # Write both files next to the originals, then swap them in
+        np.save(embeddings_path + ".tmp.npy", np.ascontiguousarray(matrix, dtype=np.float32))
+        with open(nodes_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        os.replace(embeddings_path + ".tmp.npy", embeddings_path)
+        os.replace(nodes_path + ".tmp", nodes_path)
+        # Only after both files are in place: a crash before this line replays the journal on top (idempotent)
+        if os.path.exists(self._journal_path()):
+            os.remove(self._journal_path())
+        self._journal_rows = 0
+        self._base_rows = len(self._ids)
+
+        # Re-open memory-mapped so large indexes don't stay resident after a write
+        if self._matrix is not None and len(self._ids):
+            self._matrix = np.load(embeddings_path, mmap_mode="r")
+
+    def persist(self, persist_path: Optional[str] = None, fs: Any = None) -> None:
+        with self._lock:
+            self._persist_locked()
+
+    # ---- Writes ----
+
+    def add(self, nodes: Sequence[BaseNode], **kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+
+        vectors = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        ids = [node.node_id for node in nodes]
+        ref_doc_ids = [node.ref_doc_id for node in nodes]
+        payloads = [node_to_metadata_dict(node, remove_text=False, flat_metadata=False) for node in nodes]
+
+        with self._lock:
+            self._add_locked(ids, ref_doc_ids, payloads, vectors)
+            self._journal_locked({
+                "op": "add",
+                "records": [
+                    {"id": node_id, "ref_doc_id": ref_doc_id, "payload": payload}
+                    for node_id, ref_doc_id, payload in zip(ids, ref_doc_ids, payloads)
+                ],
+                "embeddings": vectors.tolist()
+            }, len(ids))
+
+        return ids
+
+    def _add_locked(self, ids: List[str], ref_doc_ids: List[Optional[str]], payloads: List[Dict[str, Any]], vectors: np.ndarray):
+        # Re-adding a node replaces it
+        new_ids = set(ids)
+        self._remove_locked([i for i, node_id in enumerate(self._ids) if node_id in new_ids])
+
+        if self._matrix is None or not len(self._ids):
+            self._matrix = vectors
+        else:
+            if self._matrix.shape[1] != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._matrix.shape[1]}")
+            self._matrix = np.vstack([np.asarray(self._matrix), vectors])
+
+        self._ids.extend(ids)
+        self._ref_doc_ids.extend(ref_doc_ids)
+        self._payloads.extend(payloads)
+
+    def _remove_locked(self, indexes: List[int]):
+        if not indexes:
+            return
+        drop = set(indexes)
+        keep = [i for i in range(len(self._ids)) if i not in drop]
+        self._matrix = np.asarray(self._matrix)[keep] if keep else None
+        self._ids = [self._ids[i] for i in keep]
+        self._ref_doc_ids = [self._ref_doc_ids[i] for i in keep]
+        self._payloads = [self._payloads[i] for i in keep]
+
+    def _delete_locked(self, indexes: List[int]):
+        if not indexes:
+            return
+        ids = [self._ids[i] for i in indexes]
+        self._remove_locked(indexes)
+        self._journal_locked({"op": "delete", "ids": ids}, len(ids))
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        with self._lock:
+            self._delete_locked([i for i, doc_id in enumerate(self._ref_doc_ids) if doc_id == ref_doc_id])
+
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+        **delete_kwargs: Any,
+    ) -> None:
+        with self._lock:
+            self._delete_locked(self._matching_indexes(node_ids, filters))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._ids, self._ref_doc_ids, self._payloads = [], [], []
+            self._persist_locked()
+
+    # ---- Reads ----
+
+    def _matching_indexes(self, node_ids: Optional[List[str]], filters: Optional[MetadataFilters]) -> List[int]:
+        indexes = range(len(self._ids))
+        if node_ids is not None:
+            wanted = set(node_ids)
+            indexes = [i for i in indexes if self._ids[i] in wanted]
+        if filters is not None:
+            metadata = {self._ids[i]: self._payloads[i] for i in indexes}
+            matches = build_metadata_filter_fn(lambda node_id: metadata[node_id], filters)
+            indexes = [i for i in indexes if matches(self._ids[i])]
+        return list(indexes)
+
+    def get_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+    ) -> List[BaseNode]:
+        with self._lock:
+            return [metadata_dict_to_node(self._payloads[i]) for i in self._matching_indexes(node_ids, filters)]
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.query_embedding is None:
+            raise ValueError("LocalVectorStore only supports embedding queries")
+
+        self._check_version()
+
+        with self._lock:
+            if self._matrix is None or not len(self._ids):
+                return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+            vector = np.asarray(query.query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            scores = np.asarray(self._matrix @ (vector / norm if norm else vector))
+
+            if query.node_ids is not None or query.filters is not None:
+                candidates = np.asarray(self._matching_indexes(query.node_ids, query.filters), dtype=np.int64)
+            else:
+                candidates = np.arange(len(self._ids))
+            if not len(candidates):
+                return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+            top_k = min(query.similarity_top_k, len(candidates))
+            candidate_scores = scores[candidates]
+            # argpartition keeps top-k selection O(n) before the final small sort
+            top = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-candidate_scores[top])]
+            indexes = candidates[top]
+
+            return VectorStoreQueryResult(
+                nodes=[metadata_dict_to_node(self._payloads[i]) for i in indexes],
+                similarities=[float(scores[i]) for i in indexes],
+                ids=[self._ids[i] for i in indexes]
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "total_vectors": len(self._ids),
+            "dimension": int(self._matrix.shape[1]) if self._matrix is not None and len(self._ids) else 0,
+            "persist_dir": self.persist_dir,
+            "journal_rows": self._journal_rows,
+            "reloads": self._reloads,
+            "knowledge_base_version": self._version
+        }
@@ -5,18 +5,28 @@ Combines document search (RAG) with database function calling via MCP server
 import os
 import time
 import asyncio
-from typing import List, Dict, Any, Optional
+import threading
+import uuid
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable
 from dotenv import load_dotenv
 
 # Import existing components
 from app.botagent.vectordb import PineconeManager
 from app.botagent.mcp_server import StudentDataMCPServer
+from app.botagent.question_classifier import QuestionClassifier
+from app.botagent.answer_cache import knowledge_base_answer_cache
+from app.botagent.embedding_cache import query_embedding_cache
+from app.botagent.hybrid_retrieval import HybridRetriever, ThreadedVectorIndexRetriever
+from app.botagent.context_packing import TokenBudgetPostprocessor
+from app.botagent.session_memory import ChatSessionStore, session_key
+
+# Receives each generated text delta while an answer is streamed
+TokenCallback = Callable[[str], Awaitable[None]]
 
 # LlamaIndex imports with fallback
 try:
     from llama_index.core.chat_engine import CondensePlusContextChatEngine
-    from llama_index.core.memory import ChatMemoryBuffer
-    from llama_index.core import get_response_synthesizer
+    from llama_index.core import get_response_synthesizer, Settings
     from llama_index.core.retrievers import VectorIndexRetriever
     from llama_index.core.query_engine import RetrieverQueryEngine
     from llama_index.core.postprocessor import SimilarityPostprocessor
@@ -32,6 +42,12 @@ except ImportError:
     except ImportError:
         print("❌ Missing OpenAI LLM. Install: pip install llama-index-llms-openai")
 
+# "hybrid" (dense + BM25 with reciprocal rank fusion, when a BM25 index exists) or "vector"
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+
+# Asked once at startup so the first real question finds warm connections and caches
+WARMUP_QUERY = os.getenv("WARMUP_QUERY", "Quy trình vay vốn sinh viên như thế nào?")
+
 class RAGBot:
     """RAG Chatbot with document search and function calling"""
     
@@ -40,7 +56,8 @@ class RAGBot:
         pinecone_api_key: str,
         openai_api_key: str,
         index_name: str = "attacker2",
-        model: str = "gpt-4.1-mini"
+        model: str = "gpt-4.1-mini",
+        vector_backend: Optional[str] = None
     ):
         """Initialize RAG bot with Pinecone, OpenAI, and MCP server"""
         
@@ -54,7 +71,8 @@ class RAGBot:
         # Initialize Pinecone manager
         self.pinecone_manager = PineconeManager(
             api_key=pinecone_api_key,
-            index_name=index_name
+            index_name=index_name,
+            backend=vector_backend
         )
         
         # Connect to existing index
@@ -68,15 +86,23 @@ class RAGBot:
             max_tokens=400
         )
         
+        # Question routing: local classifier first, this small LLM only when it is unsure
+        self.question_classifier = QuestionClassifier()
+        self.classifier_llm = OpenAI(model=model, temperature=0, max_tokens=50)
+        
+        # Near-duplicate knowledge-base questions reuse earlier answers
+        self.answer_cache = knowledge_base_answer_cache
+        
         # Load existing vector index
         if not self.pinecone_manager._load_existing_index():
             raise Exception("Failed to load existing vector index")
         
-        # Create query engine
+        # Create query engines (the streaming one backs stream_chat)
         self.query_engine = self._create_query_engine()
+        self.streaming_query_engine = self._create_query_engine(streaming=True)
         
-        # Chat memory
-        self.memory = ChatMemoryBuffer.from_defaults(token_limit=20000)
+        # Chat memory, one bounded history per conversation
+        self.sessions = ChatSessionStore.from_env()
         
         print(f"✅ RAG Bot initialized with index: {index_name}")
         
@@ -91,29 +117,49 @@ class RAGBot:
                 print(f"❌ MCP connection failed: {e}")
                 raise
     
-    def _create_query_engine(self):
-        """Create query engine for RAG"""
+    def _create_query_engine(self, streaming: bool = False):
+        """Create query engine for RAG (streaming=True: aquery returns an AsyncStreamingResponse)"""
         try:
-            # Create retriever
-            retriever = VectorIndexRetriever(
+            keyword_index = self.pinecone_manager.keyword_index
+            # Not gated on len(keyword_index): the BM25 index reloads itself after an upload from another
+            # process, and with no chunks yet the fusion simply returns the dense results
+            hybrid = RETRIEVAL_MODE == "hybrid"
+            
+            # Create retriever (BM25 recall lets the dense side fetch fewer candidates in hybrid mode)
+            retriever = ThreadedVectorIndexRetriever(
                 index=self.pinecone_manager.vector_index,
-                similarity_top_k=5
+                similarity_top_k=3 if hybrid else 5
             )
-            
+            node_postprocessors = [SimilarityPostprocessor(similarity_cutoff=0.3)]
+            
+            if hybrid:
+                # Similarity cutoff is applied to the dense results inside the retriever, before fusion
+                retriever = HybridRetriever(
+                    vector_retriever=retriever,
+                    keyword_index=keyword_index,
+                    keyword_top_k=3,
+                    top_k=4,
+                    similarity_cutoff=0.3
+                )
+                node_postprocessors = []
+                print(f"🔀 Hybrid retrieval enabled (BM25 over {len(keyword_index)} chunks)")
+
+            # Pack retrieved chunks into a fixed token budget (RAG_CONTEXT_TOKENS) before synthesis
+            node_postprocessors.append(TokenBudgetPostprocessor())
+
             # Create response synthesizer
             response_synthesizer = get_response_synthesizer(
                 llm=self.llm,
                 text_qa_template=self._get_qa_template(),
-                refine_template=self._get_refine_template()
+                refine_template=self._get_refine_template(),
+                streaming=streaming
             )
             
             # Create query engine
             query_engine = RetrieverQueryEngine(
                 retriever=retriever,
                 response_synthesizer=response_synthesizer,
-                node_postprocessors=[
-                    SimilarityPostprocessor(similarity_cutoff=0.3)
-                ]
+                node_postprocessors=node_postprocessors
             )
             
             return query_engine
@@ -151,48 +197,59 @@ class RAGBot:
         
         return refine_template
     
-    async def chat(self, message: str, citizen_id: Optional[str] = None) -> Dict[str, Any]:
-        """Smart chat method using LLM to decide response strategy with conversation memory"""
+    async def chat(
+        self,
+        message: str,
+        citizen_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Smart chat method using LLM to decide response strategy with conversation memory
+        With on_token, LLM-generated answers are streamed to the callback as they are produced
+        The response carries the caller's conversation_id unchanged (a new one is minted for anonymous
+        callers, who send it back on the next turn to continue the conversation)
+        """
         
         start_time = time.time()
+        if not conversation_id and not citizen_id:
+            # Anonymous callers must not share one memory session
+            conversation_id = uuid.uuid4().hex
+        session = session_key(conversation_id, citizen_id)
         
         try:
-            # Add user message to memory
-            from llama_index.core.llms import ChatMessage
-            user_message = ChatMessage(role="user", content=message)
-            self.memory.put(user_message)
+            # Add user message to this conversation's memory
+            await self.sessions.append(session, "user", message)
             
             # Get conversation context for better classification
-            conversation_history = self._get_recent_conversation_context()
+            conversation_history = await self._get_recent_conversation_context(session)
             
-            # Use LLM to classify the question and decide response strategy
+            # Local classifier first; the LLM only decides when it is unsure
             response_strategy = await self._classify_question(message, citizen_id, conversation_history)
             
-            response_dict = {}
-            
             if response_strategy == "direct_answer":
                 # LLM can answer directly without needing documents or personal data
-                response_dict = await self._handle_direct_response(message, start_time, conversation_history)
+                response_dict = await self._handle_direct_response(message, start_time, conversation_history, on_token)
             elif response_strategy == "call_data_db":
                 # Database questions - get data from MCP server
-                response_dict = await self._handle_database_data(message, citizen_id, start_time, conversation_history)
+                response_dict = await self._handle_database_data(message, citizen_id, start_time, conversation_history, on_token)
             elif response_strategy == "personal":
                 # Personal questions - provide general guidance since no personal data available
-                response_dict = await self._handle_personal_guidance(message, start_time, conversation_history)
+                response_dict = await self._handle_personal_guidance(message, start_time, conversation_history, on_token)
             elif response_strategy == "rag_search":
                 # Need to search documents for specific information
-                response_dict = await self._handle_rag_query(message, start_time, conversation_history)
+                response_dict = await self._handle_rag_query(message, start_time, conversation_history, on_token, bool(citizen_id))
             else:
                 # Default to RAG if unsure
-                response_dict = await self._handle_rag_query(message, start_time, conversation_history)
+                response_dict = await self._handle_rag_query(message, start_time, conversation_history, on_token, bool(citizen_id))
             
             # Add assistant response to memory
-            assistant_message = ChatMessage(role="assistant", content=response_dict["response"])
-            self.memory.put(assistant_message)
+            await self.sessions.append(session, "assistant", response_dict["response"])
             
             # Add conversation info to response
-            response_dict["conversation_id"] = id(self.memory)
-            response_dict["memory_tokens"] = len(str(self.memory.get()))
+            history = await self.sessions.get_messages(session)
+            response_dict["conversation_id"] = conversation_id
+            response_dict["memory_tokens"] = sum(len(msg["content"]) for msg in history)
             
             return response_dict
                 
@@ -201,35 +258,84 @@ class RAGBot:
                 "response": f"Xin lỗi, tôi gặp lỗi khi xử lý câu hỏi: {str(e)}",
                 "source": "error",
                 "processing_time": time.time() - start_time,
+                "conversation_id": conversation_id,
                 "error": str(e)
             }
             
             # Still add to memory for debugging
             try:
-                from llama_index.core.llms import ChatMessage
-                error_message = ChatMessage(role="assistant", content=error_response["response"])
-                self.memory.put(error_message)
+                await self.sessions.append(session, "assistant", error_response["response"])
             except:
                 pass
                 
             return error_response
     
-    def _get_recent_conversation_context(self) -> str:
+    async def stream_chat(
+        self,
+        message: str,
+        citizen_id: Optional[str] = None,
+        conversation_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming chat: yields {"type": "token", "text": ...} events while the answer is generated,
+        then one {"type": "done", "result": ...} event with the full chat() result (sources, strategy...).
+        Answers that need no LLM call (login required, cache hits, greetings) arrive as a single token event.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def on_token(text: str):
+            await queue.put(text)
+        
+        task = asyncio.create_task(self.chat(message, citizen_id, conversation_id, on_token=on_token))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        
+        streamed = False
+        try:
+            while True:
+                text = await queue.get()
+                if text is None:
+                    break
+                streamed = True
+                yield {"type": "token", "text": text}
+            
+            result = task.result()
+            if not streamed:
+                yield {"type": "token", "text": result.get("response", "")}
+            yield {"type": "done", "result": result}
+        finally:
+            # Client went away mid-answer: stop generating
+            if not task.done():
+                task.cancel()
+    
+    async def _complete(self, prompt: str, on_token: Optional[TokenCallback] = None) -> str:
+        """LLM completion; with on_token the deltas are streamed to the callback as they arrive"""
+        if on_token is None:
+            response = await self.llm.acomplete(prompt)
+            return str(response).strip()
+        
+        parts = []
+        async for chunk in await self.llm.astream_complete(prompt):
+            if chunk.delta:
+                parts.append(chunk.delta)
+                await on_token(chunk.delta)
+        return "".join(parts).strip()
+    
+    async def _get_recent_conversation_context(self, session: str) -> str:
         """Get recent conversation context for better understanding"""
         try:
-            # Get recent messages from memory
-            chat_history = self.memory.get()
+            # Get recent messages of this conversation only
+            chat_history = await self.sessions.get_messages(session)
             
             if not chat_history:
                 return "Không có lịch sử trò chuyện."
             
-            # Format recent conversation (last 4 messages)
-            recent_messages = chat_history[-6:] if len(chat_history) > 4 else chat_history
+            # Format recent conversation (last 6 messages)
+            recent_messages = chat_history[-6:]
             context_parts = []
             
             for msg in recent_messages:
-                role = "Người dùng" if msg.role == "user" else "Trợ lý"
-                context_parts.append(f"{role}: {msg.content[:100]}")
+                role = "Người dùng" if msg["role"] == "user" else "Trợ lý"
+                context_parts.append(f"{role}: {msg['content'][:100]}")
             
             return "Lịch sử trò chuyện gần đây:\n" + "\n".join(context_parts)
             
@@ -237,18 +343,18 @@ class RAGBot:
             print(f"❌ Error getting conversation context: {e}")
             return "Không thể lấy lịch sử trò chuyện."
     
-    def clear_memory(self):
-        """Clear conversation memory"""
+    async def clear_memory(self, conversation_id: Optional[str] = None, citizen_id: Optional[str] = None):
+        """Clear the memory of one conversation"""
         try:
-            self.memory.reset()
+            await self.sessions.clear(session_key(conversation_id, citizen_id))
             print("✅ Conversation memory cleared")
         except Exception as e:
             print(f"❌ Error clearing memory: {e}")
     
-    def get_conversation_summary(self) -> Dict[str, Any]:
-        """Get conversation summary and statistics"""
+    async def get_conversation_summary(self, conversation_id: Optional[str] = None, citizen_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get summary and statistics of one conversation"""
         try:
-            chat_history = self.memory.get()
+            chat_history = await self.sessions.get_messages(session_key(conversation_id, citizen_id))
             
             if not chat_history:
                 return {
@@ -257,15 +363,15 @@ class RAGBot:
                     "status": "empty"
                 }
             
-            user_messages = [msg for msg in chat_history if msg.role == "user"]
-            assistant_messages = [msg for msg in chat_history if msg.role == "assistant"]
+            user_messages = [msg for msg in chat_history if msg["role"] == "user"]
+            assistant_messages = [msg for msg in chat_history if msg["role"] == "assistant"]
             
             return {
                 "message_count": len(chat_history),
                 "user_messages": len(user_messages),
                 "assistant_messages": len(assistant_messages),
-                "memory_tokens": len(str(chat_history)),
-                "recent_topics": [msg.content[:50] + "..." for msg in user_messages[-3:]],
+                "memory_tokens": sum(len(msg["content"]) for msg in chat_history),
+                "recent_topics": [msg["content"][:50] + "..." for msg in user_messages[-3:]],
                 "status": "active"
             }
             
@@ -275,7 +381,13 @@ class RAGBot:
                 "status": "error"
             }
     
-    async def _handle_personal_guidance(self, message: str, start_time: float, conversation_history: str = "") -> Dict[str, Any]:
+    async def _handle_personal_guidance(
+        self,
+        message: str,
+        start_time: float,
+        conversation_history: str = "",
+        on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
         """Handle personal questions by providing general guidance"""
         
         try:
@@ -302,8 +414,7 @@ Quy tắc trả lời:
 Trả lời:
 """
             
-            response = await self.llm.acomplete(personal_prompt)
-            response_text = str(response).strip()
+            response_text = await self._complete(personal_prompt, on_token)
             
             return {
                 "response": response_text,
@@ -323,7 +434,14 @@ Trả lời:
                 "error": str(e)
             }
     
-    async def _handle_database_data(self, message: str, citizen_id: Optional[str], start_time: float, conversation_history: str = "") -> Dict[str, Any]:
+    async def _handle_database_data(
+        self,
+        message: str,
+        citizen_id: Optional[str],
+        start_time: float,
+        conversation_history: str = "",
+        on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
         """Handle database data questions using MCP server"""
         
         if not citizen_id:
@@ -430,8 +548,7 @@ Hãy trả lời câu hỏi một cách tự nhiên, thân thiện và hữu íc
 Trả lời:
 """
             
-            response = await self.llm.acomplete(academic_prompt)
-            response_text = str(response).strip()
+            response_text = await self._complete(academic_prompt, on_token)
             
             return {
                 "response": response_text,
@@ -451,7 +568,35 @@ Trả lời:
             }
 
     async def _classify_question(self, message: str, citizen_id: Optional[str] = None, conversation_history: str = "") -> str:
-        """Use LLM to classify question and decide response strategy with conversation context"""
+        """Decide response strategy: local classifier for confident cases, LLM with conversation context otherwise"""
+        
+        return (
+            self._classify_locally(message, citizen_id)
+            or await self._classify_with_llm_fallback(message, citizen_id, conversation_history)
+        )
+    
+    def _classify_locally(self, message: str, citizen_id: Optional[str] = None) -> Optional[str]:
+        """Rules + TF-IDF centroid classification, None when unsure"""
+        
+        local = self.question_classifier.classify(message, citizen_id is not None)
+        if local:
+            print(f"⚡ Local classification: {local['strategy']} ({local['stage']}, {local['confidence']})")
+            return local["strategy"]
+        return None
+    
+    async def _classify_with_llm_fallback(self, message: str, citizen_id: Optional[str] = None, conversation_history: str = "") -> str:
+        """LLM classification (logged for the local classifier), keyword rule if the LLM fails"""
+        
+        strategy = await self._classify_with_llm(message, citizen_id, conversation_history)
+        if strategy is None:
+            return self._classify_by_keywords(message)
+        
+        # LLM decisions become training data for the local centroid model
+        await self.question_classifier.record(message, citizen_id is not None, strategy)
+        return strategy
+    
+    async def _classify_with_llm(self, message: str, citizen_id: Optional[str] = None, conversation_history: str = "") -> Optional[str]:
+        """Use LLM to classify question and decide response strategy with conversation context (None if the LLM call fails)"""
         
         context_info = f"Người dùng {'có' if citizen_id else 'không có'} thông tin định danh (citizen_id)."
         
@@ -511,12 +656,7 @@ CHỈ TRẢ LỜI MỘT TỪ: direct_answer, call_data_db, personal, hoặc rag_
         
         try:
             # Use a fast, lightweight call to classify
-            try:
-                from llama_index.llms.openai import OpenAI
-            except ImportError:
-                from llama_index_llms_openai import OpenAI
-                
-            classifier_llm = OpenAI(model="gpt-4.1-mini", temperature=0, max_tokens=50)
+            classifier_llm = self.classifier_llm
             
             response = await classifier_llm.acomplete(classification_prompt)
             result = str(response).strip().lower()
@@ -559,15 +699,25 @@ Answer with one word only:"""
                 
         except Exception as e:
             print(f"❌ Classification error: {e}")
-            # Only use rule-based as absolute last resort when LLM fails
-            database_keywords = ["gpa", "điểm", "tín chỉ", "học bổng", "thành tích", "câu lạc bộ", "hoạt động", "lãnh đạo", "năm học", "học kỳ"]
-            
-            if any(keyword in message.lower() for keyword in database_keywords):
-                return "call_data_db"
-            else:
-                return "direct_answer"  # Safe fallback
+            return None
+    
+    @staticmethod
+    def _classify_by_keywords(message: str) -> str:
+        """Only use rule-based as absolute last resort when LLM fails"""
+        database_keywords = ["gpa", "điểm", "tín chỉ", "học bổng", "thành tích", "câu lạc bộ", "hoạt động", "lãnh đạo", "năm học", "học kỳ"]
+        
+        if any(keyword in message.lower() for keyword in database_keywords):
+            return "call_data_db"
+        else:
+            return "direct_answer"  # Safe fallback
     
-    async def _handle_direct_response(self, message: str, start_time: float, conversation_history: str = "") -> Dict[str, Any]:
+    async def _handle_direct_response(
+        self,
+        message: str,
+        start_time: float,
+        conversation_history: str = "",
+        on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
         """Handle direct LLM responses for general questions"""
         
         try:
@@ -593,8 +743,7 @@ Trả lời:
 """
             
             # Use the main LLM for direct response
-            response = await self.llm.acomplete(direct_prompt)
-            response_text = str(response).strip()
+            response_text = await self._complete(direct_prompt, on_token)
             
             return {
                 "response": response_text,
@@ -611,8 +760,49 @@ Trả lời:
                 "error": str(e)
             }
     
-    async def _handle_rag_query(self, message: str, start_time: float, conversation_history: str = "") -> Dict[str, Any]:
-        """Handle RAG document search queries"""
+    async def _embed_question(self, message: str) -> Optional[List[float]]:
+        """Embed a question for the semantic answer cache (None if embedding fails)"""
+        try:
+            return await Settings.embed_model.aget_query_embedding(message)
+        except Exception as e:
+            print(f"⚠️ Question embedding failed, skipping answer cache: {e}")
+            return None
+    
+    def _get_cached_answer(
+        self,
+        question_embedding: Optional[List[float]],
+        start_time: float,
+        has_citizen_id: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Answer from the semantic cache (same login state only), or None on a miss"""
+        if question_embedding is None:
+            return None
+        
+        cached = self.answer_cache.lookup(question_embedding, scope=has_citizen_id)
+        if not cached:
+            return None
+        
+        print(f"♻️ Answer cache hit ({cached['similarity']}): {cached['question'][:50]}")
+        return {
+            **cached["answer"],
+            "source": "knowledge_base",
+            "processing_time": time.time() - start_time,
+            "cache": {
+                "hit": True,
+                "similarity": cached["similarity"],
+                "matched_question": cached["question"]
+            }
+        }
+    
+    async def _handle_rag_query(
+        self,
+        message: str,
+        start_time: float,
+        conversation_history: str = "",
+        on_token: Optional[TokenCallback] = None,
+        has_citizen_id: bool = False
+    ) -> Dict[str, Any]:
+        """Handle RAG document search queries (answers are cached by the normalized question and login state)"""
         
         if not self.query_engine:
             return {
@@ -627,8 +817,23 @@ Trả lời:
             if conversation_history and "Lịch sử trò chuyện gần đây:" in conversation_history:
                 enhanced_query = f"{message} (Ngữ cảnh: {conversation_history[-200:]})"
             
-            # Query the knowledge base
-            response = self.query_engine.query(enhanced_query)
+            # Cache key: the user's own question, not the enhanced query (its per-user context would keep
+            # identical questions from different users apart), scoped by login state
+            cache_question = " ".join(message.lower().split())
+            question_embedding = await self._embed_question(cache_question)
+            cached = self._get_cached_answer(question_embedding, start_time, has_citizen_id)
+            if cached is not None:
+                return cached
+            
+            # Query the knowledge base (async embedding, retrieval and synthesis: doesn't block the event loop)
+            if on_token is not None and self.streaming_query_engine is not None:
+                response = await self.streaming_query_engine.aquery(enhanced_query)
+                async for text in response.async_response_gen():
+                    await on_token(text)
+                response_text = response.response_txt or ""
+            else:
+                response = await self.query_engine.aquery(enhanced_query)
+                response_text = str(response)
             
             # Extract source information
             sources = []
@@ -640,14 +845,19 @@ Trả lời:
                         "metadata": node.metadata
                     })
             
+            if question_embedding is not None and len(response_text) > 50:
+                self.answer_cache.store(
+                    question_embedding, cache_question, {"response": response_text, "sources": sources}, scope=has_citizen_id
+                )
+            
             return {
-                "response": str(response),
+                "response": response_text,
                 "source": "knowledge_base",
                 "sources": sources,
                 "processing_time": time.time() - start_time,
                 "query_stats": {
                     "retrieved_documents": len(sources),
-                    "has_answer": len(str(response)) > 50,
+                    "has_answer": len(response_text) > 50,
                     "enhanced_with_context": len(conversation_history) > 0
                 }
             }
@@ -660,28 +870,58 @@ Trả lời:
                 "error": str(e)
             }
     
+    async def warm_up(self, query: str = WARMUP_QUERY) -> Dict[str, Any]:
+        """
+        Prime connections and caches before the first user: retrieval for a typical question (OpenAI embedding
+        connection + query embedding cache, vector store connection, BM25) and the MCP database connection.
+        No answer is generated, so warm-up costs one embedding call at most.
+        """
+        start_time = time.time()
+        result: Dict[str, Any] = {"query": query}
+        
+        try:
+            from llama_index.core.schema import QueryBundle
+            nodes = await self.query_engine.aretrieve(QueryBundle(query))
+            result["retrieved_documents"] = len(nodes)
+        except Exception as e:
+            result["retrieval_error"] = str(e)
+            print(f"⚠️ Warm-up retrieval failed: {e}")
+        
+        try:
+            await self._ensure_mcp_connected()
+            result["mcp"] = "connected"
+        except Exception as e:
+            result["mcp_error"] = str(e)
+        
+        result["processing_time"] = round(time.time() - start_time, 2)
+        return result
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get RAG bot statistics with memory info"""
         
         try:
             pinecone_stats = self.pinecone_manager.get_index_stats()
-            conversation_stats = self.get_conversation_summary()
+            conversation_stats = self.sessions.get_stats()
             
             return {
                 "status": "ready",
                 "pinecone_stats": pinecone_stats,
                 "conversation_memory": conversation_stats,
+                "question_classifier": self.question_classifier.get_stats(),
+                "answer_cache": self.answer_cache.get_stats(),
+                "embedding_cache": query_embedding_cache.get_stats(),
+                "keyword_index": self.pinecone_manager.keyword_index.get_stats(),
                 "features": {
                     "document_search": True,
                     "function_calling": True,  # MCP server integration
                     "personal_context": True,  # Database integration with memory
                     "conversation_memory": True,
-                    "smart_routing": True  # LLM-based classification with context
+                    "smart_routing": True  # Local classifier with LLM fallback
                 },
                 "model": "gpt-4.1-mini",
                 "embedding_model": "text-embedding-3-large",
                 "response_strategies": ["direct_answer", "call_data_db", "personal", "rag_search"],
-                "memory_system": "ChatMemoryBuffer with conversation context"
+                "memory_system": "Per-conversation session store (LRU + TTL, capped history)"
             }
             
         except Exception as e:
@@ -698,23 +938,36 @@ def create_rag_bot() -> RAGBot:
     
     openai_key = os.getenv("OPENAI_API_KEY")
     pinecone_key = os.getenv("PINECONE_API_KEY")
+    vector_backend = os.getenv("VECTOR_BACKEND", "pinecone").lower()
     
-    if not openai_key or not pinecone_key:
-        raise Exception("Missing OPENAI_API_KEY or PINECONE_API_KEY in environment")
+    if not openai_key:
+        raise Exception("Missing OPENAI_API_KEY in environment")
+    if vector_backend == "pinecone" and not pinecone_key:
+        raise Exception("Missing PINECONE_API_KEY in environment (or set VECTOR_BACKEND=local)")
     
     return RAGBot(
         pinecone_api_key=pinecone_key,
-        openai_api_key=openai_key
+        openai_api_key=openai_key,
+        vector_backend=vector_backend
     )
 
 # Global bot instance (singleton)
 _bot_instance = None
+_bot_lock = threading.Lock()
 
 def get_rag_bot() -> RAGBot:
-    """Get or create global RAG bot instance"""
+    """Get or create global RAG bot instance (thread-safe: the startup warm-up builds it in a worker thread)"""
     global _bot_instance
     
     if _bot_instance is None:
-        _bot_instance = create_rag_bot()
+        with _bot_lock:
+            if _bot_instance is None:
+                _bot_instance = create_rag_bot()
     
     return _bot_instance
+
+async def aget_rag_bot() -> RAGBot:
+    """get_rag_bot for request handlers: waiting for a bot still being built happens off the event loop"""
+    if _bot_instance is not None:
+        return _bot_instance
+    return await asyncio.to_thread(get_rag_bot)
@@ -0,0 +1,292 @@
+"""
+Local question classifier for RAGBot
+Decides the response strategy in-process (keyword/regex rules, then a TF-IDF nearest-centroid model
+trained from logged LLM classifications) and only defers to the LLM when it is unsure
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+# TF-IDF model is optional: without scikit-learn only the rules stage runs
+try:
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+STRATEGIES = ["direct_answer", "call_data_db", "personal", "rag_search"]
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(__file__), "classification_log.jsonl")
+# The log is rotated to <log>.1 past this size (one backup kept), and only the newest examples are trained on
+CLASSIFIER_LOG_MAX_BYTES = int(os.getenv("CLASSIFIER_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+CLASSIFIER_MAX_EXAMPLES = int(os.getenv("CLASSIFIER_MAX_EXAMPLES", "5000"))
+
+GREETING_KEYWORDS = ["xin chào", "hello", "chào", "hi", "hey"]
+THANKS_KEYWORDS = ["cảm ơn", "cám ơn", "thank", "thanks", "tạm biệt", "bye"]
+# "điểm"/"hoạt động" alone are too broad for a confident local decision ("thời điểm", "hoạt động của quỹ")
+ACADEMIC_KEYWORDS = [
+    "gpa", "điểm số", "điểm trung bình", "điểm của", "tín chỉ", "học bổng", "thành tích",
+    "câu lạc bộ", "năm học", "học kỳ"
+]
+LOAN_DOCUMENT_KEYWORDS = [
+    "quy trình", "thủ tục", "lãi suất", "điều kiện", "giấy tờ", "hồ sơ cần", "quy định",
+    "thời hạn", "trả nợ", "gia hạn", "ân hạn", "hạn mức", "ngân hàng chính sách", "đối tượng"
+]
+LOAN_KEYWORDS = ["vay", "khoản vay", "hồ sơ vay", "giải ngân"]
+
+FIRST_PERSON_PATTERN = re.compile(r"\b(tôi|mình|em|tớ|của tôi|của mình|của em)\b")
+# Citizen IDs, phone and account numbers don't help routing, so they never reach the log
+LONG_NUMBER_PATTERN = re.compile(r"\d{6,}")
+
+# Seed examples (same ones the LLM prompt uses) so the centroid model has a starting point
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("Cảm ơn bạn", "direct_answer"),
+    ("Bạn có thể giúp gì?", "direct_answer"),
+    ("Bạn là ai?", "direct_answer"),
+    ("GPA của tôi là bao nhiêu?", "call_data_db"),
+    ("điểm số của tôi", "call_data_db"),
+    ("tín chỉ tôi đã học", "call_data_db"),
+    ("học bổng của tôi", "call_data_db"),
+    ("thành tích học tập", "call_data_db"),
+    ("câu lạc bộ tôi tham gia", "call_data_db"),
+    ("Quy trình vay vốn như thế nào?", "rag_search"),
+    ("Lãi suất vay sinh viên", "rag_search"),
+    ("Điều kiện vay vốn", "rag_search"),
+    ("Giấy tờ cần thiết", "rag_search"),
+    ("Điều kiện nhận học bổng", "rag_search"),
+    ("Quy định về tín chỉ", "rag_search"),
+    ("Tôi có thể vay bao nhiêu tiền?", "personal"),
+    ("Hồ sơ vay của tôi", "personal"),
+]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().strip().split())
+
+
+def _redact(text: str) -> str:
+    return LONG_NUMBER_PATTERN.sub("<number>", text)
+
+
+def _contains_any(text: str, keywords: List[str]) -> bool:
+    # Whole words/phrases only ("hi" must not match "chi")
+    return any(re.search(rf"(?<!\w){re.escape(keyword)}(?!\w)", text) for keyword in keywords)
+
+
+class QuestionClassifier:
+    """
+    Two local stages, each returning (strategy, confidence) or None when unsure:
+    1. Keyword/regex rules for unambiguous messages (greetings, thanks, academic data, loan procedures)
+    2. TF-IDF (char n-gram) nearest-centroid model over logged LLM decisions plus seed examples, with separate
+       centroids for logged-in and anonymous users (the LLM routes the same message differently for each)
+    """
+
+    def __init__(
+        self,
+        log_path: Optional[str] = None,
+        min_similarity: float = float(os.getenv("CLASSIFIER_MIN_SIMILARITY", "0.5")),
+        min_margin: float = float(os.getenv("CLASSIFIER_MIN_MARGIN", "0.1")),
+        retrain_every: int = int(os.getenv("CLASSIFIER_RETRAIN_EVERY", "25"))
+    ):
+        self.log_path = log_path or os.getenv("CLASSIFIER_LOG_PATH", DEFAULT_LOG_PATH)
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.retrain_every = retrain_every
+
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._vectorizer = None
+        # has_citizen_id -> (L2-normalized centroid matrix, labels)
+        self._centroids: Dict[bool, Tuple[Any, List[str]]] = {}
+        # (message, label, has_citizen_id); None = applies to both login states (seed examples)
+        self._logged: deque = deque(maxlen=CLASSIFIER_MAX_EXAMPLES)
+        self._new_since_training = 0
+
+        self.stats = Counter()
+
+        self._load_log()
+        self.train()
+
+    # ---- Training data ----
+
+    @property
+    def _examples(self) -> List[Tuple[str, str, Optional[bool]]]:
+        return [(text, label, None) for text, label in SEED_EXAMPLES] + list(self._logged)
+
+    def _load_log(self):
+        # Rotated backup first so the newest examples survive the deque bound
+        paths = [path for path in (self.log_path + ".1", self.log_path) if os.path.exists(path)]
+        if not paths:
+            return
+        try:
+            for path in paths:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if entry.get("label") in STRATEGIES and entry.get("message"):
+                            self._logged.append((entry["message"], entry["label"], entry.get("has_citizen_id")))
+            print(f"📚 Question classifier loaded {len(self._logged)} logged classifications")
+        except Exception as e:
+            print(f"⚠️ Could not read classification log: {e}")
+
+    def _append_log(self, entry: Dict[str, Any]):
+        """Append one entry, rotating the log to <log>.1 once it reaches CLASSIFIER_LOG_MAX_BYTES"""
+        with self._log_lock:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= CLASSIFIER_LOG_MAX_BYTES:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def record(self, message: str, has_citizen_id: bool, label: str):
+        """Log an LLM classification; the centroid model is retrained every `retrain_every` new examples"""
+        if label not in STRATEGIES:
+            return
+
+        message = _redact(message)
+        try:
+            # File I/O off the event loop (record is called from the async chat handler)
+            await asyncio.to_thread(self._append_log, {
+                "message": message,
+                "has_citizen_id": has_citizen_id,
+                "label": label,
+                "timestamp": time.time()
+            })
+        except Exception as e:
+            print(f"⚠️ Could not log classification: {e}")
+
+        with self._lock:
+            self._logged.append((message, label, has_citizen_id))
+            self._new_since_training += 1
+            retrain = self._new_since_training >= self.retrain_every
+
+        if retrain:
+            # Refit off the request path (record is called from the async chat handler)
+            threading.Thread(target=self.train, daemon=True).start()
+
+    def train(self) -> bool:
+        """Fit TF-IDF and one L2-normalized centroid per strategy and login state"""
+        if not SKLEARN_AVAILABLE:
+            return False
+
+        with self._lock:
+            examples = self._examples
+            self._new_since_training = 0
+
+        if len({label for _, label, _ in examples}) < 2:
+            return False
+
+        vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True)
+        matrix = vectorizer.fit_transform([_normalize(text) for text, _, _ in examples])
+        targets = np.array([label for _, label, _ in examples])
+        states = [state for _, _, state in examples]
+
+        centroids_by_state = {}
+        for has_citizen_id in (False, True):
+            in_state = np.array([state is None or state == has_citizen_id for state in states])
+            labels = sorted({label for (_, label, _), keep in zip(examples, in_state) if keep})
+            if len(labels) < 2:
+                continue
+            centroids = []
+            for label in labels:
+                centroid = np.asarray(matrix[in_state & (targets == label)].mean(axis=0)).ravel()
+                norm = np.linalg.norm(centroid)
+                centroids.append(centroid / norm if norm else centroid)
+            centroids_by_state[has_citizen_id] = (np.vstack(centroids), labels)
+
+        with self._lock:
+            self._vectorizer = vectorizer
+            self._centroids = centroids_by_state
+        return True
+
+    # ---- Classification ----
+
+    @staticmethod
+    def classify_by_rules(message: str, has_citizen_id: bool) -> Optional[str]:
+        """Unambiguous cases only; None means the rules have no opinion"""
+        text = _normalize(message)
+        has_academic = _contains_any(text, ACADEMIC_KEYWORDS)
+
+        if _contains_any(text, GREETING_KEYWORDS) and not has_academic and len(text) < 20:
+            # Logged-in users get a personalized greeting from their profile
+            return "call_data_db" if has_citizen_id else "direct_answer"
+
+        if _contains_any(text, THANKS_KEYWORDS) and len(text) < 30:
+            return "direct_answer"
+
+        first_person = bool(FIRST_PERSON_PATTERN.search(text))
+        has_document = _contains_any(text, LOAN_DOCUMENT_KEYWORDS)
+
+        # "Điều kiện nhận học bổng" / "Quy định tín chỉ" are policy questions, not the user's own record
+        if has_academic and (first_person or not has_document):
+            return "call_data_db"
+
+        if has_document and not first_person:
+            return "rag_search"
+
+        if first_person and _contains_any(text, LOAN_KEYWORDS):
+            return "personal"
+
+        return None
+
+    def classify_by_centroid(self, message: str, has_citizen_id: bool) -> Optional[Tuple[str, float]]:
+        """Nearest centroid (of the caller's login state) by cosine similarity; None when weak or ambiguous"""
+        with self._lock:
+            vectorizer, trained = self._vectorizer, self._centroids.get(has_citizen_id)
+        if vectorizer is None or trained is None:
+            return None
+        centroids, labels = trained
+
+        vector = vectorizer.transform([_normalize(message)]).toarray().ravel()
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+
+        scores = centroids @ (vector / norm)
+        order = np.argsort(scores)[::-1]
+        best, runner_up = scores[order[0]], scores[order[1]]
+
+        if best < self.min_similarity or best - runner_up < self.min_margin:
+            return None
+        return labels[order[0]], float(best)
+
+    def classify(self, message: str, has_citizen_id: bool) -> Optional[Dict[str, Any]]:
+        """
+        Classify locally
+
+        Returns:
+            {"strategy", "stage", "confidence"} or None when the LLM should decide
+        """
+        strategy = self.classify_by_rules(message, has_citizen_id)
+        if strategy:
+            self.stats["rules"] += 1
+            return {"strategy": strategy, "stage": "rules", "confidence": 1.0}
+
+        match = self.classify_by_centroid(message, has_citizen_id)
+        if match:
+            self.stats["centroid"] += 1
+            return {"strategy": match[0], "stage": "centroid", "confidence": round(match[1], 3)}
+
+        self.stats["llm"] += 1
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = sum(self.stats.values())
+        return {
+            "rules": self.stats["rules"],
+            "centroid": self.stats["centroid"],
+            "llm": self.stats["llm"],
+            "local_rate": round((self.stats["rules"] + self.stats["centroid"]) / total, 3) if total else 0.0,
+            "training_examples": len(SEED_EXAMPLES) + len(self._logged),
+            "model_trained": self._vectorizer is not None
+        }
@@ -0,0 +1,222 @@
+"""
+Per-session chat memory for RAGBot
+Replaces the single process-wide ChatMemoryBuffer: each conversation (conversation_id, else citizen_id)
+keeps only its last N messages, idle sessions expire, and the number of live sessions is bounded (LRU).
+Sessions can optionally be persisted to local disk or MongoDB so they survive restarts.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional
+
+ANONYMOUS_SESSION = "anonymous"
+DEFAULT_DISK_DIR = os.path.join(os.path.dirname(__file__), ".chat_sessions")
+MONGO_COLLECTION = "chatsessions"
+
+
+def session_key(conversation_id: Optional[str] = None, citizen_id: Optional[str] = None) -> str:
+    """
+    Internal memory key: conversation_id wins (one user can hold several conversations), then citizen_id.
+    Never returned to clients (they only ever see and echo back the raw conversation_id)
+    """
+    if conversation_id:
+        return f"conv:{conversation_id}"
+    if citizen_id:
+        return f"citizen:{citizen_id}"
+    return ANONYMOUS_SESSION
+
+
+class ChatSessionStore:
+    """
+    Session-keyed chat history.
+
+    - Each session is a deque capped at `max_messages` (oldest messages drop off)
+    - Sessions idle for `ttl_seconds` expire; past `max_sessions` the least recently used is evicted
+    - `persistence`: None (memory only), "disk" (one JSON file per session) or "mongodb" (chatsessions collection)
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 3600,
+        max_messages: int = 20,
+        persistence: Optional[str] = None,
+        disk_dir: str = DEFAULT_DISK_DIR
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.persistence = (persistence or "").lower() or None
+        self.disk_dir = disk_dir
+
+        self._sessions: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._last_seen: Dict[str, float] = {}
+        self._write_lock = asyncio.Lock()
+        self._ttl_index_ready = False
+
+        self.evictions = 0
+        self.expirations = 0
+        self.restored = 0
+
+    @classmethod
+    def from_env(cls) -> "ChatSessionStore":
+        return cls(
+            max_sessions=int(os.getenv("CHAT_MAX_SESSIONS", "1000")),
+            ttl_seconds=float(os.getenv("CHAT_SESSION_TTL_SECONDS", "3600")),
+            max_messages=int(os.getenv("CHAT_MAX_MESSAGES_PER_SESSION", "20")),
+            persistence=os.getenv("CHAT_MEMORY_PERSISTENCE", ""),
+            disk_dir=os.getenv("CHAT_MEMORY_DIR", DEFAULT_DISK_DIR)
+        )
+
+    # ---- Persistence backends ----
+
+    def _disk_path(self, key: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+        return os.path.join(self.disk_dir, f"{safe}.json")
+
+    def _read_disk(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+            os.remove(path)
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_disk(self, key: str, messages: List[Dict[str, Any]]):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(messages, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _delete_disk(self, key: str):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    async def _collection(self):
+        from app.database.connection import get_mongo_database
+        collection = get_mongo_database()[MONGO_COLLECTION]
+        if not self._ttl_index_ready:
+            # MongoDB removes idle sessions itself once expires_at has passed
+            await collection.create_index("expires_at", expireAfterSeconds=0)
+            self._ttl_index_ready = True
+        return collection
+
+    async def _load_persisted(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            if self.persistence == "disk":
+                return await asyncio.to_thread(self._read_disk, key)
+            if self.persistence == "mongodb":
+                collection = await self._collection()
+                doc = await collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+                return doc["messages"] if doc else None
+        except Exception as e:
+            print(f"⚠️ Could not load chat session {key}: {e}")
+        return None
+
+    async def _persist_message(self, key: str, message: Dict[str, Any]):
+        try:
+            if self.persistence == "disk":
+                messages = list(self._sessions.get(key, []))
+                async with self._write_lock:
+                    await asyncio.to_thread(self._write_disk, key, messages)
+            elif self.persistence == "mongodb":
+                collection = await self._collection()
+                await collection.update_one(
+                    {"_id": key},
+                    {
+                        "$push": {"messages": {"$each": [message], "$slice": -self.max_messages}},
+                        "$set": {"expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)}
+                    },
+                    upsert=True
+                )
+        except Exception as e:
+            print(f"⚠️ Could not persist chat session {key}: {e}")
+
+    # ---- Session access ----
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, seen in self._last_seen.items() if now - seen > self.ttl_seconds]
+        for key in expired:
+            self._sessions.pop(key, None)
+            self._last_seen.pop(key, None)
+            self.expirations += 1
+
+    def _touch(self, key: str) -> Deque[Dict[str, Any]]:
+        session = self._sessions.get(key)
+        if session is None:
+            session = deque(maxlen=self.max_messages)
+            self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        self._last_seen[key] = time.monotonic()
+
+        while len(self._sessions) > self.max_sessions:
+            evicted, _ = self._sessions.popitem(last=False)
+            self._last_seen.pop(evicted, None)
+            self.evictions += 1
+        return session
+
+    async def _restore(self, key: str):
+        """Load a persisted session into memory on a cold start, before its first read or append"""
+        self._expire()
+        if key in self._sessions or not self.persistence:
+            return
+        persisted = await self._load_persisted(key)
+        # Another request for the same session may have restored it while we were loading
+        if persisted and key not in self._sessions:
+            self._touch(key).extend(persisted[-self.max_messages:])
+            self.restored += 1
+
+    async def get_messages(self, key: str) -> List[Dict[str, Any]]:
+        """Messages of a session, oldest first (restored from persistence on a cold start)"""
+        await self._restore(key)
+
+        session = self._sessions.get(key)
+        if session is None:
+            return []
+        self._sessions.move_to_end(key)
+        self._last_seen[key] = time.monotonic()
+        return list(session)
+
+    async def append(self, key: str, role: str, content: str):
+        """Add a message to a session (restored first: the disk backend rewrites the whole session file)"""
+        await self._restore(key)
+        message = {"role": role, "content": content, "timestamp": time.time()}
+        self._touch(key).append(message)
+        if self.persistence:
+            await self._persist_message(key, message)
+
+    async def clear(self, key: str):
+        """Forget a session (memory and persistence)"""
+        self._sessions.pop(key, None)
+        self._last_seen.pop(key, None)
+        try:
+            if self.persistence == "disk":
+                await asyncio.to_thread(self._delete_disk, key)
+            elif self.persistence == "mongodb":
+                collection = await self._collection()
+                await collection.delete_one({"_id": key})
+        except Exception as e:
+            print(f"⚠️ Could not delete chat session {key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active_sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "max_messages_per_session": self.max_messages,
+            "ttl_seconds": self.ttl_seconds,
+            "persistence": self.persistence or "memory",
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "restored": self.restored
+        }
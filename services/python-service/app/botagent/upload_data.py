@@ -1,16 +1,19 @@
 """
 Cross-Platform Document Upload to Pinecone
 Supports: TXT, PDF, DOCX, MD (Windows/Linux/Mac compatible)
-Run: python -m app.botagent.upload_data
+Run: python -m app.botagent.upload_data [--rebuild]
+     --rebuild clears the namespace and the ingestion manifest, then re-embeds everything
 
 Make sure you have .env file with:
 OPENAI_API_KEY=sk-proj-...
 PINECONE_API_KEY=pc-...
 """
+import argparse
 import asyncio
 import os
 import sys
 from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List
 from dotenv import load_dotenv
 from llama_index.core import Document
 
@@ -18,8 +21,11 @@ from llama_index.core import Document
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 # ✅ REUSE existing components + cross-platform loader
-from app.botagent.chunking import chunk_documents_by_sections
+from app.botagent.chunking import chunk_document_stream
+from app.botagent.data_load import DocumentLoader
 from app.botagent.vectordb import PineconeManager
+from app.botagent.ingestion import IncrementalIngestor
+from app.botagent.web_crawler import stream_web_chunks
 
 # Cross-platform imports (optional)
 try:
@@ -62,22 +68,8 @@ def load_cross_platform_document(file_path: str):
         
         # 2. PDF files (cross-platform)
         elif file_type == '.pdf' and PDF_SUPPORT:
-            with open(file_path, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                text = ""
-                for i, page in enumerate(pdf_reader.pages):
-                    text += f"\n--- Page {i+1} ---\n"
-                    text += page.extract_text()
-                
-                return Document(
-                    text=text,
-                    metadata={
-                        "source": str(file_path),
-                        "type": "pdf",
-                        "filename": file_path.name,
-                        "pages": len(pdf_reader.pages)
-                    }
-                )
+            documents = DocumentLoader().load_pdf(str(file_path))
+            return documents[0] if documents else None
         
         # 3. DOCX files (cross-platform, no pywin32 needed)
         elif file_type == '.docx' and DOCX_SUPPORT:
@@ -111,7 +103,56 @@ def load_cross_platform_document(file_path: str):
         print(f"❌ Error loading {file_path}: {e}")
         return None
 
-async def upload_to_pinecone():
+def stream_cross_platform_document(file_path: str) -> Iterator[Document]:
+    """Stream a document page by page (PDF) or in blocks (TXT/MD) for the streaming chunker; DOCX is loaded whole"""
+    file_type = Path(file_path).suffix.lower()
+    
+    if file_type in ['.txt', '.md'] or (file_type == '.pdf' and PDF_SUPPORT):
+        print(f"📄 Streaming: {Path(file_path).name}")
+        pages = 0
+        try:
+            for page in DocumentLoader().stream_document(str(file_path)):
+                pages += 1
+                yield page
+        except Exception as e:
+            print(f"❌ Error loading {file_path}: {e}")
+            if pages:
+                # Part of the file already reached the ingestor: ending the stream normally would make it prune
+                # every chunk of this file it didn't see, so fail the upload instead
+                raise
+        return
+    
+    document = load_cross_platform_document(file_path)
+    if document:
+        yield document
+
+async def stream_knowledge_base(file_paths: List[str], web_urls: List[str], summary: Dict[str, Any]) -> AsyncIterator[Document]:
+    """
+    Section chunks of the first document found, then of the web pages, one at a time (never a list of the
+    whole corpus); running totals for the final report go into `summary`
+    """
+    def counted(chunk: Document) -> Document:
+        summary["chunks"] += 1
+        summary["chars"] += len(chunk.text)
+        summary["words"] += len(chunk.text.split())
+        return chunk
+    
+    for path in file_paths:
+        if os.path.exists(path):
+            print(f"   Found: {path}")
+            for chunk in chunk_document_stream(stream_cross_platform_document(path), max_section_length=1000):  # ✅ SECTION-BASED CHUNKING
+                summary["found_path"] = path
+                yield counted(chunk)
+            if summary["found_path"]:
+                break
+    
+    # Regulation web pages (KB_WEB_URLS, comma separated): cached pages are revalidated, only changed ones downloaded
+    if web_urls:
+        print(f"🌐 Crawling {len(web_urls)} web pages...")
+        async for chunk in stream_web_chunks(web_urls):
+            yield counted(chunk)
+
+async def upload_to_pinecone(rebuild: bool = False):
     """Upload documents using existing components"""
     
     print("🚀 RAG Document Upload Tool")
@@ -163,20 +204,19 @@ async def upload_to_pinecone():
     
     print(f"📋 Support status: TXT ✅, MD ✅, {', '.join(deps_status)}")
     
-    # 1. ✅ Use cross-platform loader  
+    # 1+2. ✅ Stream the document straight into the section chunker (pages/blocks, never the whole text)
+    # and on into the ingestor: chunks are embedded window by window, never all held in memory
     print("📄 Looking for documents...")
-    document = None
-    found_path = None
+    web_urls = [url.strip() for url in os.getenv("KB_WEB_URLS", "").split(",") if url.strip()]
+    summary = {"chunks": 0, "chars": 0, "words": 0, "found_path": None}
+    chunk_stream = stream_knowledge_base(file_paths, web_urls, summary)
     
-    for path in file_paths:
-        if os.path.exists(path):
-            print(f"   Found: {path}")
-            document = load_cross_platform_document(path)  # ✅ CROSS-PLATFORM
-            if document:
-                found_path = path
-                break
+    # Peek at the first chunk: with nothing to upload, stop before touching the index
+    first_chunk = None
+    async for first_chunk in chunk_stream:
+        break
     
-    if not document:
+    if first_chunk is None:
         print("❌ No supported document found. Please put your file in:")
         print("   ./knowledge_base/document.txt  (TXT - best for RAG)")
         if PDF_SUPPORT:
@@ -187,20 +227,16 @@ async def upload_to_pinecone():
         print(f"\n💡 Missing dependencies? Install: pip install PyPDF2 docx2txt")
         return False
     
-    documents = [document]  # Convert to list for compatibility
-    print(f"✅ Loaded: {found_path}")
-    print(f"   Characters: {len(document.text):,}")
-    print(f"   Words: {len(document.text.split()):,}")
-    print(f"   Type: {document.metadata.get('type', 'unknown')}")
-    
-    # 2. ✅ Use chunking.py component  
-    print("\n✂️ Chunking document...")
-    chunks = chunk_documents_by_sections(documents, max_section_length=1000)  # ✅ SECTION-BASED CHUNKING
-    print(f"✅ Created {len(chunks)} chunks")
-    print(f"   Average chunk size: {sum(len(c.text) for c in chunks) // len(chunks)} chars")
+    print(f"✅ Loading: {summary['found_path'] or 'web pages'}")
+    print(f"   Type: {first_chunk.metadata.get('type', 'unknown')}")
     
     # Show sample
-    print(f"📝 Sample chunk: {chunks[0].text[:100]}...")
+    print(f"📝 Sample chunk: {first_chunk.text[:100]}...")
+    
+    async def all_chunks():
+        yield first_chunk
+        async for chunk in chunk_stream:
+            yield chunk
     
     # 3. ✅ Use vectordb.py component
     print("\n🔧 Setting up Pinecone...")
@@ -218,24 +254,50 @@ async def upload_to_pinecone():
     
     print("✅ Pinecone ready")
     
-    # 4. ✅ Use existing upload method
+    # 4. ✅ Incremental upload: only new/changed chunks are embedded, removed chunks are deleted
     print("\n📤 Uploading to vector database...")
-    print("⏳ This may take 30-60 seconds...")
+    ingestor = IncrementalIngestor(manager)
     
-    success = manager.add_documents(chunks)  # ✅ EXISTING METHOD
+    if rebuild:
+        print("🧹 --rebuild: clearing the namespace and the ingestion manifest, every chunk will be re-embedded")
+        if not manager.clear_index():
+            return False
+        ingestor.manifest.clear()
+    elif not ingestor.manifest.exists and manager.get_index_stats().get("total_vectors", 0) > 0:
+        # Never wipe a shared namespace just because this checkout has no manifest
+        print(f"❌ The index already holds vectors but there is no ingestion manifest at {ingestor.manifest.path}")
+        print("   Uploading now would duplicate them. Either copy the manifest from the machine that uploaded last")
+        print("   (INGEST_MANIFEST_PATH), or rerun with --rebuild to clear the namespace and re-embed everything")
+        return False
+    
+    try:
+        ingest_stats = await ingestor.aingest_stream(all_chunks())
+    except Exception as e:
+        # Nothing is pruned when the stream fails; chunks uploaded so far are checkpointed in the manifest
+        print(f"❌ Upload aborted: {e}")
+        print("   No chunks were deleted from the index. Fix the document and rerun to resume from the checkpoint")
+        return False
+    success = ingest_stats["success"]
+    
+    print(f"\n✂️ Created {summary['chunks']} chunks")
+    print(f"   Characters (chunked): {summary['chars']:,}")
+    print(f"   Words (chunked): {summary['words']:,}")
+    print(f"   Average chunk size: {summary['chars'] // summary['chunks']} chars")
     
     if success:
         print("🎉 Upload successful!")
+        print(f"🧮 Embedded {ingest_stats['added']} chunks, deleted {ingest_stats['deleted']}, kept {ingest_stats['unchanged']} unchanged")
+        print(f"🔤 BM25 keyword index: {manager.keyword_index.get_stats()}")
         
         # 5. ✅ Test search with document content preview
         print("\n🔍 Testing search...")
         
         # First, show what's actually in the document
         print(f"📄 Document preview (first 200 chars):")
-        print(f"   {document.text[:200]}...")
+        print(f"   {first_chunk.text[:200]}...")
         
         # Extract some actual words from document for testing
-        words = document.text.split()[:10]  # First 10 words
+        words = first_chunk.text.split()[:10]  # First 10 words
         print(f"📝 First 10 words in document: {words}")
         
         # Test with both Vietnamese and actual document words
@@ -304,8 +366,12 @@ async def upload_to_pinecone():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload the knowledge base to the vector database")
+    parser.add_argument("--rebuild", action="store_true", help="clear the namespace and the ingestion manifest, then re-embed everything")
+    args = parser.parse_args()
+    
     try:
-        result = asyncio.run(upload_to_pinecone())
+        result = asyncio.run(upload_to_pinecone(rebuild=args.rebuild))
         if result:
             print("\n🎯 Success! Your document is now in Pinecone vector database")
         else:
@@ -7,6 +7,7 @@ import time
 from typing import List, Dict, Any, Optional
 from pinecone import Pinecone, ServerlessSpec
 from llama_index.core import Document, VectorStoreIndex, Settings
+from llama_index.core.schema import BaseNode
 try:
     # New LlamaIndex structure (v0.9+)
     from llama_index.vector_stores.pinecone import PineconeVectorStore
@@ -21,37 +22,70 @@ except ImportError:
         print("   Install: pip install llama-index-vector-stores-pinecone llama-index-embeddings-openai")
         raise
 from llama_index.core.storage.storage_context import StorageContext
+from llama_index.core.ingestion import run_transformations
+
+from app.botagent.kb_version import bump_knowledge_base_version, get_knowledge_base_version
+from app.botagent.embedding_cache import CachedOpenAIEmbedding, query_embedding_cache
+from app.botagent.local_vectorstore import LocalVectorStore, DEFAULT_PERSIST_DIR
+from app.botagent.hybrid_retrieval import BM25Index, DEFAULT_INDEX_PATH
+
+# "pinecone" (default) or "local" (in-process flat index, see local_vectorstore.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", DEFAULT_PERSIST_DIR)
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", DEFAULT_INDEX_PATH)
+# Namespace used for upserts, queries and deletes alike ("" = Pinecone's default namespace)
+PINECONE_NAMESPACE = os.getenv("PINECONE_NAMESPACE", "")
 
 class PineconeManager:
-    """Simple Pinecone vector database manager"""
+    """Simple vector database manager (Pinecone, or a local in-process index with backend="local")"""
     
     def __init__(
         self, 
         api_key: str, 
         index_name: str = "attacker2",
         dimension: int = 1024,  # text-embedding-3-small dimension
-        environment: str = "us-east-1"
+        environment: str = "us-east-1",
+        backend: Optional[str] = None
     ):
         self.api_key = api_key
         self.index_name = index_name
         self.dimension = dimension
         self.environment = environment
+        self.backend = (backend or VECTOR_BACKEND).lower()
         
-        # Initialize Pinecone
-        self.pc = Pinecone(api_key=api_key)
+        # Initialize Pinecone (not needed for the local backend)
+        self.pc = Pinecone(api_key=api_key) if self.backend == "pinecone" else None
         self.index = None
         self.vector_store = None
         self.vector_index = None
         
+        # Local BM25 keyword index over the same chunks (hybrid retrieval), built during uploads;
+        # reloaded from BM25_INDEX_PATH whenever an upload (from any process) bumps the KB version
+        self.keyword_index = BM25Index(path=BM25_INDEX_PATH, version_fn=get_knowledge_base_version)
+        
         # Setup embedding model - MUST match index dimension
-        Settings.embed_model = OpenAIEmbedding(
+        # Query embeddings are cached (memory LRU + float16 files) across chat and upload test queries
+        Settings.embed_model = CachedOpenAIEmbedding(
             model="text-embedding-3-large",  # Default 1536 dimensions, can be set to 512 or 1024
             api_key=os.getenv("OPENAI_API_KEY"),
             dimensions=self.dimension  # Match index dimension dynamically
         )
     
+    @property
+    def is_local(self) -> bool:
+        return self.backend == "local"
+    
     def create_index(self) -> bool:
         """Create Pinecone index if not exists"""
+        if self.is_local:
+            try:
+                self.vector_store = LocalVectorStore(persist_dir=LOCAL_VECTOR_DIR, version_fn=get_knowledge_base_version)
+                print(f"✅ Local vector index ready: {LOCAL_VECTOR_DIR}")
+                return True
+            except Exception as e:
+                print(f"❌ Error opening local vector index: {e}")
+                return False
+        
         try:
             existing_indexes = [idx.name for idx in self.pc.list_indexes()]
             
@@ -79,7 +113,7 @@ class PineconeManager:
             self.index = self.pc.Index(self.index_name)
             
             # Setup vector store
-            self.vector_store = PineconeVectorStore(pinecone_index=self.index)
+            self.vector_store = PineconeVectorStore(pinecone_index=self.index, namespace=PINECONE_NAMESPACE)
             
             return True
             
@@ -90,6 +124,18 @@ class PineconeManager:
     def get_index_stats(self) -> Dict[str, Any]:
         """Get index statistics"""
         try:
+            if self.is_local:
+                if not self.vector_store:
+                    return {"error": "Index not initialized"}
+                stats = self.vector_store.get_stats()
+                return {
+                    "backend": "local",
+                    "total_vectors": stats["total_vectors"],
+                    "dimension": stats["dimension"],
+                    "index_fullness": 0,
+                    "namespaces": []
+                }
+            
             if not self.index:
                 return {"error": "Index not initialized"}
             
@@ -103,36 +149,50 @@ class PineconeManager:
         except Exception as e:
             return {"error": str(e)}
     
-    def add_documents(self, documents: List[Document], namespace: str = "default") -> bool:
+    def add_documents(self, documents: List[Document]) -> bool:
         """Add documents to vector database"""
+        # Split into nodes once so the vector store and the BM25 index share node ids
+        nodes = run_transformations(documents, Settings.transformations)
+        return self.add_nodes(nodes)
+    
+    def add_nodes(self, nodes: List[BaseNode], raise_on_error: bool = False, persist: bool = True) -> bool:
+        """
+        Embed and upsert already-split nodes (re-adding a node id overwrites it)
+        raise_on_error=True re-raises the underlying error (the ingestor decides whether to retry it)
+        persist=False only updates the in-memory BM25 index; call commit() once the batch of writes is done
+        """
         try:
             if not self.vector_store:
                 print("❌ Vector store not initialized")
                 return False
             
-            print(f"📤 Adding {len(documents)} documents to Pinecone...")
+            print(f"📤 Adding {len(nodes)} nodes to {'local index' if self.is_local else 'Pinecone'}...")
             
             # Create storage context
             storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
             
-            # Create vector index and add documents
-            self.vector_index = VectorStoreIndex.from_documents(
-                documents,
+            # Create vector index and add nodes
+            self.vector_index = VectorStoreIndex(
+                nodes=nodes,
                 storage_context=storage_context
             )
+            self.keyword_index.add_nodes(nodes, persist=persist)
             
-            print(f"✅ Successfully added {len(documents)} documents")
+            print(f"✅ Successfully added {len(nodes)} nodes (BM25 index: {len(self.keyword_index)} chunks)")
+            if persist:
+                bump_knowledge_base_version()
             return True
             
         except Exception as e:
-            print(f"❌ Error adding documents: {e}")
+            print(f"❌ Error adding nodes: {e}")
+            if raise_on_error:
+                raise
             return False
     
     def search_documents(
         self, 
         query: str, 
-        top_k: int = 5,
-        namespace: str = "default"
+        top_k: int = 5
     ) -> List[Dict[str, Any]]:
         """Search similar documents"""
         try:
@@ -159,35 +219,55 @@ class PineconeManager:
                     "metadata": node.metadata
                 })
             
-            print(f"🔍 Found {len(results)} similar documents for: {query[:50]}...")
+            print(f"🔍 Found {len(results)} similar documents for: {query[:50]}... (embedding cache hit rate: {query_embedding_cache.get_stats()['hit_rate']})")
             return results
             
         except Exception as e:
             print(f"❌ Error searching documents: {e}")
             return []
     
-    def delete_documents(self, doc_ids: List[str], namespace: str = "default") -> bool:
-        """Delete documents by IDs"""
+    def delete_documents(self, doc_ids: List[str], namespace: Optional[str] = None, persist: bool = True) -> bool:
+        """Delete documents by IDs (persist=False: see add_nodes)"""
         try:
-            if not self.index:
+            if self.is_local:
+                if not self.vector_store:
+                    return False
+                self.vector_store.delete_nodes(node_ids=doc_ids)
+            elif not self.index:
                 return False
-            
-            self.index.delete(ids=doc_ids, namespace=namespace)
+            else:
+                self.index.delete(ids=doc_ids, namespace=PINECONE_NAMESPACE if namespace is None else namespace)
+            self.keyword_index.remove_nodes(doc_ids, persist=persist)
             print(f"🗑️ Deleted {len(doc_ids)} documents")
+            if persist:
+                bump_knowledge_base_version()
             return True
             
         except Exception as e:
             print(f"❌ Error deleting documents: {e}")
             return False
     
-    def clear_index(self, namespace: str = "default") -> bool:
+    def commit(self):
+        """Write the BM25 index and bump the knowledge-base version once, after add_nodes/delete_documents(persist=False)"""
+        self.keyword_index.persist()
+        bump_knowledge_base_version()
+        print(f"💾 BM25 index saved ({len(self.keyword_index)} chunks), knowledge-base version bumped")
+    
+    def clear_index(self, namespace: Optional[str] = None) -> bool:
         """Clear all vectors from index"""
         try:
-            if not self.index:
+            if self.is_local:
+                if not self.vector_store:
+                    return False
+                self.vector_store.clear()
+            elif not self.index:
                 return False
-            
-            self.index.delete(delete_all=True, namespace=namespace)
-            print(f"🧹 Cleared all documents from namespace: {namespace}")
+            else:
+                namespace = PINECONE_NAMESPACE if namespace is None else namespace
+                self.index.delete(delete_all=True, namespace=namespace)
+            self.keyword_index.clear()
+            print(f"🧹 Cleared all documents from namespace: {namespace or '(default)'}")
+            bump_knowledge_base_version()
             return True
             
         except Exception as e:
@@ -198,8 +278,11 @@ class PineconeManager:
         """Load existing vector index"""
         try:
             if not self.vector_store:
-                self.index = self.pc.Index(self.index_name)
-                self.vector_store = PineconeVectorStore(pinecone_index=self.index)
+                if self.is_local:
+                    self.vector_store = LocalVectorStore(persist_dir=LOCAL_VECTOR_DIR, version_fn=get_knowledge_base_version)
+                else:
+                    self.index = self.pc.Index(self.index_name)
+                    self.vector_store = PineconeVectorStore(pinecone_index=self.index, namespace=PINECONE_NAMESPACE)
             
             # Create vector index from existing store
             self.vector_index = VectorStoreIndex.from_vector_store(self.vector_store)
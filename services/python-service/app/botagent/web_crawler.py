@@ -0,0 +1,227 @@
+"""
+Async web-page loader for the knowledge base
+Regulation pages are fetched concurrently over one pooled httpx client, revalidated with
+ETag / Last-Modified against a local cache (unchanged pages cost a 304, no body), stripped of
+navigation/footer boilerplate and handed to the section chunker page by page as downloads complete
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+import httpx
+from bs4 import BeautifulSoup
+from llama_index.core import Document
+
+from app.botagent.chunking import DocumentChunker
+from app.botagent.ingestion import RETRYABLE_STATUS_CODES, with_retry
+
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))  # requests in flight / pooled connections
+CRAWL_TIMEOUT_SECONDS = float(os.getenv("CRAWL_TIMEOUT_SECONDS", "15"))
+CRAWL_MAX_RETRIES = int(os.getenv("CRAWL_MAX_RETRIES", "3"))
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".http_cache")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# Never content
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "iframe", "svg", "form", "button", "nav", "footer", "header", "aside"]
+# class/id of site chrome (menus, breadcrumbs, share bars, cookie banners...)
+BOILERPLATE_HINTS = re.compile(r"menu|navbar|breadcrumb|sidebar|footer|header|cookie|banner|social|share|comment|advert|popup|related", re.IGNORECASE)
+# Elements rendered as their own paragraph; blank lines between them let the chunker see section headers
+BLOCK_TAGS = ["p", "div", "section", "article", "h1", "h2", "h3", "h4", "h5", "h6", "li", "tr", "table", "blockquote", "pre", "br"]
+
+
+def extract_main_text(html: str) -> Tuple[str, str]:
+    """(title, text) of a page: main/article content without boilerplate, one paragraph per block element"""
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else "Untitled"
+
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    chrome = [
+        tag for tag in soup.find_all(True)
+        if tag.name not in ("html", "body", "main", "article") and not re.fullmatch(r"h\d", tag.name)
+        and BOILERPLATE_HINTS.search(" ".join(tag.get("class", [])) + " " + (tag.get("id") or ""))
+    ]
+    for tag in chrome:
+        if not tag.decomposed:
+            tag.decompose()
+
+    root = soup.find("main") or soup.find("article") or soup.body or soup
+    for tag in root.find_all(BLOCK_TAGS):
+        tag.insert_before("\n\n")
+        tag.insert_after("\n\n")
+
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", root.get_text()):
+        lines = [" ".join(line.split()) for line in block.splitlines()]
+        paragraph = "\n".join(line for line in lines if line)
+        if paragraph and (not paragraphs or paragraphs[-1] != paragraph):
+            paragraphs.append(paragraph)
+    return title, "\n\n".join(paragraphs)
+
+
+class HttpCache:
+    """One JSON file per URL: validators (ETag / Last-Modified) and the extracted page, reused on 304"""
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]}.json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cache entry for {url}: {e}")
+            return None
+
+    def put(self, url: str, entry: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(url)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def _is_retryable_http(error: Exception) -> bool:
+    """Connection errors, timeouts, 429 and 5xx"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code in RETRYABLE_STATUS_CODES
+
+
+class WebCrawler:
+    """
+    Concurrent conditional fetcher, used as `async with WebCrawler() as crawler`.
+
+    crawl() yields {"url", "status", "changed", "document"} per page as soon as it is ready;
+    `changed` is False for 304s and for 200s whose extracted text equals the cached one.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = CRAWL_CONCURRENCY,
+        timeout: float = CRAWL_TIMEOUT_SECONDS,
+        cache_dir: Optional[str] = None,
+        max_retries: int = CRAWL_MAX_RETRIES,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.cache = HttpCache(os.getenv("CRAWL_CACHE_DIR", DEFAULT_CACHE_DIR) if cache_dir is None else cache_dir)
+        self.max_retries = max_retries
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.stats = {"fetched": 0, "not_modified": 0, "unchanged": 0, "failed": 0, "bytes_downloaded": 0}
+
+    async def __aenter__(self) -> "WebCrawler":
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            follow_redirects=True,
+            transport=self.transport
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+        self._client = None
+
+    @staticmethod
+    def _document(url: str, title: str, text: str) -> Document:
+        return Document(text=text, metadata={"source": url, "type": "web", "title": title, "url": url})
+
+    async def fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fetch one page (conditionally when cached); None when it can't be loaded"""
+        async with self._semaphore:
+            cached = await asyncio.to_thread(self.cache.get, url)
+            headers = {}
+            if cached and cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached and cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+            async def request() -> httpx.Response:
+                response = await self._client.get(url, headers=headers)
+                if response.status_code != 304:
+                    response.raise_for_status()
+                return response
+
+            try:
+                response = await with_retry(request, f"GET {url}", max_retries=self.max_retries, retryable=_is_retryable_http)
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"❌ Error loading web page {url}: {e}")
+                return None
+            self.stats["bytes_downloaded"] += response.num_bytes_downloaded
+
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return {"url": url, "status": 304, "changed": False, "document": self._document(url, cached["title"], cached["text"])}
+
+        # Parsing is CPU-bound: keep it off the event loop so downloads continue meanwhile
+        title, text = await asyncio.to_thread(extract_main_text, response.text)
+        changed = not cached or cached.get("text") != text
+        self.stats["fetched"] += 1
+        if not changed:
+            self.stats["unchanged"] += 1
+
+        await asyncio.to_thread(self.cache.put, url, {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "title": title,
+            "text": text,
+            "fetched_at": time.time()
+        })
+        return {"url": url, "status": response.status_code, "changed": changed, "document": self._document(url, title, text)}
+
+    async def crawl(self, urls: Iterable[str], include_unchanged: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Fetch all urls concurrently, yielding pages in completion order"""
+        tasks = [asyncio.create_task(self.fetch(url)) for url in dict.fromkeys(urls)]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                page = await next_page
+                if page and page["document"].text and (page["changed"] or include_unchanged):
+                    yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def stream_web_chunks(
+    urls: Iterable[str],
+    chunker: Optional[DocumentChunker] = None,
+    include_unchanged: bool = True,
+    crawler: Optional[WebCrawler] = None
+) -> AsyncIterator[Document]:
+    """Section chunks of web pages, chunked page by page while the remaining downloads continue"""
+    chunker = chunker or DocumentChunker(max_section_length=1000)
+    crawler = crawler or WebCrawler()
+    start_time = time.time()
+
+    async with crawler:
+        async for page in crawler.crawl(urls, include_unchanged):
+            for chunk in chunker.chunk_by_sections(page["document"]):
+                yield chunk
+
+    stats = crawler.stats
+    print(f"🌐 Crawled in {time.time() - start_time:.1f}s: {stats['fetched']} downloaded ({stats['unchanged']} unchanged), "
+          f"{stats['not_modified']} not modified, {stats['failed']} failed, {stats['bytes_downloaded']:,} bytes")
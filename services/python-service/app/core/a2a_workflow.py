@@ -5,9 +5,57 @@ from app.agents.acadamic_agent import AcademicAgent
 from app.agents.critical_agent import CriticalAgent
 from app.agents.decision_agent import DecisionAgent
 from app.core.decision_workflow import get_persona_prompt
-import time  # Để thêm delay nhỏ nếu cần polling
+import os
+
+# Số vòng phản biện tối đa (CriticalAgent phản biện → agent repredict) cho mỗi track
+DEBATE_MAX_ROUNDS = int(os.getenv("DEBATE_MAX_ROUNDS", "1"))
+# Dừng sớm một track khi agent và CriticalAgent cùng quyết định (repredict gần như luôn lặp lại quyết định cũ)
+DEBATE_EARLY_STOP = {
+    "AcademicAgent": os.getenv("DEBATE_EARLY_STOP_ACADEMIC", "true").lower() == "true",
+    "FinanceAgent": os.getenv("DEBATE_EARLY_STOP_FINANCE", "true").lower() == "true",
+}
+
+# Message types của từng track: hồ sơ vòng 1 -> quyết định -> repredict
+DEBATE_TRACKS = {
+    "AcademicAgent": {"application": "scholarship_application", "decision": "scholarship_decision", "repredict": "repredict_scholarship"},
+    "FinanceAgent": {"application": "loan_application", "decision": "loan_decision", "repredict": "repredict_loan"},
+}
+
+def debate_turn(agent, payload, target=None):
+    """One agent's message in a debate round: decision + reason (critic: recommended_decision + critical_response)"""
+    payload = payload if isinstance(payload, dict) else {}
+    return {
+        "agent": agent,
+        "target": target,
+        "decision": payload.get("decision") or payload.get("recommended_decision"),
+        "reason": payload.get("reason") or payload.get("critical_response")
+    }
+
+def normalize_decision(decision):
+    """'approve' | 'reject' | None"""
+    decision = str(decision or "").strip().lower()
+    return decision if decision in ("approve", "reject") else None
+
+def has_converged(position, critique):
+    """Agent decision and CriticalAgent's recommended_decision agree"""
+    agent_decision = normalize_decision((position or {}).get("decision"))
+    return agent_decision is not None and agent_decision == normalize_decision((critique or {}).get("recommended_decision"))
+
+def debate_to_decide_workflow(profile, return_log: bool = False, on_round=None, max_rounds=None, early_stop=None):
+    """
+    on_round: optional callback called after each debate round with
+    {"round": n, "stage": "arguments" | "critique" | "rebuttal" | "decision", "turns": [debate_turn(...)]}
+    (used by the gRPC DebateLoan stream; called from the thread running the workflow)
+    max_rounds: số vòng critique → repredict tối đa (mặc định DEBATE_MAX_ROUNDS)
+    early_stop: {"AcademicAgent": bool, "FinanceAgent": bool} - dừng track khi hội tụ (mặc định DEBATE_EARLY_STOP)
+    """
+    max_rounds = DEBATE_MAX_ROUNDS if max_rounds is None else max_rounds
+    early_stop = {**DEBATE_EARLY_STOP, **(early_stop or {})}
+
+    def emit_round(round_number, stage, turns):
+        if on_round:
+            on_round({"round": round_number, "stage": stage, "turns": [turn for turn in turns if turn]})
 
-def debate_to_decide_workflow(profile, return_log: bool = False):
     # Khởi tạo bộ nhớ phiên làm việc
     session_memory = SessionMemory()
 
@@ -30,56 +78,16 @@ def debate_to_decide_workflow(profile, return_log: bool = False):
         return orig_route_message(sender, recipient, message_type, payload)
     coordinator.route_message = route_message_with_memory
 
-    # Vòng 1: Initial Arguments - SUBJECTIVE DEBATE
-    print("\n=== Vòng 1: Subjective Arguments ===")
-    academic_prompt = get_persona_prompt("optimist", profile)
-    finance_prompt = get_persona_prompt("realist", profile)
-    coordinator.route_message("coordinator", "AcademicAgent", "scholarship_application", {"profile": academic_prompt})
-    coordinator.route_message("coordinator", "FinanceAgent", "loan_application", {"profile": finance_prompt})
-
-    # Đợi một chút để agents xử lý
-    time.sleep(1)
-
-    # Vòng 2: Critique & Rebuttal - SUBJECTIVE CRITIQUE
-    print("\n=== Vòng 2: Critique & Rebuttal ===")
-
-    # Thu thập decisions từ Vòng 1
-    academic_decision = None
-    finance_decision = None
-
-    for entry in list(coordinator.message_log):
-        msg_type = entry["message"].get("type")
-        # Đúng: Tìm message TỪ agents response lại
-        if entry["from"] == "AcademicAgent" and msg_type == "scholarship_decision":
-            academic_decision = entry["message"]["payload"]
-        elif entry["from"] == "FinanceAgent" and msg_type == "loan_decision":
-            finance_decision = entry["message"]["payload"]
+    def ask(recipient, message_type, payload, reply_type):
+        # route_message chạy đồng bộ: phản hồi của agent đã có trong message_log khi hàm trả về (không cần sleep)
+        start = len(coordinator.message_log)
+        coordinator.route_message("coordinator", recipient, message_type, payload)
+        reply = None
+        for entry in coordinator.message_log[start:]:
+            if entry["from"] == recipient and entry["message"].get("type") == reply_type:
+                reply = entry["message"]["payload"]
+        return reply
 
-    # Gửi tuần tự từng decision cho CriticalAgent và nhận phản biện riêng
-    critical_responses = {"AcademicAgent": None, "FinanceAgent": None}
-    if academic_decision:
-        critic_prompt = get_persona_prompt("critic", profile=None, argument=str(academic_decision))
-        coordinator.route_message("coordinator", "CriticalAgent", "scholarship_decision", {"argument": critic_prompt, "decision": academic_decision})
-    if finance_decision:
-        critic_prompt = get_persona_prompt("critic", profile=None, argument=str(finance_decision))
-        coordinator.route_message("coordinator", "CriticalAgent", "loan_decision", {"argument": critic_prompt, "decision": finance_decision})
-    if not academic_decision or not finance_decision:
-        print("⚠️ Warning: Không tìm thấy đủ decisions từ cả 2 agents")
-        print(f"Academic decision: {'✅' if academic_decision else '❌'}")
-        print(f"Finance decision: {'✅' if finance_decision else '❌'}")
-
-    # Đợi critical responses
-    time.sleep(5)
-
-    # Thu thập phản biện cho từng agent
-    for entry in list(coordinator.message_log):
-        msg_type = entry["message"].get("type")
-        if entry["from"] == "CriticalAgent" and msg_type == "scholarship_decision_critical_response":
-            critical_responses["AcademicAgent"] = entry["message"]["payload"]
-        elif entry["from"] == "CriticalAgent" and msg_type == "loan_decision_critical_response":
-            critical_responses["FinanceAgent"] = entry["message"]["payload"]
-
-    # Cơ chế repredict: AcademicAgent và FinanceAgent dự đoán lại dựa trên phản biện (chỉ 1 lần)
     def simplify_memory(memory_data):
         result = []
         for item in memory_data:
@@ -91,27 +99,92 @@ def debate_to_decide_workflow(profile, return_log: bool = False):
                 result.append(str(item))
         return result
 
-    repredict_done = {"AcademicAgent": False, "FinanceAgent": False}
-    memory_data = simplify_memory(session_memory.get_conversation())
-    if critical_responses["AcademicAgent"]:
-        critical_data = critical_responses["AcademicAgent"]
-        coordinator.route_message("coordinator", "AcademicAgent", "repredict_scholarship", {
-            "memory": memory_data,
-            "critical_response": critical_data.get("critical_response", ""),
-            "recommended_decision": critical_data.get("recommended_decision", "")
-        })
-        repredict_done["AcademicAgent"] = True
-    if critical_responses["FinanceAgent"]:
-        critical_data = critical_responses["FinanceAgent"]
-        coordinator.route_message("coordinator", "FinanceAgent", "repredict_loan", {
-            "memory": memory_data,
-            "critical_response": critical_data.get("critical_response", ""),
-            "recommended_decision": critical_data.get("recommended_decision", "")
-        })
-        repredict_done["FinanceAgent"] = True
+    # Vòng 1: Initial Arguments - SUBJECTIVE DEBATE
+    print("\n=== Vòng 1: Subjective Arguments ===")
+    academic_decision = ask("AcademicAgent", "scholarship_application", {"profile": get_persona_prompt("optimist", profile)}, "scholarship_decision")
+    finance_decision = ask("FinanceAgent", "loan_application", {"profile": get_persona_prompt("realist", profile)}, "loan_decision")
 
-    # Đợi repredict hoàn thành
-    time.sleep(5)
+    emit_round(1, "arguments", [
+        debate_turn("AcademicAgent", academic_decision) if academic_decision else None,
+        debate_turn("FinanceAgent", finance_decision) if finance_decision else None
+    ])
+
+    if not academic_decision or not finance_decision:
+        print("⚠️ Warning: Không tìm thấy đủ decisions từ cả 2 agents")
+        print(f"Academic decision: {'✅' if academic_decision else '❌'}")
+        print(f"Finance decision: {'✅' if finance_decision else '❌'}")
+
+    # Vòng 2: Critique & Rebuttal - SUBJECTIVE CRITIQUE
+    # Mỗi track lặp critique → repredict tối đa max_rounds lần, dừng sớm khi agent và CriticalAgent đồng ý
+    positions = {"AcademicAgent": academic_decision, "FinanceAgent": finance_decision}
+    critical_responses = {"AcademicAgent": None, "FinanceAgent": None}
+    repredicts = {"AcademicAgent": None, "FinanceAgent": None}
+    track_status = {agent: {"rounds": 0, "repredicts": 0, "converged": False} for agent in DEBATE_TRACKS}
+    active = [agent for agent in DEBATE_TRACKS if positions[agent]]
+    round_number = 1
+
+    for debate_round in range(1, max_rounds + 1):
+        if not active:
+            break
+        round_number += 1
+        print(f"\n=== Vòng 2: Critique & Rebuttal (lượt {debate_round}/{max_rounds}) ===")
+
+        # Gửi tuần tự quyết định hiện tại của từng track cho CriticalAgent và nhận phản biện riêng
+        round_critiques = {}
+        for agent in active:
+            decision_type = DEBATE_TRACKS[agent]["decision"]
+            critic_prompt = get_persona_prompt("critic", profile=None, argument=str(positions[agent]))
+            critique = ask("CriticalAgent", decision_type, {"argument": critic_prompt, "decision": positions[agent]}, f"{decision_type}_critical_response")
+            track_status[agent]["rounds"] = debate_round
+            if critique:
+                round_critiques[agent] = critical_responses[agent] = critique
+
+        emit_round(round_number, "critique", [
+            debate_turn("CriticalAgent", round_critiques[agent], target=agent) for agent in active if agent in round_critiques
+        ])
+
+        # Repredict: chỉ các track chưa hội tụ
+        memory_data = simplify_memory(session_memory.get_conversation())
+        rebuttal_turns = []
+        for agent in list(active):
+            critique = round_critiques.get(agent)
+            if not critique:
+                active.remove(agent)
+                continue
+            if early_stop[agent] and has_converged(positions[agent], critique):
+                print(f"[Coordinator] ✅ {agent} và CriticalAgent cùng quyết định '{normalize_decision(critique.get('recommended_decision'))}' - bỏ qua repredict")
+                track_status[agent]["converged"] = True
+                active.remove(agent)
+                continue
+
+            repredict_type = DEBATE_TRACKS[agent]["repredict"]
+            repredict = ask(agent, repredict_type, {
+                "memory": memory_data,
+                "critical_response": critique.get("critical_response", ""),
+                "recommended_decision": critique.get("recommended_decision", "")
+            }, repredict_type)
+            if not repredict:
+                active.remove(agent)
+                continue
+            repredicts[agent] = positions[agent] = repredict
+            track_status[agent]["repredicts"] += 1
+            rebuttal_turns.append(debate_turn(agent, repredict))
+
+            # Agent chấp nhận khuyến nghị của CriticalAgent: đã đồng ý, không cần phản biện thêm
+            if early_stop[agent] and has_converged(repredict, critique):
+                track_status[agent]["converged"] = True
+                active.remove(agent)
+
+        if rebuttal_turns:
+            emit_round(round_number, "rebuttal", rebuttal_turns)
+
+    for agent, status in track_status.items():
+        status["final_decision"] = normalize_decision((positions[agent] or {}).get("decision"))
+    debate_summary = {
+        "max_rounds": max_rounds,
+        "rounds": round_number - 1,
+        "tracks": {"academic": track_status["AcademicAgent"], "finance": track_status["FinanceAgent"]}
+    }
 
     # Vòng 3: HYBRID DECISION - Subjective → Objective
     print("\n=== Vòng 3: Hybrid Decision (Subjective → Rule-Based) ===")
@@ -122,36 +195,20 @@ def debate_to_decide_workflow(profile, return_log: bool = False):
         "loan_decision": finance_decision if finance_decision else {},
         "scholarship_decision_critical_response": critical_responses["AcademicAgent"] if critical_responses["AcademicAgent"] else {},
         "loan_decision_critical_response": critical_responses["FinanceAgent"] if critical_responses["FinanceAgent"] else {},
-        "repredict_scholarship": {},
-        "repredict_loan": {},
+        "repredict_scholarship": repredicts["AcademicAgent"] if repredicts["AcademicAgent"] else {},
+        "repredict_loan": repredicts["FinanceAgent"] if repredicts["FinanceAgent"] else {},
         "original_profile": profile  # ⭐ PASS PROFILE FOR RULE EXTRACTION ⭐
     }
-    # Thu thập repredict từ message_log với safety check
-    for entry in list(coordinator.message_log):
-        msg_type = entry["message"].get("type")
-        if entry["from"] == "AcademicAgent" and msg_type == "repredict_scholarship":
-            payload = entry["message"]["payload"]
-            merged_payload["repredict_scholarship"] = payload if payload else {}
-        elif entry["from"] == "FinanceAgent" and msg_type == "repredict_loan":
-            payload = entry["message"]["payload"]
-            merged_payload["repredict_loan"] = payload if payload else {}
 
     print(f"[Coordinator] HYBRID: Subjective debate → Objective rule-based decision")
     print(f"[Debug] Original profile available: {bool(profile)}")
     print(f"[Debug] Academic data valid: {bool(merged_payload['scholarship_decision'])}")
     print(f"[Debug] Finance data valid: {bool(merged_payload['loan_decision'])}")
     
-    coordinator.route_message("coordinator", "DecisionAgent", "aggregate_all", merged_payload)
+    # Quyết định cuối cùng từ DecisionAgent
+    final_decision = ask("DecisionAgent", "aggregate_all", merged_payload, "final_decision")
 
-    # Đợi final decision
-    time.sleep(1)
-
-    # Tìm quyết định cuối cùng từ DecisionAgent
-    final_decision = None
-    for entry in reversed(coordinator.message_log):  # Duyệt ngược để lấy mới nhất
-        if entry["from"] == "DecisionAgent" and entry["message"].get("type") == "final_decision":
-            final_decision = entry["message"]["payload"]
-            break
+    emit_round(round_number + 1, "decision", [debate_turn("DecisionAgent", final_decision) if final_decision else None])
 
     if return_log:
         # Thu thập 4 response chính theo yêu cầu
@@ -188,6 +245,10 @@ def debate_to_decide_workflow(profile, return_log: bool = False):
                 critical_finance = payload
                 print(f"[Workflow] ✅ Found critical_finance: {payload}")
         
+        # Track dừng sớm (không repredict): quyết định của agent được giữ nguyên
+        academic_repredict = academic_repredict or positions["AcademicAgent"]
+        finance_repredict = finance_repredict or positions["FinanceAgent"]
+        
         print(f"[Workflow] 📊 Collection summary:")
         print(f"  - academic_repredict: {'✅' if academic_repredict else '❌'}")
         print(f"  - finance_repredict: {'✅' if finance_repredict else '❌'}")
@@ -264,6 +325,9 @@ def debate_to_decide_workflow(profile, return_log: bool = False):
                 }
             }
             
+            # Debate rounds / convergence per track
+            result["debate"] = debate_summary
+            
             return result
         else:
             # Fallback nếu DecisionAgent hoàn toàn fail - use safe handling
@@ -302,7 +366,8 @@ def debate_to_decide_workflow(profile, return_log: bool = False):
                     "decision": "reject",
                     "reason": "Lỗi hệ thống",
                     "error": "decision_agent_failed"
-                }
+                },
+                "debate": debate_summary
             }
     else:
         for entry in session_memory.get_conversation():
@@ -0,0 +1,160 @@
+"""
+Async TTL + LRU cache with request coalescing
+Used to keep per-citizen lookups (user, student, academic) off the database for follow-up chat turns
+"""
+
+import asyncio
+import copy
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class AsyncTTLCache:
+    """
+    In-process async cache.
+
+    - Entries expire after `ttl_seconds` and the least recently used entry is evicted past `max_entries`
+    - Concurrent misses for the same key share one loader call (request coalescing)
+    - Keys are (namespace, owner) tuples so every entry of one owner (citizen_id) can be invalidated at once
+    - Values are deep-copied on the way in and out: callers may mutate what they get without corrupting the
+      cached entry (or another caller's result)
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 1024, name: str = "cache"):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._generation: Dict[Hashable, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _get_fresh(self, key: Tuple[str, Hashable]) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, namespace: str, owner: Hashable) -> Optional[Any]:
+        """Return a cached value or None"""
+        found, value = self._get_fresh((namespace, owner))
+        return copy.deepcopy(value) if found else None
+
+    def set(self, namespace: str, owner: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries past max_entries"""
+        key = (namespace, owner)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        owner: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True
+    ) -> Any:
+        """
+        Get a value, calling `loader` on a miss. Concurrent callers for the same key await the same load.
+
+        Args:
+            namespace: Kind of data (e.g. "user", "academic")
+            owner: Owner key (e.g. citizen_id)
+            loader: Coroutine factory that fetches the value
+            should_cache: Predicate deciding whether a loaded value is stored (e.g. skip error results)
+        """
+        key = (namespace, owner)
+
+        found, value = self._get_fresh(key)
+        if found:
+            self.hits += 1
+            return copy.deepcopy(value)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            # The loading caller owns the loaded object; waiters get their own copy
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        self.misses += 1
+        generation = self._generation.get(owner, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # Don't store a value that was invalidated while it was loading
+            if should_cache(value) and self._generation.get(owner, 0) == generation:
+                self.set(namespace, owner, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, owner: Hashable, namespace: Optional[str] = None) -> int:
+        """Drop entries of one owner (all namespaces unless one is given). Returns number of entries removed."""
+        # Loads already in flight for this owner must not write back stale data
+        if any(key[1] == owner for key in self._inflight):
+            self._generation[owner] = self._generation.get(owner, 0) + 1
+
+        keys = [key for key in self._entries if key[1] == owner and (namespace is None or key[0] == namespace)]
+        for key in keys:
+            del self._entries[key]
+
+        self.invalidations += 1
+        return len(keys)
+
+    def clear(self):
+        """Drop every entry"""
+        self._entries.clear()
+        for key in self._inflight:
+            self._generation[key[1]] = self._generation.get(key[1], 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global instance for per-citizen lookups (user, student, academic)
+citizen_data_cache = AsyncTTLCache(
+    ttl_seconds=float(os.getenv("CITIZEN_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.getenv("CITIZEN_CACHE_MAX_ENTRIES", "1000")),
+    name="citizen_data"
+)
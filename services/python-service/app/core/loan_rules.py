@@ -0,0 +1,133 @@
+"""
+Loan regulation rules (Nghị định 07/2021/NĐ-CP, Quyết định 05/2022/QĐ-TTg, Thông tư 19/2023/TT-BGDĐT, cập nhật 2025)
+
+Seven pass/fail features are derived from an application; F2 (học lực), F5 (bảo lãnh) and F7 (không nợ)
+are special:
+- more than 1 special feature failed -> reject
+- exactly 1 special feature failed  -> approve only if at least 6 of 7 features pass
+- no special feature failed         -> approve
+
+Used by DecisionAgent (one profile) and by the gRPC Predict / PredictBatch RPCs (numeric feature rows,
+vectorized with numpy).
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Layout of a numeric feature row (gRPC Predict / PredictBatch)
+FEATURE_COLUMNS = [
+    "family_income",         # VND / tháng
+    "gpa",                   # thang 1 (0.72) hoặc thang 10 (7.2)
+    "is_public_university",  # 1 = trường công lập
+    "major_priority",        # 1 = ngành ưu tiên (STEM, Y khoa, Sư phạm...)
+    "has_guarantor",         # 1 = có người bảo lãnh
+    "loan_amount",           # VND
+    "existing_debt",         # 1 = đang có nợ
+]
+ROW_SIZE = len(FEATURE_COLUMNS)
+
+FEATURE_NAMES = [
+    "feature_1_thu_nhap",
+    "feature_2_hoc_luc",
+    "feature_3_truong_hoc",
+    "feature_4_nganh_uu_tien",
+    "feature_5_bao_lanh",
+    "feature_6_khoan_vay",
+    "feature_7_no_existing_debt",
+]
+SPECIAL_FEATURES = ["feature_2_hoc_luc", "feature_5_bao_lanh", "feature_7_no_existing_debt"]
+SPECIAL_INDEXES = [FEATURE_NAMES.index(name) for name in SPECIAL_FEATURES]
+
+MAX_FAMILY_INCOME = 8_000_000   # F1: thu nhập gia đình ≤ 8 triệu/tháng
+MIN_GPA = 0.65                  # F2: GPA chuẩn hóa ≥ 0.65
+MAX_LOAN_AMOUNT = 60_000_000    # F6: khoản vay ≤ 60 triệu
+MIN_PASSED_WITH_ONE_VIOLATION = 6
+
+
+def normalize_gpa(gpa: float) -> float:
+    """Thang 10 -> thang 1 (values ≤ 1 are already normalized)"""
+    return gpa / 10.0 if gpa > 1 else gpa
+
+
+def rule_features(
+    family_income: float,
+    gpa: float,
+    is_public_university: bool,
+    major_priority: bool,
+    has_guarantor: bool,
+    loan_amount: float,
+    has_debt: bool
+) -> Dict[str, bool]:
+    """The seven regulation features of one application"""
+    return {
+        "feature_1_thu_nhap": family_income <= MAX_FAMILY_INCOME,
+        "feature_2_hoc_luc": normalize_gpa(gpa) >= MIN_GPA,
+        "feature_3_truong_hoc": bool(is_public_university),
+        "feature_4_nganh_uu_tien": bool(major_priority),
+        "feature_5_bao_lanh": bool(has_guarantor),
+        "feature_6_khoan_vay": loan_amount <= MAX_LOAN_AMOUNT,
+        "feature_7_no_existing_debt": not has_debt,
+    }
+
+
+def features_from_row(row: List[float]) -> Dict[str, bool]:
+    """rule_features for a numeric row laid out as FEATURE_COLUMNS"""
+    family_income, gpa, is_public, major, guarantor, loan_amount, debt = row
+    return rule_features(family_income, gpa, is_public >= 0.5, major >= 0.5, guarantor >= 0.5, loan_amount, debt >= 0.5)
+
+
+def rule_decision(passed_count: int, special_violations: int) -> str:
+    if special_violations > 1:
+        return "reject"
+    if special_violations == 1:
+        return "approve" if passed_count >= MIN_PASSED_WITH_ONE_VIOLATION else "reject"
+    return "approve"
+
+
+def evaluate_rules(features: Dict[str, bool]) -> Dict[str, Any]:
+    """passed_count, special_violations and the rule-based decision with its reason"""
+    passed_count = sum(bool(features[name]) for name in FEATURE_NAMES)
+    special_violations = sum(1 for name in SPECIAL_FEATURES if not features[name])
+    decision = rule_decision(passed_count, special_violations)
+
+    if special_violations > 1:
+        reason = f"Vi phạm {special_violations} special features (F2,F5,F7) - TỰ ĐỘNG TỪ CHỐI theo quy định."
+    elif special_violations == 1:
+        if decision == "approve":
+            reason = f"Vi phạm 1 special feature nhưng passed_count = {passed_count} >= {MIN_PASSED_WITH_ONE_VIOLATION} - CHẤP NHẬN có điều kiện theo quy định."
+        else:
+            reason = f"Vi phạm 1 special feature và passed_count = {passed_count} < {MIN_PASSED_WITH_ONE_VIOLATION} - TỪ CHỐI theo quy định."
+    else:
+        reason = f"PASS cả 3 special features (F2,F5,F7) - CHẤP NHẬN theo quy định (passed_count = {passed_count}/{len(FEATURE_NAMES)})."
+
+    return {
+        "decision": decision,
+        "reason": reason,
+        "passed_count": passed_count,
+        "special_violations": special_violations
+    }
+
+
+def evaluate_batch(rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized evaluate_rules over an (n, ROW_SIZE) array of FEATURE_COLUMNS rows:
+    {"approved": bool[n], "passed_count": int32[n], "special_violations": int32[n]}
+    """
+    rows = np.asarray(rows, dtype=np.float64).reshape(-1, ROW_SIZE)
+    gpa = np.where(rows[:, 1] > 1, rows[:, 1] / 10.0, rows[:, 1])
+
+    passed = np.column_stack([
+        rows[:, 0] <= MAX_FAMILY_INCOME,
+        gpa >= MIN_GPA,
+        rows[:, 2] >= 0.5,
+        rows[:, 3] >= 0.5,
+        rows[:, 4] >= 0.5,
+        rows[:, 5] <= MAX_LOAN_AMOUNT,
+        rows[:, 6] < 0.5,
+    ])
+    passed_count = passed.sum(axis=1).astype(np.int32)
+    special_violations = (~passed[:, SPECIAL_INDEXES]).sum(axis=1).astype(np.int32)
+    approved = (special_violations == 0) | ((special_violations == 1) & (passed_count >= MIN_PASSED_WITH_ONE_VIOLATION))
+
+    return {"approved": approved, "passed_count": passed_count, "special_violations": special_violations}
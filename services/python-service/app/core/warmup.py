@@ -0,0 +1,128 @@
+"""
+Startup warm-up and readiness
+The FastAPI lifespan starts warm_up() in the background: the server accepts requests (and /health answers)
+immediately while MongoDB, the RAG bot and the agent stack initialize; /ready reports 503 until they are done.
+A component that fails is retried in the background with exponential backoff, so readiness recovers on its own
+once the dependency (MongoDB, Pinecone) is reachable again
+"""
+
+import asyncio
+import importlib
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+# false = initialize everything lazily on first use (old behaviour, e.g. for local scripts)
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+# Backoff between warm-up retries of a failed component: 2, 4, 8... seconds, capped at this
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "300"))
+
+# Loan-debate agents are created per request; warming them up means importing their modules (LLM clients, prompts)
+AGENT_MODULES = [
+    "app.core.a2a_workflow",
+    "app.agents.coordinator_agent",
+    "app.agents.acadamic_agent",
+    "app.agents.finance_agent",
+    "app.agents.critical_agent",
+    "app.agents.decision_agent",
+]
+
+
+class WarmupState:
+    """
+    Status of each warm-up component: pending -> warming -> ready | failed (-> warming again on retry)
+    With warm-up disabled every component is "lazy": initialized on first use, and the process counts as ready
+    """
+
+    def __init__(self, components, lazy: bool = False):
+        self.components: Dict[str, Dict[str, Any]] = {
+            name: {"status": "lazy" if lazy else "pending"} for name in components
+        }
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def ready(self) -> bool:
+        return all(component["status"] in ("ready", "lazy") for component in self.components.values())
+
+    @property
+    def status(self) -> str:
+        if all(component["status"] == "lazy" for component in self.components.values()):
+            return "lazy"
+        if self.ready:
+            return "ready"
+        if any(component["status"] == "failed" for component in self.components.values()):
+            return "degraded"
+        return "warming_up"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "components": self.components,
+            "warmup_seconds": round((self.finished_at or time.time()) - self.started_at, 2) if self.started_at else None
+        }
+
+
+warmup_state = WarmupState(["mongodb", "agents", "rag_bot"], lazy=not STARTUP_WARMUP)
+
+
+async def _warm(name: str, initializer: Callable[[], Awaitable[Any]]):
+    """Initialize one component, retrying with exponential backoff until it succeeds"""
+    component = warmup_state.components[name]
+    attempt = 0
+    while True:
+        component["status"] = "warming"
+        start_time = time.time()
+        try:
+            details = await initializer()
+            component.update({"status": "ready", "seconds": round(time.time() - start_time, 2), "attempts": attempt + 1})
+            component.pop("error", None)
+            component.pop("retry_in", None)
+            if isinstance(details, dict):
+                component["details"] = details
+            print(f"🔥 {name} warmed up in {component['seconds']}s")
+            return
+        except Exception as e:
+            delay = min(WARMUP_RETRY_MAX_SECONDS, 2 ** (attempt + 1)) * (0.5 + random.random() / 2)
+            component.update({
+                "status": "failed",
+                "error": str(e),
+                "seconds": round(time.time() - start_time, 2),
+                "attempts": attempt + 1,
+                "retry_in": round(delay, 1)
+            })
+            print(f"❌ {name} warm-up failed (attempt {attempt + 1}), retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def _warm_mongodb():
+    from app.database.connection import mongo_registry
+    if not await mongo_registry.connect():
+        raise Exception("MongoDB ping failed")
+
+
+async def _warm_agents():
+    await asyncio.to_thread(lambda: [importlib.import_module(module) for module in AGENT_MODULES])
+    return {"modules": len(AGENT_MODULES)}
+
+
+async def _warm_rag_bot():
+    from app.botagent.main_bot import get_rag_bot
+    # Connecting to Pinecone and loading the index block: build the bot in a worker thread
+    bot = await asyncio.to_thread(get_rag_bot)
+    return await bot.warm_up()
+
+
+async def warm_up():
+    """Initialize all components concurrently; returns once every component is ready (failures are retried)"""
+    warmup_state.started_at = time.time()
+    await asyncio.gather(
+        _warm("mongodb", _warm_mongodb),
+        _warm("agents", _warm_agents),
+        _warm("rag_bot", _warm_rag_bot)
+    )
+    warmup_state.finished_at = time.time()
+    print(f"{'✅' if warmup_state.ready else '⚠️'} Warm-up finished in {warmup_state.finished_at - warmup_state.started_at:.1f}s")
@@ -0,0 +1,221 @@
+"""
+Shared MongoDB client registry
+One pooled AsyncIOMotorClient per cluster, reused by FastAPI, the MCP server and MCP function calling
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from pymongo import monitoring
+
+# Credentials belong in .env (CONNECTION_STRING); never in code
+DEFAULT_CONNECTION_STRING = "mongodb://localhost:27017"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Collect connection pool utilisation from pymongo pool events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pools = 0
+        self.connections_open = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+        self._checkout_started: Dict[Any, float] = {}
+        self.total_checkout_wait_ms = 0.0
+
+    def pool_created(self, event):
+        with self._lock:
+            self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.pools = max(0, self.pools - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+            self.connections_open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+            self.connections_open = max(0, self.connections_open - 1)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._checkout_started[(event.address, threading.get_ident())] = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+            self._checkout_started.pop((event.address, threading.get_ident()), None)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            started = self._checkout_started.pop((event.address, threading.get_ident()), None)
+            if started is not None:
+                self.total_checkout_wait_ms += (time.perf_counter() - started) * 1000
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pools": self.pools,
+                "connections_open": self.connections_open,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "connections_in_use": self.checked_out,
+                "max_connections_in_use": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+                "avg_checkout_wait_ms": round(self.total_checkout_wait_ms / self.checkouts, 3) if self.checkouts else 0.0
+            }
+
+
+class MongoClientRegistry:
+    """
+    Process-wide registry of pooled MongoDB clients, keyed by connection string
+    Settings are read from the environment when used (not at import), so a .env loaded after this module
+    is imported still applies
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Any] = {}
+        self._listeners: Dict[str, PoolMetricsListener] = {}
+
+    @property
+    def connection_string(self) -> str:
+        return os.getenv("CONNECTION_STRING", DEFAULT_CONNECTION_STRING)
+
+    @property
+    def database_name(self) -> str:
+        return os.getenv("DATABASE_NAME", "Attacker_Database").strip()
+
+    # Pool sizing (per client, per process)
+    @property
+    def max_pool_size(self) -> int:
+        return int(os.getenv("MONGODB_MAX_POOL_SIZE", "20"))
+
+    @property
+    def min_pool_size(self) -> int:
+        return int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+
+    @property
+    def max_idle_time_ms(self) -> int:
+        return int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+
+    @property
+    def wait_queue_timeout_ms(self) -> int:
+        return int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+
+    @property
+    def server_selection_timeout_ms(self) -> int:
+        return int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+
+    def get_client(self, connection_string: Optional[str] = None):
+        """Get (or lazily create) the shared client for a connection string"""
+        url = connection_string or self.connection_string
+
+        client = self._clients.get(url)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(url)
+            if client is None:
+                from motor.motor_asyncio import AsyncIOMotorClient
+
+                listener = PoolMetricsListener()
+                client = AsyncIOMotorClient(
+                    url,
+                    maxPoolSize=self.max_pool_size,
+                    minPoolSize=self.min_pool_size,
+                    maxIdleTimeMS=self.max_idle_time_ms,
+                    waitQueueTimeoutMS=self.wait_queue_timeout_ms,
+                    serverSelectionTimeoutMS=self.server_selection_timeout_ms,
+                    event_listeners=[listener]
+                )
+                self._clients[url] = client
+                self._listeners[url] = listener
+                print(f"🔌 MongoDB client created (maxPoolSize={self.max_pool_size}, minPoolSize={self.min_pool_size})")
+        return client
+
+    def get_database(self, database_name: Optional[str] = None, connection_string: Optional[str] = None):
+        """Get a database handle on the shared client"""
+        return self.get_client(connection_string)[database_name or self.database_name]
+
+    async def connect(self) -> bool:
+        """Open the default client and warm its pool with a ping"""
+        try:
+            await self.get_client().admin.command('ping')
+            return True
+        except Exception as e:
+            print(f"❌ MongoDB connection failed: {e}")
+            return False
+
+    def close_all(self):
+        """Close every registered client (call on process shutdown)"""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            closed = len(self._clients)
+            self._clients.clear()
+            self._listeners.clear()
+        if closed:
+            print(f"🔌 Closed {closed} MongoDB client(s)")
+
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Pool utilisation per registered client"""
+        clients = []
+        for index, (url, listener) in enumerate(list(self._listeners.items())):
+            metrics = listener.snapshot()
+            metrics["client"] = index
+            metrics["host"] = url.split("@")[-1].split("/")[0]
+            metrics["utilisation"] = round(metrics["connections_in_use"] / self.max_pool_size, 3) if self.max_pool_size else 0.0
+            clients.append(metrics)
+
+        return {
+            "max_pool_size": self.max_pool_size,
+            "min_pool_size": self.min_pool_size,
+            "clients": clients
+        }
+
+
+# Global instance
+mongo_registry = MongoClientRegistry()
+
+
+def get_mongo_client(connection_string: Optional[str] = None):
+    """Shared AsyncIOMotorClient for this process"""
+    return mongo_registry.get_client(connection_string)
+
+
+def get_mongo_database(database_name: Optional[str] = None):
+    """Shared database handle for this process"""
+    return mongo_registry.get_database(database_name)
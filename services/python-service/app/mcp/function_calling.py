@@ -6,20 +6,50 @@ Lấy dữ liệu từ MongoDB để bồi context cho chatbot
 import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional, Union
+import os
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
 from datetime import datetime
 from dataclasses import dataclass
-import motor.motor_asyncio
-import os
+from bson import ObjectId
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables (before app modules read their settings)
 load_dotenv()
 
+from app.database.connection import mongo_registry
+from app.mcp.loan_rollups import LoanStatisticsRollup
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Hard cap on documents a single tool call may return (or stream)
+MAX_DOCUMENTS_PER_CALL = int(os.getenv("MCP_MAX_DOCUMENTS_PER_CALL", "100"))
+DEFAULT_PAGE_SIZE = 20
+STREAM_BATCH_SIZE = 50
+
+# Projections: only fetch the fields the tools actually return
+LOAN_PROJECTION = {
+    "amount": 1, "purpose": 1, "status": 1, "interest_rate": 1,
+    "term_months": 1, "created_at": 1, "approval_status": 1
+}
+ACADEMIC_PROJECTION = {
+    "semester": 1, "year": 1, "gpa": 1, "credits": 1, "subjects": 1, "achievements": 1
+}
+MAS_CONVERSATION_PROJECTION = {
+    "loan_id": 1, "citizen_id": 1, "final_decision": 1, "decision_reason": 1,
+    "agents_involved": 1, "conversation_summary": 1, "created_at": 1
+}
+STUDENT_SUMMARY_PROJECTION = {
+    "student_id": 1, "citizen_id": 1, "university": 1, "major": 1, "year": 1, "gpa": 1
+}
+
+def _clamp_limit(limit: Optional[int]) -> int:
+    """Keep a requested page size within [1, MAX_DOCUMENTS_PER_CALL]"""
+    if not limit:
+        return min(DEFAULT_PAGE_SIZE, MAX_DOCUMENTS_PER_CALL)
+    return max(1, min(int(limit), MAX_DOCUMENTS_PER_CALL))
+
 @dataclass
 class UserContext:
     """User context data structure"""
@@ -33,31 +63,30 @@ class MCPDatabaseConnector:
     """MongoDB connector for MCP server"""
     
     def __init__(self):
-        self.connection_string = os.getenv("CONNECTION_STRING")
-        self.database_name = os.getenv("DATABASE_NAME", "Attacker_Database")
         self.client = None
         self.db = None
         
     async def connect(self):
-        """Connect to MongoDB"""
+        """Connect to MongoDB using the shared client"""
         try:
-            self.client = motor.motor_asyncio.AsyncIOMotorClient(self.connection_string)
-            self.db = self.client[self.database_name]
+            self.client = mongo_registry.get_client()
+            self.db = self.client[mongo_registry.database_name]
             logger.info("Connected to MongoDB successfully")
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
     
     async def close(self):
-        """Close MongoDB connection"""
-        if self.client:
-            self.client.close()
+        """Release the shared client (the registry owns its lifecycle)"""
+        self.client = None
+        self.db = None
 
 class MCPFunctionCalling:
     """MCP Function Calling implementation for RAG Bot"""
     
     def __init__(self):
         self.db_connector = MCPDatabaseConnector()
+        self.loan_rollup: Optional[LoanStatisticsRollup] = None
         self.available_functions = {
             "get_user_profile": self.get_user_profile,
             "get_student_info": self.get_student_info,
@@ -68,12 +97,184 @@ class MCPFunctionCalling:
             "search_students_by_university": self.search_students_by_university,
             "get_loan_statistics": self.get_loan_statistics
         }
+        self.available_streams = {
+            "get_user_loans": self.stream_user_loans,
+            "get_academic_info": self.stream_academic_info,
+            "get_mas_conversations": self.stream_mas_conversations,
+            "search_students_by_university": self.stream_students_by_university
+        }
     
     async def initialize(self):
         """Initialize MCP server"""
         await self.db_connector.connect()
+        self.loan_rollup = LoanStatisticsRollup(self.db_connector.db)
         logger.info("MCP Function Calling initialized")
     
+    # ---- Result builders (shared by single-collection tools and the $lookup context pipeline) ----
+    
+    @staticmethod
+    def _user_profile_result(user: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not user:
+            return {"error": "Không tìm thấy người dùng"}
+        
+        return {
+            "success": True,
+            "data": {
+                "name": user.get("name", "N/A"),
+                "citizen_id": user.get("citizen_id", "N/A"),
+                "email": user.get("email", "N/A"),
+                "phone": user.get("phone", "N/A"),
+                "address": user.get("address", "N/A"),
+                "kyc_status": user.get("kyc_status", "Pending"),
+                "role": user.get("role", "User"),
+                "gender": user.get("gender", "N/A"),
+                "birth": str(user.get("birth", "N/A")),
+                "created_at": str(user.get("created_at", "N/A"))
+            }
+        }
+    
+    @staticmethod
+    def _student_info_result(student: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not student:
+            return {"error": "Không tìm thấy thông tin sinh viên"}
+        
+        return {
+            "success": True,
+            "data": {
+                "student_id": student.get("student_id", "N/A"),
+                "citizen_id": student.get("citizen_id", "N/A"),
+                "university": student.get("university", "N/A"),
+                "major": student.get("major", "N/A"),
+                "year": student.get("year", "N/A"),
+                "gpa": student.get("gpa", "N/A"),
+                "status": student.get("status", "N/A"),
+                "graduation_date": str(student.get("graduation_date", "N/A"))
+            }
+        }
+    
+    @staticmethod
+    def _format_loan(loan: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "loan_id": str(loan.get("_id")),
+            "amount": loan.get("amount", 0),
+            "purpose": loan.get("purpose", "N/A"),
+            "status": loan.get("status", "N/A"),
+            "interest_rate": loan.get("interest_rate", 0),
+            "term_months": loan.get("term_months", 0),
+            "created_at": str(loan.get("created_at", "N/A")),
+            "approval_status": loan.get("approval_status", "Pending")
+        }
+    
+    @staticmethod
+    def _format_academic(academic: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "semester": academic.get("semester", "N/A"),
+            "year": academic.get("year", "N/A"),
+            "gpa": academic.get("gpa", 0),
+            "credits": academic.get("credits", 0),
+            "subjects": academic.get("subjects", []),
+            "achievements": academic.get("achievements", [])
+        }
+    
+    @staticmethod
+    def _format_mas_conversation(conv: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "conversation_id": str(conv.get("_id")),
+            "loan_id": conv.get("loan_id", "N/A"),
+            "citizen_id": conv.get("citizen_id", "N/A"),
+            "final_decision": conv.get("final_decision", "N/A"),
+            "decision_reason": conv.get("decision_reason", "N/A"),
+            "agents_involved": conv.get("agents_involved", []),
+            "conversation_summary": conv.get("conversation_summary", "N/A"),
+            "created_at": str(conv.get("created_at", "N/A"))
+        }
+    
+    @staticmethod
+    def _format_student_summary(student: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "student_id": student.get("student_id", "N/A"),
+            "citizen_id": student.get("citizen_id", "N/A"),
+            "university": student.get("university", "N/A"),
+            "major": student.get("major", "N/A"),
+            "year": student.get("year", "N/A"),
+            "gpa": student.get("gpa", "N/A")
+        }
+    
+    @classmethod
+    def _user_loans_result(cls, loans: List[Dict[str, Any]], page: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        loan_data = [cls._format_loan(loan) for loan in loans]
+        
+        return {
+            "success": True,
+            "data": {
+                "total_loans": len(loan_data),
+                "loans": loan_data,
+                **({"page": page} if page else {})
+            }
+        }
+    
+    @classmethod
+    def _academic_info_result(cls, academics: List[Dict[str, Any]], page: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        academic_data = [cls._format_academic(academic) for academic in academics]
+        
+        return {
+            "success": True,
+            "data": {
+                "total_records": len(academic_data),
+                "academics": academic_data,
+                **({"page": page} if page else {})
+            }
+        }
+    
+    @classmethod
+    def _mas_conversations_result(cls, conversations: List[Dict[str, Any]], page: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        conversation_data = [cls._format_mas_conversation(conv) for conv in conversations]
+        
+        return {
+            "success": True,
+            "data": {
+                "total_conversations": len(conversation_data),
+                "conversations": conversation_data,
+                **({"page": page} if page else {})
+            }
+        }
+    
+    # ---- Bounded cursor helpers ----
+    
+    async def _find_page(
+        self,
+        collection,
+        query: Dict[str, Any],
+        projection: Dict[str, Any],
+        sort: List[Tuple[str, int]],
+        limit: Optional[int],
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Fetch one bounded page (limit + 1 docs to detect has_more) instead of materializing every match"""
+        limit = _clamp_limit(limit)
+        offset = max(0, int(offset or 0))
+        
+        cursor = collection.find(query, projection).sort(sort).skip(offset).limit(limit + 1)
+        docs = await cursor.to_list(length=limit + 1)
+        
+        return docs[:limit], {"limit": limit, "offset": offset, "has_more": len(docs) > limit}
+    
+    async def _stream(
+        self,
+        collection,
+        query: Dict[str, Any],
+        projection: Dict[str, Any],
+        sort: List[Tuple[str, int]],
+        max_documents: Optional[int],
+        formatter
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield formatted documents batch by batch, never more than MAX_DOCUMENTS_PER_CALL"""
+        cap = _clamp_limit(max_documents or MAX_DOCUMENTS_PER_CALL)
+        cursor = collection.find(query, projection).sort(sort).limit(cap).batch_size(min(cap, STREAM_BATCH_SIZE))
+        
+        async for doc in cursor:
+            yield formatter(doc)
+    
     async def get_user_profile(self, citizen_id: str = None, email: str = None) -> Dict[str, Any]:
         """
         Lấy thông tin profile người dùng từ collection users
@@ -95,28 +296,7 @@ class MCPFunctionCalling:
                 return {"error": "Cần cung cấp citizen_id hoặc email"}
             
             user = await self.db_connector.db.users.find_one(query)
-            
-            if user:
-                # Convert ObjectId to string
-                user["_id"] = str(user["_id"])
-                
-                return {
-                    "success": True,
-                    "data": {
-                        "name": user.get("name", "N/A"),
-                        "citizen_id": user.get("citizen_id", "N/A"),
-                        "email": user.get("email", "N/A"),
-                        "phone": user.get("phone", "N/A"),
-                        "address": user.get("address", "N/A"),
-                        "kyc_status": user.get("kyc_status", "Pending"),
-                        "role": user.get("role", "User"),
-                        "gender": user.get("gender", "N/A"),
-                        "birth": str(user.get("birth", "N/A")),
-                        "created_at": str(user.get("created_at", "N/A"))
-                    }
-                }
-            else:
-                return {"error": "Không tìm thấy người dùng"}
+            return self._user_profile_result(user)
                 
         except Exception as e:
             logger.error(f"Error getting user profile: {e}")
@@ -134,188 +314,148 @@ class MCPFunctionCalling:
         """
         try:
             student = await self.db_connector.db.students.find_one({"citizen_id": citizen_id})
-            
-            if student:
-                student["_id"] = str(student["_id"])
-                return {
-                    "success": True,
-                    "data": {
-                        "student_id": student.get("student_id", "N/A"),
-                        "citizen_id": student.get("citizen_id", "N/A"),
-                        "university": student.get("university", "N/A"),
-                        "major": student.get("major", "N/A"),
-                        "year": student.get("year", "N/A"),
-                        "gpa": student.get("gpa", "N/A"),
-                        "status": student.get("status", "N/A"),
-                        "graduation_date": str(student.get("graduation_date", "N/A"))
-                    }
-                }
-            else:
-                return {"error": "Không tìm thấy thông tin sinh viên"}
+            return self._student_info_result(student)
                 
         except Exception as e:
             logger.error(f"Error getting student info: {e}")
             return {"error": f"Lỗi khi lấy thông tin sinh viên: {str(e)}"}
     
-    async def get_user_loans(self, citizen_id: str) -> Dict[str, Any]:
+    async def get_user_loans(self, citizen_id: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> Dict[str, Any]:
         """
         Lấy danh sách khoản vay từ collection loanprofiles
         
         Args:
             citizen_id: CMND/CCCD của người dùng
+            limit: Số khoản vay tối đa (bị giới hạn bởi MAX_DOCUMENTS_PER_CALL)
+            offset: Bỏ qua N khoản vay đầu (mới nhất trước)
             
         Returns:
             Danh sách khoản vay
         """
         try:
-            loans = await self.db_connector.db.loanprofiles.find(
-                {"citizen_id": citizen_id}
-            ).sort("created_at", -1).to_list(length=None)
-            
-            loan_data = []
-            for loan in loans:
-                loan["_id"] = str(loan["_id"])
-                loan_data.append({
-                    "loan_id": str(loan.get("_id")),
-                    "amount": loan.get("amount", 0),
-                    "purpose": loan.get("purpose", "N/A"),
-                    "status": loan.get("status", "N/A"),
-                    "interest_rate": loan.get("interest_rate", 0),
-                    "term_months": loan.get("term_months", 0),
-                    "created_at": str(loan.get("created_at", "N/A")),
-                    "approval_status": loan.get("approval_status", "Pending")
-                })
-            
-            return {
-                "success": True,
-                "data": {
-                    "total_loans": len(loan_data),
-                    "loans": loan_data
-                }
-            }
+            loans, page = await self._find_page(
+                self.db_connector.db.loanprofiles,
+                {"citizen_id": citizen_id},
+                LOAN_PROJECTION,
+                [("created_at", -1), ("_id", -1)],
+                limit, offset
+            )
+            return self._user_loans_result(loans, page)
             
         except Exception as e:
             logger.error(f"Error getting user loans: {e}")
             return {"error": f"Lỗi khi lấy thông tin khoản vay: {str(e)}"}
     
-    async def get_academic_info(self, citizen_id: str) -> Dict[str, Any]:
+    async def get_academic_info(self, citizen_id: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> Dict[str, Any]:
         """
         Lấy thông tin học tập từ collection academics
         
         Args:
             citizen_id: CMND/CCCD của sinh viên
+            limit: Số bản ghi tối đa (bị giới hạn bởi MAX_DOCUMENTS_PER_CALL)
+            offset: Bỏ qua N bản ghi đầu
             
         Returns:
             Thông tin học tập
         """
         try:
-            academics = await self.db_connector.db.academics.find(
-                {"citizen_id": citizen_id}
-            ).to_list(length=None)
-            
-            academic_data = []
-            for academic in academics:
-                academic["_id"] = str(academic["_id"])
-                academic_data.append({
-                    "semester": academic.get("semester", "N/A"),
-                    "year": academic.get("year", "N/A"),
-                    "gpa": academic.get("gpa", 0),
-                    "credits": academic.get("credits", 0),
-                    "subjects": academic.get("subjects", []),
-                    "achievements": academic.get("achievements", [])
-                })
-            
-            return {
-                "success": True,
-                "data": {
-                    "total_records": len(academic_data),
-                    "academics": academic_data
-                }
-            }
+            academics, page = await self._find_page(
+                self.db_connector.db.academics,
+                {"citizen_id": citizen_id},
+                ACADEMIC_PROJECTION,
+                [("_id", 1)],
+                limit, offset
+            )
+            return self._academic_info_result(academics, page)
             
         except Exception as e:
             logger.error(f"Error getting academic info: {e}")
             return {"error": f"Lỗi khi lấy thông tin học tập: {str(e)}"}
     
-    async def get_mas_conversations(self, citizen_id: str = None, loan_id: str = None) -> Dict[str, Any]:
+    @staticmethod
+    def _mas_conversations_query(citizen_id: str = None, loan_id: str = None) -> Dict[str, Any]:
+        query = {}
+        if citizen_id:
+            query["citizen_id"] = citizen_id
+        if loan_id:
+            query["loan_id"] = loan_id
+        return query
+    
+    async def get_mas_conversations(
+        self,
+        citizen_id: str = None,
+        loan_id: str = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        offset: int = 0
+    ) -> Dict[str, Any]:
         """
         Lấy các cuộc trò chuyện MAS từ collection masconversations
         
         Args:
             citizen_id: CMND/CCCD của người dùng
             loan_id: ID của khoản vay
+            limit: Số cuộc trò chuyện tối đa (bị giới hạn bởi MAX_DOCUMENTS_PER_CALL)
+            offset: Bỏ qua N cuộc trò chuyện đầu (mới nhất trước)
             
         Returns:
             Danh sách cuộc trò chuyện MAS
         """
         try:
-            query = {}
-            if citizen_id:
-                query["citizen_id"] = citizen_id
-            if loan_id:
-                query["loan_id"] = loan_id
-            
-            conversations = await self.db_connector.db.masconversations.find(query).to_list(length=None)
-            
-            conversation_data = []
-            for conv in conversations:
-                conv["_id"] = str(conv["_id"])
-                conversation_data.append({
-                    "conversation_id": str(conv.get("_id")),
-                    "loan_id": conv.get("loan_id", "N/A"),
-                    "citizen_id": conv.get("citizen_id", "N/A"),
-                    "final_decision": conv.get("final_decision", "N/A"),
-                    "decision_reason": conv.get("decision_reason", "N/A"),
-                    "agents_involved": conv.get("agents_involved", []),
-                    "conversation_summary": conv.get("conversation_summary", "N/A"),
-                    "created_at": str(conv.get("created_at", "N/A"))
-                })
-            
-            return {
-                "success": True,
-                "data": {
-                    "total_conversations": len(conversation_data),
-                    "conversations": conversation_data
-                }
-            }
+            # Projection drops result_stringify, the full debate log stored with every conversation
+            conversations, page = await self._find_page(
+                self.db_connector.db.masconversations,
+                self._mas_conversations_query(citizen_id, loan_id),
+                MAS_CONVERSATION_PROJECTION,
+                [("created_at", -1), ("_id", -1)],
+                limit, offset
+            )
+            return self._mas_conversations_result(conversations, page)
             
         except Exception as e:
             logger.error(f"Error getting MAS conversations: {e}")
             return {"error": f"Lỗi khi lấy cuộc trò chuyện MAS: {str(e)}"}
     
-    async def search_students_by_university(self, university: str = "UEL") -> Dict[str, Any]:
+    async def search_students_by_university(
+        self,
+        university: str = "UEL",
+        limit: int = 50,
+        after_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Tìm kiếm sinh viên theo trường đại học
+        Tìm kiếm sinh viên theo trường đại học (phân trang keyset theo _id)
         
         Args:
             university: Tên trường đại học
+            limit: Số sinh viên tối đa mỗi trang (bị giới hạn bởi MAX_DOCUMENTS_PER_CALL)
+            after_id: next_after_id của trang trước để lấy trang tiếp theo
             
         Returns:
             Danh sách sinh viên
         """
         try:
-            students = await self.db_connector.db.students.find(
-                {"university": university}
-            ).limit(50).to_list(length=None)
+            query: Dict[str, Any] = {"university": university}
+            if after_id:
+                query["_id"] = {"$gt": ObjectId(after_id)}
+            
+            students, page = await self._find_page(
+                self.db_connector.db.students,
+                query,
+                STUDENT_SUMMARY_PROJECTION,
+                [("_id", 1)],
+                limit
+            )
+            page.pop("offset", None)
+            page["next_after_id"] = str(students[-1]["_id"]) if students and page["has_more"] else None
             
-            student_data = []
-            for student in students:
-                student["_id"] = str(student["_id"])
-                student_data.append({
-                    "student_id": student.get("student_id", "N/A"),
-                    "citizen_id": student.get("citizen_id", "N/A"),
-                    "university": student.get("university", "N/A"),
-                    "major": student.get("major", "N/A"),
-                    "year": student.get("year", "N/A"),
-                    "gpa": student.get("gpa", "N/A")
-                })
+            student_data = [self._format_student_summary(student) for student in students]
             
             return {
                 "success": True,
                 "data": {
                     "university": university,
                     "total_students": len(student_data),
-                    "students": student_data
+                    "students": student_data,
+                    "page": page
                 }
             }
             
@@ -323,16 +463,74 @@ class MCPFunctionCalling:
             logger.error(f"Error searching students: {e}")
             return {"error": f"Lỗi khi tìm kiếm sinh viên: {str(e)}"}
     
-    async def get_loan_statistics(self, university: str = None) -> Dict[str, Any]:
+    # ---- Streaming variants: tools consume documents incrementally, capped per call ----
+    
+    def stream_user_loans(self, citizen_id: str, max_documents: int = MAX_DOCUMENTS_PER_CALL) -> AsyncIterator[Dict[str, Any]]:
+        """Yield loans of a user (newest first) one by one"""
+        return self._stream(
+            self.db_connector.db.loanprofiles, {"citizen_id": citizen_id}, LOAN_PROJECTION,
+            [("created_at", -1), ("_id", -1)], max_documents, self._format_loan
+        )
+    
+    def stream_academic_info(self, citizen_id: str, max_documents: int = MAX_DOCUMENTS_PER_CALL) -> AsyncIterator[Dict[str, Any]]:
+        """Yield academic records of a student one by one"""
+        return self._stream(
+            self.db_connector.db.academics, {"citizen_id": citizen_id}, ACADEMIC_PROJECTION,
+            [("_id", 1)], max_documents, self._format_academic
+        )
+    
+    def stream_mas_conversations(
+        self,
+        citizen_id: str = None,
+        loan_id: str = None,
+        max_documents: int = MAX_DOCUMENTS_PER_CALL
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield MAS conversations (newest first) one by one"""
+        return self._stream(
+            self.db_connector.db.masconversations, self._mas_conversations_query(citizen_id, loan_id),
+            MAS_CONVERSATION_PROJECTION, [("created_at", -1), ("_id", -1)], max_documents, self._format_mas_conversation
+        )
+    
+    def stream_students_by_university(self, university: str = "UEL", max_documents: int = MAX_DOCUMENTS_PER_CALL) -> AsyncIterator[Dict[str, Any]]:
+        """Yield students of a university one by one"""
+        return self._stream(
+            self.db_connector.db.students, {"university": university}, STUDENT_SUMMARY_PROJECTION,
+            [("_id", 1)], max_documents, self._format_student_summary
+        )
+    
+    async def get_loan_statistics(self, university: str = None, days: int = None) -> Dict[str, Any]:
         """
-        Lấy thống kê khoản vay
+        Lấy thống kê khoản vay (đọc từ bảng tổng hợp loanstats_*, xem loan_rollups)
         
         Args:
             university: Tên trường đại học (tùy chọn)
+            days: Kèm thống kê theo ngày cho N ngày gần nhất (tùy chọn)
             
         Returns:
             Thống kê khoản vay
         """
+        try:
+            if self.loan_rollup is None:
+                self.loan_rollup = LoanStatisticsRollup(self.db_connector.db)
+            
+            rollup = await self.loan_rollup.get_statistics(university)
+            data = {
+                "university": university if university else "All",
+                "statistics": rollup["statistics"],
+                "as_of": rollup["as_of"]
+            }
+            if days:
+                data["daily"] = await self.loan_rollup.get_daily_statistics(university, days)
+            
+            return {"success": True, "data": data}
+            
+        except Exception as e:
+            # Rollups unavailable (e.g. $merge not supported): fall back to the live aggregation
+            logger.warning(f"Loan statistics rollup unavailable, aggregating live: {e}")
+            return await self._live_loan_statistics(university)
+    
+    async def _live_loan_statistics(self, university: str = None) -> Dict[str, Any]:
+        """Ad-hoc aggregation over every loan (fallback when the rollups can't be used)"""
         try:
             # Aggregate loan statistics
             pipeline = []
@@ -377,41 +575,112 @@ class MCPFunctionCalling:
             logger.error(f"Error getting loan statistics: {e}")
             return {"error": f"Lỗi khi lấy thống kê khoản vay: {str(e)}"}
     
-    async def get_comprehensive_user_context(self, citizen_id: str) -> Dict[str, Any]:
+    def _comprehensive_context_pipeline(self, citizen_id: str) -> List[Dict[str, Any]]:
+        """
+        Aggregation pipeline assembling the whole user context server-side (1 round trip).
+        Uses the localField/foreignField + pipeline form of $lookup (MongoDB 5.0+) so each join can use the citizen_id index.
+        """
+        def lookup(collection: str, alias: str, sub_pipeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+            return {
+                "$lookup": {
+                    "from": collection,
+                    "localField": "citizen_id",
+                    "foreignField": "citizen_id",
+                    "pipeline": sub_pipeline,
+                    "as": alias
+                }
+            }
+        
+        return [
+            {"$match": {"citizen_id": citizen_id}},
+            {"$limit": 1},
+            lookup("students", "student", [{"$limit": 1}]),
+            lookup("loanprofiles", "loans", [
+                {"$sort": {"created_at": -1}},
+                {"$limit": DEFAULT_PAGE_SIZE},
+                {"$project": LOAN_PROJECTION}
+            ]),
+            lookup("academics", "academics", [
+                {"$limit": DEFAULT_PAGE_SIZE},
+                {"$project": ACADEMIC_PROJECTION}
+            ]),
+            lookup("masconversations", "mas_conversations", [
+                {"$sort": {"created_at": -1}},
+                {"$limit": DEFAULT_PAGE_SIZE},
+                {"$project": MAS_CONVERSATION_PROJECTION}
+            ])
+        ]
+    
+    async def _get_context_aggregated(self, citizen_id: str) -> Optional[Dict[str, Any]]:
+        """Build the context parts with a single $lookup pipeline; None if the user document doesn't exist"""
+        docs = await self.db_connector.db.users.aggregate(
+            self._comprehensive_context_pipeline(citizen_id)
+        ).to_list(length=1)
+        
+        if not docs:
+            return None
+        
+        doc = docs[0]
+        student = doc.pop("student", [])
+        loans = doc.pop("loans", [])
+        academics = doc.pop("academics", [])
+        mas_conversations = doc.pop("mas_conversations", [])
+        
+        return {
+            "user_profile": self._user_profile_result(doc),
+            "student_info": self._student_info_result(student[0] if student else None),
+            "loans": self._user_loans_result(loans),
+            "academics": self._academic_info_result(academics),
+            "mas_conversations": self._mas_conversations_result(mas_conversations)
+        }
+    
+    async def _get_context_concurrent(self, citizen_id: str) -> Dict[str, Any]:
+        """Build the context parts with one concurrent query per collection"""
+        user_profile, student_info, user_loans, academic_info, mas_conversations = await asyncio.gather(
+            self.get_user_profile(citizen_id=citizen_id),
+            self.get_student_info(citizen_id),
+            self.get_user_loans(citizen_id),
+            self.get_academic_info(citizen_id),
+            self.get_mas_conversations(citizen_id=citizen_id),
+            return_exceptions=True
+        )
+        
+        return {
+            "user_profile": user_profile if not isinstance(user_profile, Exception) else None,
+            "student_info": student_info if not isinstance(student_info, Exception) else None,
+            "loans": user_loans if not isinstance(user_loans, Exception) else None,
+            "academics": academic_info if not isinstance(academic_info, Exception) else None,
+            "mas_conversations": mas_conversations if not isinstance(mas_conversations, Exception) else None
+        }
+    
+    async def get_comprehensive_user_context(self, citizen_id: str, single_round_trip: bool = True) -> Dict[str, Any]:
         """
         Lấy toàn bộ context của người dùng cho chatbot
         
         Args:
             citizen_id: CMND/CCCD của người dùng
+            single_round_trip: Dùng 1 pipeline $lookup phía server; nếu không có user hoặc lỗi
+                               thì fallback sang 5 truy vấn song song (asyncio.gather)
             
         Returns:
             Context đầy đủ của người dùng
         """
         try:
-            # Get all user data in parallel
-            user_profile_task = self.get_user_profile(citizen_id=citizen_id)
-            student_info_task = self.get_student_info(citizen_id)
-            user_loans_task = self.get_user_loans(citizen_id)
-            academic_info_task = self.get_academic_info(citizen_id)
-            mas_conversations_task = self.get_mas_conversations(citizen_id=citizen_id)
+            parts = None
             
-            user_profile, student_info, user_loans, academic_info, mas_conversations = await asyncio.gather(
-                user_profile_task, 
-                student_info_task,
-                user_loans_task, 
-                academic_info_task,
-                mas_conversations_task,
-                return_exceptions=True
-            )
+            if single_round_trip:
+                try:
+                    parts = await self._get_context_aggregated(citizen_id)
+                except Exception as e:
+                    logger.warning(f"Context aggregation failed, falling back to concurrent queries: {e}")
+            
+            if parts is None:
+                parts = await self._get_context_concurrent(citizen_id)
             
             # Create comprehensive context
             context = {
                 "citizen_id": citizen_id,
-                "user_profile": user_profile if not isinstance(user_profile, Exception) else None,
-                "student_info": student_info if not isinstance(student_info, Exception) else None,
-                "loans": user_loans if not isinstance(user_loans, Exception) else None,
-                "academics": academic_info if not isinstance(academic_info, Exception) else None,
-                "mas_conversations": mas_conversations if not isinstance(mas_conversations, Exception) else None,
+                **parts,
                 "generated_at": datetime.now().isoformat()
             }
             
@@ -448,6 +717,28 @@ class MCPFunctionCalling:
             logger.error(f"Error calling function {function_name}: {e}")
             return {"error": f"Lỗi khi thực thi function {function_name}: {str(e)}"}
     
+    async def stream_function(self, function_name: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a list-returning MCP function as a stream of documents
+        
+        Args:
+            function_name: Tên function hỗ trợ streaming (xem available_streams)
+            **kwargs: Tham số function (max_documents thay cho limit/offset)
+            
+        Yields:
+            Từng bản ghi đã được định dạng
+        """
+        if function_name not in self.available_streams:
+            yield {"error": f"Function '{function_name}' does not support streaming. Streaming functions: {list(self.available_streams.keys())}"}
+            return
+        
+        try:
+            async for item in self.available_streams[function_name](**kwargs):
+                yield item
+        except Exception as e:
+            logger.error(f"Error streaming function {function_name}: {e}")
+            yield {"error": f"Lỗi khi thực thi function {function_name}: {str(e)}"}
+    
     def get_function_schemas(self) -> Dict[str, Dict]:
         """
         Lấy schema của các functions để LLM hiểu cách sử dụng
@@ -474,14 +765,18 @@ class MCPFunctionCalling:
             "get_user_loans": {
                 "description": "Lấy danh sách khoản vay của người dùng",
                 "parameters": {
-                    "citizen_id": {"type": "string", "description": "CMND/CCCD của người dùng"}
+                    "citizen_id": {"type": "string", "description": "CMND/CCCD của người dùng"},
+                    "limit": {"type": "integer", "description": "Số bản ghi tối đa (tối đa MAX_DOCUMENTS_PER_CALL)", "default": DEFAULT_PAGE_SIZE},
+                    "offset": {"type": "integer", "description": "Bỏ qua N bản ghi đầu", "default": 0}
                 },
                 "required": ["citizen_id"]
             },
             "get_academic_info": {
                 "description": "Lấy thông tin học tập của sinh viên",
                 "parameters": {
-                    "citizen_id": {"type": "string", "description": "CMND/CCCD của sinh viên"}
+                    "citizen_id": {"type": "string", "description": "CMND/CCCD của sinh viên"},
+                    "limit": {"type": "integer", "description": "Số bản ghi tối đa (tối đa MAX_DOCUMENTS_PER_CALL)", "default": DEFAULT_PAGE_SIZE},
+                    "offset": {"type": "integer", "description": "Bỏ qua N bản ghi đầu", "default": 0}
                 },
                 "required": ["citizen_id"]
             },
@@ -489,21 +784,26 @@ class MCPFunctionCalling:
                 "description": "Lấy các cuộc trò chuyện MAS analysis",
                 "parameters": {
                     "citizen_id": {"type": "string", "description": "CMND/CCCD của người dùng"},
-                    "loan_id": {"type": "string", "description": "ID của khoản vay"}
+                    "loan_id": {"type": "string", "description": "ID của khoản vay"},
+                    "limit": {"type": "integer", "description": "Số bản ghi tối đa (tối đa MAX_DOCUMENTS_PER_CALL)", "default": DEFAULT_PAGE_SIZE},
+                    "offset": {"type": "integer", "description": "Bỏ qua N bản ghi đầu", "default": 0}
                 },
                 "required": []
             },
             "search_students_by_university": {
                 "description": "Tìm kiếm sinh viên theo trường đại học",
                 "parameters": {
-                    "university": {"type": "string", "description": "Tên trường đại học", "default": "UEL"}
+                    "university": {"type": "string", "description": "Tên trường đại học", "default": "UEL"},
+                    "limit": {"type": "integer", "description": "Số sinh viên mỗi trang (tối đa MAX_DOCUMENTS_PER_CALL)", "default": 50},
+                    "after_id": {"type": "string", "description": "next_after_id của trang trước"}
                 },
                 "required": []
             },
             "get_loan_statistics": {
                 "description": "Lấy thống kê khoản vay",
                 "parameters": {
-                    "university": {"type": "string", "description": "Tên trường đại học (tùy chọn)"}
+                    "university": {"type": "string", "description": "Tên trường đại học (tùy chọn)"},
+                    "days": {"type": "integer", "description": "Kèm thống kê theo ngày cho N ngày gần nhất (tùy chọn)"}
                 },
                 "required": []
             },
@@ -0,0 +1,249 @@
+"""
+Materialized loan statistics rollups
+Per-day and per-university aggregates of loanprofiles are kept in summary collections with $merge,
+so get_loan_statistics reads a handful of small documents instead of aggregating every loan
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DAILY_COLLECTION = "loanstats_daily"
+UNIVERSITY_COLLECTION = "loanstats_university"
+STATE_COLLECTION = "loanstats_state"
+STATE_ID = "loanprofiles"
+UNKNOWN = "Unknown"
+
+# Rollups older than this are refreshed (incrementally) in the background on the next read
+LOAN_STATS_REFRESH_SECONDS = float(os.getenv("LOAN_STATS_REFRESH_SECONDS", "300"))
+# Incremental runs can't see deleted loans, so the daily rollup is rebuilt from scratch this often
+LOAN_STATS_FULL_REFRESH_SECONDS = float(os.getenv("LOAN_STATS_FULL_REFRESH_SECONDS", "86400"))
+# Overlap between runs to tolerate clock skew between the writers of updated_at and this process
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+DAY_EXPRESSION = {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at", "onNull": UNKNOWN}}
+
+
+def _utcnow() -> datetime:
+    """Naive UTC datetime, matching what pymongo returns for stored dates"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class LoanStatisticsRollup:
+    """
+    Maintains two summary collections:
+    - loanstats_daily: one document per {university, day, status} (day = created_at date)
+    - loanstats_university: one document per {university, status}, rolled up from the daily collection
+
+    A refresh only recomputes the days that contain loans created or updated since the last watermark.
+    """
+
+    def __init__(self, db, refresh_seconds: float = LOAN_STATS_REFRESH_SECONDS):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refreshed_at: Optional[datetime] = None
+
+    # ---- Pipelines ----
+
+    @staticmethod
+    def _daily_pipeline(match: Dict[str, Any], refreshed_at: datetime) -> List[Dict[str, Any]]:
+        return [
+            {"$match": match},
+            {
+                "$lookup": {
+                    "from": "students",
+                    "localField": "citizen_id",
+                    "foreignField": "citizen_id",
+                    "pipeline": [{"$limit": 1}, {"$project": {"_id": 0, "university": 1}}],
+                    "as": "student"
+                }
+            },
+            {
+                "$group": {
+                    "_id": {
+                        "university": {"$ifNull": [{"$arrayElemAt": ["$student.university", 0]}, UNKNOWN]},
+                        "day": DAY_EXPRESSION,
+                        "status": {"$ifNull": ["$status", UNKNOWN]}
+                    },
+                    "count": {"$sum": 1},
+                    "total_amount": {"$sum": "$amount"},
+                    # Number of loans with a numeric amount, so averages match $avg on the raw data
+                    "amount_count": {"$sum": {"$cond": [{"$isNumber": "$amount"}, 1, 0]}},
+                    "min_amount": {"$min": "$amount"},
+                    "max_amount": {"$max": "$amount"}
+                }
+            },
+            {"$set": {"refreshed_at": refreshed_at}},
+            {"$merge": {"into": DAILY_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+
+    @staticmethod
+    def _university_pipeline(refreshed_at: datetime) -> List[Dict[str, Any]]:
+        return [
+            {
+                "$group": {
+                    "_id": {"university": "$_id.university", "status": "$_id.status"},
+                    "count": {"$sum": "$count"},
+                    "total_amount": {"$sum": "$total_amount"},
+                    "amount_count": {"$sum": "$amount_count"},
+                    "min_amount": {"$min": "$min_amount"},
+                    "max_amount": {"$max": "$max_amount"},
+                    "active_days": {"$sum": 1}
+                }
+            },
+            {"$set": {"refreshed_at": refreshed_at}},
+            {"$merge": {"into": UNIVERSITY_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+
+    @staticmethod
+    def _day_range_filter(days: List[str]) -> Dict[str, Any]:
+        """created_at filter covering whole days (index friendly, unlike matching on $dateToString)"""
+        ranges = []
+        for day in days:
+            if day == UNKNOWN:
+                ranges.append({"created_at": None})
+                continue
+            start = datetime.strptime(day, "%Y-%m-%d")
+            ranges.append({"created_at": {"$gte": start, "$lt": start + timedelta(days=1)}})
+        return {"$or": ranges}
+
+    # ---- Refresh ----
+
+    async def _changed_days(self, watermark: datetime) -> List[str]:
+        """Days (by created_at) holding loans created or updated since the watermark"""
+        changed = await self.db.loanprofiles.aggregate([
+            {"$match": {"$or": [{"updated_at": {"$gte": watermark}}, {"created_at": {"$gte": watermark}}]}},
+            {"$group": {"_id": DAY_EXPRESSION}}
+        ]).to_list(length=None)
+        return [doc["_id"] for doc in changed]
+
+    async def refresh(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the summary collections up to date
+
+        Args:
+            full: Rebuild the daily rollup from scratch instead of recomputing changed days only
+
+        Returns:
+            Summary of the run
+        """
+        async with self._lock:
+            started = _utcnow()
+            state = await self.db[STATE_COLLECTION].find_one({"_id": STATE_ID}) or {}
+
+            last_full = state.get("last_full_refresh_at")
+            if last_full is None or (started - last_full).total_seconds() > LOAN_STATS_FULL_REFRESH_SECONDS:
+                full = True
+
+            # Recomputed buckets are replaced in place by $merge and only the buckets this run did not
+            # produce (status moved, loans deleted) are dropped afterwards, so readers never see an
+            # empty or half-built rollup while a refresh is running
+            if full:
+                days = None
+                await self.db.loanprofiles.aggregate(self._daily_pipeline({}, started)).to_list(length=None)
+                await self.db[DAILY_COLLECTION].delete_many({"refreshed_at": {"$lt": started}})
+            else:
+                days = await self._changed_days(state["watermark"])
+                if days:
+                    await self.db.loanprofiles.aggregate(
+                        self._daily_pipeline(self._day_range_filter(days), started)
+                    ).to_list(length=None)
+                    await self.db[DAILY_COLLECTION].delete_many(
+                        {"_id.day": {"$in": days}, "refreshed_at": {"$lt": started}}
+                    )
+
+            if full or days:
+                await self.db[DAILY_COLLECTION].aggregate(self._university_pipeline(started)).to_list(length=None)
+                await self.db[UNIVERSITY_COLLECTION].delete_many({"refreshed_at": {"$lt": started}})
+
+            update = {"watermark": started - WATERMARK_OVERLAP, "refreshed_at": started}
+            if full:
+                update["last_full_refresh_at"] = started
+            await self.db[STATE_COLLECTION].update_one({"_id": STATE_ID}, {"$set": update}, upsert=True)
+            self._refreshed_at = started
+
+            duration = (_utcnow() - started).total_seconds()
+            logger.info(f"Loan statistics rollup refreshed ({'full' if full else f'{len(days)} changed days'}) in {duration:.2f}s")
+            return {
+                "mode": "full" if full else "incremental",
+                "changed_days": None if full else len(days),
+                "refreshed_at": started,
+                "duration_seconds": round(duration, 3)
+            }
+
+    async def _refresh_in_background(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Loan statistics rollup refresh failed: {e}")
+
+    async def ensure_fresh(self):
+        """Build the rollup on first use; afterwards refresh stale rollups without blocking the reader"""
+        if self._refreshed_at is None:
+            state = await self.db[STATE_COLLECTION].find_one({"_id": STATE_ID})
+            if state is None or "refreshed_at" not in state:
+                await self.refresh(full=True)
+                return
+            self._refreshed_at = state["refreshed_at"]
+
+        stale = (_utcnow() - self._refreshed_at).total_seconds() > self.refresh_seconds
+        if stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+
+    # ---- Reads ----
+
+    async def get_statistics(self, university: Optional[str] = None) -> Dict[str, Any]:
+        """Per-status loan statistics for one university (or all of them) from the summary collection"""
+        await self.ensure_fresh()
+
+        query = {"_id.university": university} if university else {}
+        docs = await self.db[UNIVERSITY_COLLECTION].find(query).to_list(length=None)
+
+        # Fold universities together per status (a few documents per university)
+        by_status: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            status = doc["_id"]["status"]
+            bucket = by_status.setdefault(status, {"count": 0, "total_amount": 0, "amount_count": 0})
+            bucket["count"] += doc.get("count", 0)
+            bucket["total_amount"] += doc.get("total_amount", 0)
+            bucket["amount_count"] += doc.get("amount_count", 0)
+
+        statistics = [
+            {
+                "_id": status,
+                "count": bucket["count"],
+                "total_amount": bucket["total_amount"],
+                "avg_amount": bucket["total_amount"] / bucket["amount_count"] if bucket["amount_count"] else None
+            }
+            for status, bucket in by_status.items()
+        ]
+
+        return {"statistics": statistics, "as_of": str(self._refreshed_at)}
+
+    async def get_daily_statistics(self, university: Optional[str] = None, days: int = 30) -> List[Dict[str, Any]]:
+        """Per-day, per-status loan counts for the last `days` days"""
+        await self.ensure_fresh()
+
+        since = (_utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+        match: Dict[str, Any] = {"_id.day": {"$gte": since, "$ne": UNKNOWN}}
+        if university:
+            match["_id.university"] = university
+
+        return await self.db[DAILY_COLLECTION].aggregate([
+            {"$match": match},
+            {
+                "$group": {
+                    "_id": {"day": "$_id.day", "status": "$_id.status"},
+                    "count": {"$sum": "$count"},
+                    "total_amount": {"$sum": "$total_amount"}
+                }
+            },
+            {"$sort": {"_id.day": 1, "_id.status": 1}},
+            {"$project": {"_id": 0, "day": "$_id.day", "status": "$_id.status", "count": 1, "total_amount": 1}}
+        ]).to_list(length=None)
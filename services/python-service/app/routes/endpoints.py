@@ -1,10 +1,18 @@
+"""
+FastAPI routes
+
+Heavy subsystems (the debate agents, RAGBot with llama_index / Pinecone / OpenAI, the answer and embedding
+caches) are imported inside the handlers that use them, so importing this module - and starting a worker or a
+--reload cycle - stays cheap; the startup warm-up loads them in the background. benchmark_startup.py guards this.
+"""
 from fastapi import Request, HTTPException
-from app.core.a2a_workflow import debate_to_decide_workflow
 from app.schema.workflow import LoanApplicationRequest, LoanDecisionResponse
 from app.database.mongodb import mongodb_config
-import pickle
+from app.core.cache import citizen_data_cache
+from app.core.warmup import warmup_state
 import os
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, StreamingResponse
 import json 
 import time
 import uuid
@@ -13,8 +21,6 @@ import asyncio
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 
-# RAG Bot imports
-from app.botagent.main_bot import get_rag_bot
 # MCP function calling removed
 
 router = APIRouter()
@@ -69,16 +75,46 @@ async def health_check():
         "service": "loan-decision-a2a",
         "version": "1.0.0",
         "mongodb_status": mongodb_status,
+        "mongodb_pool": mongodb_config.get_pool_metrics(),
         "timestamp": time.time(),
         "endpoints": [
             "/api/v1/health",
+            "/api/v1/ready",
             "/api/v1/debate-loan", 
             "/api/v1/chat",
             "/api/v1/mas-conversations",
-            "/api/v1/mas-statistics"
+            "/api/v1/mas-statistics",
+            "/api/v1/mongodb-pool",
+            "/api/v1/cache/invalidate",
+            "/api/v1/cache/stats",
+            "/api/v1/chat/cache/stats",
+            "/api/v1/chat/cache/clear"
         ]
     }
 
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 200 once the startup warm-up (MongoDB, agents, RAG bot) has finished, 503 before
+    (or while a failed component is being retried). With STARTUP_WARMUP=false the status is "lazy" and
+    the probe answers 200: components initialize on first use. /health only says the process is alive.
+    """
+    snapshot = warmup_state.snapshot()
+    return JSONResponse(
+        status_code=200 if snapshot["ready"] else 503,
+        content={**snapshot, "timestamp": time.time()}
+    )
+
+@router.get("/mongodb-pool")
+async def get_mongodb_pool_metrics():
+    """
+    Connection pool utilisation of the shared MongoDB client
+    """
+    return {
+        "message": "MongoDB connection pool metrics",
+        "pool": mongodb_config.get_pool_metrics()
+    }
+
 @router.get("/mas-conversations")
 async def get_mas_conversations(limit: int = 10):
     """
@@ -126,24 +162,13 @@ async def debate_loan(request: LoanApplicationRequest):
     
     try:
         # Tạo profile text từ dữ liệu đầu vào mới
-        profile = (
-            f"Hồ sơ sinh viên vay vốn (ID: {request.loan_contract_id}):\n"
-            f"- Thông tin cá nhân: {request.age} tuổi, {request.gender}, nhóm tuổi {request.age_group}, khu vực {request.province_region}\n"
-            f"- Thông tin học tập: Đại học tier {request.university_tier}, "
-            f"{'trường công lập' if request.public_university else 'trường tư thục'}, ngành {request.major_category}, "
-            f"năm {request.study_year}, GPA chuẩn hóa: {request.gpa_normalized:.2f}/1.0\n"
-            f"- Hoạt động ngoại khóa: {request.club if request.club else 'Không tham gia CLB nào'}\n"
-            f"- Tài chính gia đình: Thu nhập {request.family_income:,} VND/tháng\n"
-            f"- Tình hình cá nhân: {'Có việc làm thêm' if request.has_part_time_job else 'Không có việc làm thêm'}, "
-            f"{'Đang có nợ' if request.existing_debt else 'Không có nợ'}\n"
-            f"- Bảo lãnh: {request.guarantor if request.guarantor else 'Không có'}\n"
-            f"- Yêu cầu vay: {request.loan_amount_requested:,} VND cho mục đích '{request.loan_purpose}'"
-        )
+        profile = request.to_profile_text()
 
         print(f"\n🚀 Processing loan application {request.loan_contract_id}")
         print(f"📋 Profile: {profile}")
         
         # Chạy workflow debate
+        from app.core.a2a_workflow import debate_to_decide_workflow
         result = debate_to_decide_workflow(profile, return_log=True)
         
         # Calculate processing time
@@ -237,6 +262,7 @@ class ChatRequest(BaseModel):
     """Chat request for RAG bot with optional user context"""
     message: str
     citizen_id: Optional[str] = None  # Optional citizen_id for database queries
+    conversation_id: Optional[str] = None  # Keys the chat memory; falls back to citizen_id
 
 @router.post("/chat")
 async def chat_rag_bot(request: ChatRequest):
@@ -258,6 +284,7 @@ async def chat_rag_bot(request: ChatRequest):
     Request body:
     - message: Câu hỏi của người dùng
     - citizen_id: (Optional) ID định danh để truy cập dữ liệu cá nhân
+    - conversation_id: (Optional) ID cuộc trò chuyện, mỗi cuộc trò chuyện có bộ nhớ riêng
     
     Example requests:
     1. General question: {"message": "Vay vốn sinh viên là gì?"}
@@ -268,12 +295,14 @@ async def chat_rag_bot(request: ChatRequest):
     
     try:
         # Get bot instance
-        bot = get_rag_bot()
+        from app.botagent.main_bot import aget_rag_bot
+        bot = await aget_rag_bot()
         print(request)
         # Chat with optional user context
         result = await bot.chat(
             message=request.message,
-            citizen_id=request.citizen_id
+            citizen_id=request.citizen_id,
+            conversation_id=request.conversation_id
         )
         
         return {
@@ -284,6 +313,7 @@ async def chat_rag_bot(request: ChatRequest):
             "requires_login": result.get("requires_login", False),
             "processing_time": round(time.time() - start_time, 2),
             "suggestion": result.get("suggestion", ""),
+            "conversation_id": result.get("conversation_id"),
             
             # Enhanced debug info
             "debug_info": {
@@ -306,6 +336,117 @@ async def chat_rag_bot(request: ChatRequest):
         }
 
 
+@router.post("/chat/stream")
+async def chat_rag_bot_stream(request: ChatRequest):
+    """
+    RAG Chat Bot dạng streaming (Server-Sent Events) - cùng request body với /chat
+    
+    Mỗi event là một dòng `data: <json>`:
+    - {"type": "token", "text": "..."}: một đoạn câu trả lời vừa được sinh ra
+    - {"type": "done", ...}: event cuối, cùng các trường với /chat (answer, sources, strategy, ...)
+    - {"type": "error", "error": "..."}: lỗi giữa chừng
+    """
+    start_time = time.time()
+    
+    async def event_stream():
+        try:
+            from app.botagent.main_bot import aget_rag_bot
+            bot = await aget_rag_bot()
+            async for event in bot.stream_chat(
+                message=request.message,
+                citizen_id=request.citizen_id,
+                conversation_id=request.conversation_id
+            ):
+                if event["type"] == "done":
+                    result = event["result"]
+                    event = {
+                        "type": "done",
+                        "question": request.message,
+                        "answer": result.get("response", "Không có câu trả lời"),
+                        "sources": result.get("sources", []),
+                        "strategy": result.get("source", "unknown"),
+                        "requires_login": result.get("requires_login", False),
+                        "processing_time": round(time.time() - start_time, 2),
+                        "suggestion": result.get("suggestion", ""),
+                        "conversation_id": result.get("conversation_id")
+                    }
+                yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+        except Exception as e:
+            print(f"❌ Streaming chat error: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)}, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ========================
+# CITIZEN DATA CACHE
+# ========================
+
+class CacheInvalidationRequest(BaseModel):
+    """Invalidate cached lookups for one citizen (sent by Express after a profile update)"""
+    citizen_id: str
+    scope: Optional[str] = None  # "user", "student", "academic" or None for everything
+
+@router.post("/cache/invalidate")
+async def invalidate_citizen_cache(request: CacheInvalidationRequest):
+    """
+    Drop cached user/student/academic data of a citizen so the next chat turn reads fresh data
+    """
+    removed = citizen_data_cache.invalidate(request.citizen_id, namespace=request.scope)
+    print(f"🧹 Invalidated {removed} cache entries for citizen {request.citizen_id}")
+    return {
+        "message": "Cache invalidated",
+        "citizen_id": request.citizen_id,
+        "scope": request.scope or "all",
+        "removed_entries": removed
+    }
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit/miss statistics of the per-citizen lookup cache
+    """
+    return {
+        "message": "Citizen data cache statistics",
+        "statistics": citizen_data_cache.get_stats()
+    }
+
+
+# ========================
+# SEMANTIC ANSWER CACHE
+# ========================
+
+@router.get("/chat/cache/stats")
+async def get_answer_cache_stats():
+    """
+    Hit rate and size of the semantic answer cache and the query embedding cache
+    """
+    from app.botagent.answer_cache import knowledge_base_answer_cache
+    from app.botagent.embedding_cache import query_embedding_cache
+    return {
+        "message": "Knowledge-base answer cache statistics",
+        "statistics": knowledge_base_answer_cache.get_stats(),
+        "embedding_cache": query_embedding_cache.get_stats()
+    }
+
+@router.post("/chat/cache/clear")
+async def clear_answer_cache():
+    """
+    Drop cached knowledge-base answers (e.g. after uploading documents from another machine)
+    """
+    from app.botagent.answer_cache import knowledge_base_answer_cache
+    knowledge_base_answer_cache.clear()
+    print("🧹 Knowledge-base answer cache cleared")
+    return {
+        "message": "Answer cache cleared",
+        "statistics": knowledge_base_answer_cache.get_stats()
+    }
+
+
 # ===== END OF RAG BOT ENDPOINTS =====
 
 # MCP functionality has been removed
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Dict, Optional
 
 class LoanApplicationRequest(BaseModel):
     """
@@ -44,6 +44,22 @@ class LoanApplicationRequest(BaseModel):
     #         raise ValueError(f'Province region must be one of: {valid_regions}')
     #     return v
 
+    def to_profile_text(self) -> str:
+        """Profile text given to the debate agents (shared by the FastAPI and gRPC DebateLoan entry points)"""
+        return (
+            f"Hồ sơ sinh viên vay vốn (ID: {self.loan_contract_id}):\n"
+            f"- Thông tin cá nhân: {self.age} tuổi, {self.gender}, nhóm tuổi {self.age_group}, khu vực {self.province_region}\n"
+            f"- Thông tin học tập: Đại học tier {self.university_tier}, "
+            f"{'trường công lập' if self.public_university else 'trường tư thục'}, ngành {self.major_category}, "
+            f"năm {self.study_year}, GPA chuẩn hóa: {self.gpa_normalized:.2f}/1.0\n"
+            f"- Hoạt động ngoại khóa: {self.club if self.club else 'Không tham gia CLB nào'}\n"
+            f"- Tài chính gia đình: Thu nhập {self.family_income:,} VND/tháng\n"
+            f"- Tình hình cá nhân: {'Có việc làm thêm' if self.has_part_time_job else 'Không có việc làm thêm'}, "
+            f"{'Đang có nợ' if self.existing_debt else 'Không có nợ'}\n"
+            f"- Bảo lãnh: {self.guarantor if self.guarantor else 'Không có'}\n"
+            f"- Yêu cầu vay: {self.loan_amount_requested:,} VND cho mục đích '{self.loan_purpose}'"
+        )
+
 class AgentResponse(BaseModel):
     """Individual agent response model"""
     decision: Optional[str] = Field(None, description="Agent decision: approve or reject")
@@ -93,6 +109,19 @@ class FinalResult(BaseModel):
     hybrid_approach: str = Field(..., description="Hybrid approach used")
     error: Optional[str] = Field(None, description="Error message if any")
 
+class DebateTrack(BaseModel):
+    """Critique → repredict rounds of one agent track"""
+    rounds: int = Field(..., description="Critique rounds run")
+    repredicts: int = Field(..., description="Repredict LLM calls made")
+    converged: bool = Field(..., description="Agent and CriticalAgent agreed (track stopped early)")
+    final_decision: Optional[str] = Field(None, description="Agent decision after the debate")
+
+class DebateSummary(BaseModel):
+    """Debate rounds and convergence"""
+    max_rounds: int = Field(..., description="Configured maximum critique rounds")
+    rounds: int = Field(..., description="Critique rounds actually run")
+    tracks: Dict[str, DebateTrack] = Field(..., description="academic / finance tracks")
+
 class LoanDecisionResponse(BaseModel):
     """Response model for loan decision with structured MAS output"""
     responses: AgentResponses = Field(..., description="4 main responses from agents")
@@ -101,4 +130,5 @@ class LoanDecisionResponse(BaseModel):
     final_result: FinalResult = Field(..., description="Final result summary")
     request_metadata: dict = Field(..., description="Metadata about the request")
     processing_time_seconds: float = Field(..., description="Time taken to process the request")
-    request_id: str = Field(..., description="Unique identifier for this request") 
\ No newline at end of file
+    request_id: str = Field(..., description="Unique identifier for this request")
+    debate: Optional[DebateSummary] = Field(None, description="Debate rounds and per-track convergence") 
\ No newline at end of file
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nbase.proto\x12\x04\x62\x61se\"\x1e\n\nPredictReq\x12\x10\n\x08\x66\x65\x61tures\x18\x01 \x03(\x02\" \n\nPredictRes\x12\x12\n\nprediction\x18\x01 \x03(\x02\"\x1c\n\x0cHelloRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x1d\n\nHelloReply\x12\x0f\n\x07message\x18\x01 \x01(\t\"\x1e\n\x0eGoodByeRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x1b\n\x08\x42yeReply\x12\x0f\n\x07message\x18\x01 \x01(\t2\xa2\x01\n\x0b\x42\x61seService\x12\x30\n\x08SayHello\x12\x12.base.HelloRequest\x1a\x10.base.HelloReply\x12\x32\n\nSayGoodBye\x12\x14.base.GoodByeRequest\x1a\x0e.base.ByeReply\x12-\n\x07Predict\x12\x10.base.PredictReq\x1a\x10.base.PredictResb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nbase.proto\x12\x04\x62\x61se\"\x1e\n\nPredictReq\x12\x10\n\x08\x66\x65\x61tures\x18\x01 \x03(\x01\"t\n\nPredictRes\x12\x12\n\nprediction\x18\x01 \x03(\x02\x12\x10\n\x08\x64\x65\x63ision\x18\x02 \x01(\t\x12\x14\n\x0cpassed_count\x18\x03 \x01(\x05\x12\x1a\n\x12special_violations\x18\x04 \x01(\x05\x12\x0e\n\x06reason\x18\x05 \x01(\t\"5\n\x0fPredictBatchReq\x12\x10\n\x08\x66\x65\x61tures\x18\x01 \x03(\x01\x12\x10\n\x08row_size\x18\x02 \x01(\x05\"c\n\x0fPredictBatchRes\x12\x10\n\x08\x61pproved\x18\x01 \x03(\x08\x12\x14\n\x0cpassed_count\x18\x02 \x03(\x05\x12\x1a\n\x12special_violations\x18\x03 \x03(\x05\x12\x0c\n\x04rows\x18\x04 \x01(\x05\"\x89\x03\n\rDebateLoanReq\x12\x18\n\x10loan_contract_id\x18\x01 \x01(\t\x12\x11\n\tage_group\x18\x02 \x01(\t\x12\x0b\n\x03\x61ge\x18\x03 \x01(\x05\x12\x0e\n\x06gender\x18\x04 \x01(\t\x12\x17\n\x0fprovince_region\x18\x05 \x01(\t\x12\x17\n\x0funiversity_tier\x18\x06 \x01(\x05\x12\x19\n\x11public_university\x18\x07 \x01(\x08\x12\x16\n\x0emajor_category\x18\x08 \x01(\t\x12\x16\n\x0egpa_normalized\x18\t \x01(\x01\x12\x12\n\nstudy_year\x18\n \x01(\x05\x12\x0c\n\x04\x63lub\x18\x0b \x01(\t\x12\x15\n\rfamily_income\x18\x0c \x01(\x03\x12\x19\n\x11has_part_time_job\x18\r \x01(\x08\x12\x15\n\rexisting_debt\x18\x0e \x01(\x08\x12\x11\n\tguarantor\x18\x0f \x01(\t\x12\x1d\n\x15loan_amount_requested\x18\x10 \x01(\x03\x12\x14\n\x0cloan_purpose\x18\x11 \x01(\t\"L\n\tAgentTurn\x12\r\n\x05\x61gent\x18\x01 \x01(\t\x12\x0e\n\x06target\x18\x02 \x01(\t\x12\x10\n\x08\x64\x65\x63ision\x18\x03 \x01(\t\x12\x0e\n\x06reason\x18\x04 \x01(\t\"\xd3\x01\n\x0c\x44\x65\x62\x61teResult\x12\x10\n\x08\x64\x65\x63ision\x18\x01 \x01(\t\x12\x0e\n\x06reason\x18\x02 \x01(\t\x12\x1b\n\x13rule_based_decision\x18\x03 \x01(\t\x12\x14\n\x0cpassed_count\x18\x04 \x01(\x05\x12\x1a\n\x12special_violations\x18\x05 \x01(\x05\x12\x18\n\x10\x61\x63\x61\x64\x65mic_approve\x18\x06 \x01(\x08\x12\x17\n\x0f\x66inance_approve\x18\x07 \x01(\x08\x12\x1f\n\x17processing_time_seconds\x18\x08 \x01(\x01\"o\n\x0b\x44\x65\x62\x61teRound\x12\r\n\x05round\x18\x01 \x01(\x05\x12\r\n\x05stage\x18\x02 \x01(\t\x12\x1e\n\x05turns\x18\x03 \x03(\x0b\x32\x0f.base.AgentTurn\x12\"\n\x06result\x18\x04 \x01(\x0b\x32\x12.base.DebateResult\"\x1c\n\x0cHelloRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x1d\n\nHelloReply\x12\x0f\n\x07message\x18\x01 \x01(\t\"\x1e\n\x0eGoodByeRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x1b\n\x08\x42yeReply\x12\x0f\n\x07message\x18\x01 \x01(\t2\x98\x02\n\x0b\x42\x61seService\x12\x30\n\x08SayHello\x12\x12.base.HelloRequest\x1a\x10.base.HelloReply\x12\x32\n\nSayGoodBye\x12\x14.base.GoodByeRequest\x1a\x0e.base.ByeReply\x12-\n\x07Predict\x12\x10.base.PredictReq\x1a\x10.base.PredictRes\x12<\n\x0cPredictBatch\x12\x15.base.PredictBatchReq\x1a\x15.base.PredictBatchRes\x12\x36\n\nDebateLoan\x12\x13.base.DebateLoanReq\x1a\x11.base.DebateRound0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -34,15 +34,27 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_PREDICTREQ']._serialized_start=20
   _globals['_PREDICTREQ']._serialized_end=50
   _globals['_PREDICTRES']._serialized_start=52
-  _globals['_PREDICTRES']._serialized_end=84
-  _globals['_HELLOREQUEST']._serialized_start=86
-  _globals['_HELLOREQUEST']._serialized_end=114
-  _globals['_HELLOREPLY']._serialized_start=116
-  _globals['_HELLOREPLY']._serialized_end=145
-  _globals['_GOODBYEREQUEST']._serialized_start=147
-  _globals['_GOODBYEREQUEST']._serialized_end=177
-  _globals['_BYEREPLY']._serialized_start=179
-  _globals['_BYEREPLY']._serialized_end=206
-  _globals['_BASESERVICE']._serialized_start=209
-  _globals['_BASESERVICE']._serialized_end=371
+  _globals['_PREDICTRES']._serialized_end=168
+  _globals['_PREDICTBATCHREQ']._serialized_start=170
+  _globals['_PREDICTBATCHREQ']._serialized_end=223
+  _globals['_PREDICTBATCHRES']._serialized_start=225
+  _globals['_PREDICTBATCHRES']._serialized_end=324
+  _globals['_DEBATELOANREQ']._serialized_start=327
+  _globals['_DEBATELOANREQ']._serialized_end=720
+  _globals['_AGENTTURN']._serialized_start=722
+  _globals['_AGENTTURN']._serialized_end=798
+  _globals['_DEBATERESULT']._serialized_start=801
+  _globals['_DEBATERESULT']._serialized_end=1012
+  _globals['_DEBATEROUND']._serialized_start=1014
+  _globals['_DEBATEROUND']._serialized_end=1125
+  _globals['_HELLOREQUEST']._serialized_start=1127
+  _globals['_HELLOREQUEST']._serialized_end=1155
+  _globals['_HELLOREPLY']._serialized_start=1157
+  _globals['_HELLOREPLY']._serialized_end=1186
+  _globals['_GOODBYEREQUEST']._serialized_start=1188
+  _globals['_GOODBYEREQUEST']._serialized_end=1218
+  _globals['_BYEREPLY']._serialized_start=1220
+  _globals['_BYEREPLY']._serialized_end=1247
+  _globals['_BASESERVICE']._serialized_start=1250
+  _globals['_BASESERVICE']._serialized_end=1530
 # @@protoc_insertion_point(module_scope)
@@ -49,6 +49,16 @@ class BaseServiceStub(object):
                 request_serializer=base__pb2.PredictReq.SerializeToString,
                 response_deserializer=base__pb2.PredictRes.FromString,
                 _registered_method=True)
+        self.PredictBatch = channel.unary_unary(
+                '/base.BaseService/PredictBatch',
+                request_serializer=base__pb2.PredictBatchReq.SerializeToString,
+                response_deserializer=base__pb2.PredictBatchRes.FromString,
+                _registered_method=True)
+        self.DebateLoan = channel.unary_stream(
+                '/base.BaseService/DebateLoan',
+                request_serializer=base__pb2.DebateLoanReq.SerializeToString,
+                response_deserializer=base__pb2.DebateRound.FromString,
+                _registered_method=True)
 
 
 class BaseServiceServicer(object):
@@ -67,7 +77,22 @@ class BaseServiceServicer(object):
         raise NotImplementedError('Method not implemented!')
 
     def Predict(self, request, context):
-        """Missing associated documentation comment in .proto file."""
+        """Loan regulation rules (python-service app/core/loan_rules.py) for one feature row
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PredictBatch(self, request, context):
+        """Same rules for many rows at once: rows are flattened into one packed array
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DebateLoan(self, request, context):
+        """Multi-agent loan debate (same workflow as POST /api/v1/debate-loan), one message per round as it finishes
+        """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
@@ -90,6 +115,16 @@ def add_BaseServiceServicer_to_server(servicer, server):
                     request_deserializer=base__pb2.PredictReq.FromString,
                     response_serializer=base__pb2.PredictRes.SerializeToString,
             ),
+            'PredictBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.PredictBatch,
+                    request_deserializer=base__pb2.PredictBatchReq.FromString,
+                    response_serializer=base__pb2.PredictBatchRes.SerializeToString,
+            ),
+            'DebateLoan': grpc.unary_stream_rpc_method_handler(
+                    servicer.DebateLoan,
+                    request_deserializer=base__pb2.DebateLoanReq.FromString,
+                    response_serializer=base__pb2.DebateRound.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'base.BaseService', rpc_method_handlers)
@@ -181,3 +216,57 @@ class BaseService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def PredictBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/base.BaseService/PredictBatch',
+            base__pb2.PredictBatchReq.SerializeToString,
+            base__pb2.PredictBatchRes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DebateLoan(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/base.BaseService/DebateLoan',
+            base__pb2.DebateLoanReq.SerializeToString,
+            base__pb2.DebateRound.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming section chunker
+Generates multi-MB knowledge-base files (PHẦN N: sections) and compares
+- in-memory: read the whole file into one Document, chunk_by_sections -> list
+- streaming: chunk_file (memory-mapped, chunks consumed lazily)
+Time should grow linearly with size; streaming peak memory should stay flat.
+
+Run: python benchmark_chunking.py [sizes in MB, default 2 4 8 16]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from llama_index.core import Document
+
+from app.botagent.chunking import DocumentChunker
+
+SENTENCES = [
+    "Sinh viên có hoàn cảnh khó khăn được vay vốn với lãi suất ưu đãi.",
+    "Hồ sơ vay gồm đơn đề nghị, giấy xác nhận của nhà trường và sổ hộ khẩu.",
+    "Mức cho vay tối đa được điều chỉnh theo quyết định của Thủ tướng Chính phủ.",
+    "Thời hạn trả nợ bắt đầu sau khi sinh viên tốt nghiệp mười hai tháng.",
+    "Ngân hàng Chính sách xã hội thẩm định hồ sơ trong vòng mười ngày làm việc.",
+]
+
+
+def write_document(path: str, size_mb: int):
+    """Write a synthetic regulation of about size_mb MB: sections of 1-12 paragraphs"""
+    rng = random.Random(size_mb)
+    target = size_mb * 1024 * 1024
+    written = 0
+    section = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            section += 1
+            paragraphs = [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 12))) for _ in range(rng.randint(1, 12))]
+            block = f"PHẦN {section}: QUY ĐỊNH SỐ {section}\n" + "\n\n".join(paragraphs) + "\n\n"
+            f.write(block)
+            written += len(block.encode("utf-8"))
+
+
+def in_memory(chunker: DocumentChunker, path: str) -> int:
+    with open(path, "r", encoding="utf-8") as f:
+        document = Document(text=f.read(), metadata={"source": path})
+    return len(chunker.chunk_by_sections(document))
+
+
+def streaming(chunker: DocumentChunker, path: str) -> int:
+    return sum(1 for _ in chunker.chunk_file(path, {"source": path}))
+
+
+def measure(function, chunker: DocumentChunker, path: str):
+    """(chunks, seconds, peak traced MB); timing and memory are measured in separate runs"""
+    start = time.perf_counter()
+    chunks = function(chunker, path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(chunker, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chunks, elapsed, peak / 1024 / 1024
+
+
+def run_benchmark(sizes):
+    print("🧪 Benchmarking section chunking")
+    print("=" * 78)
+
+    chunker = DocumentChunker(max_section_length=1000)
+    tmp_dir = tempfile.mkdtemp()
+    rows = []
+
+    # Silence the per-document "Found N sections" prints while measuring
+    devnull = open(os.devnull, "w")
+    for size_mb in sizes:
+        path = os.path.join(tmp_dir, f"kb_{size_mb}mb.txt")
+        write_document(path, size_mb)
+
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            memory_result = measure(in_memory, chunker, path)
+            stream_result = measure(streaming, chunker, path)
+        finally:
+            sys.stdout = stdout
+
+        assert memory_result[0] == stream_result[0], "streaming and in-memory chunk counts differ"
+        rows.append((size_mb, memory_result, stream_result))
+        os.remove(path)
+
+    print(f"{'size':>6} {'chunks':>8} | {'in-memory s':>11} {'s/MB':>6} {'peak MB':>8} | {'streaming s':>11} {'s/MB':>6} {'peak MB':>8}")
+    for size_mb, (chunks, memory_time, memory_peak), (_, stream_time, stream_peak) in rows:
+        print(f"{size_mb:>4}MB {chunks:>8} | {memory_time:>11.2f} {memory_time / size_mb:>6.3f} {memory_peak:>8.1f} | "
+              f"{stream_time:>11.2f} {stream_time / size_mb:>6.3f} {stream_peak:>8.1f}")
+
+    per_mb = [stream_time / size_mb for size_mb, _, (_, stream_time, _) in rows]
+    peaks = [stream_peak for _, _, (_, _, stream_peak) in rows]
+    print("=" * 78)
+    print(f"{'✅' if max(per_mb) < 1.5 * min(per_mb) else '⚠️'} Streaming time per MB: {min(per_mb):.3f}-{max(per_mb):.3f}s (linear if roughly constant)")
+    print(f"{'✅' if max(peaks) < 2 * min(peaks) else '⚠️'} Streaming peak memory: {min(peaks):.1f}-{max(peaks):.1f} MB (flat if independent of size)")
+
+
+if __name__ == "__main__":
+    run_benchmark([int(arg) for arg in sys.argv[1:]] or [2, 4, 8, 16])
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Startup import-time benchmark / regression guard
+Imports each server entry point in a fresh interpreter with `python -X importtime` and checks
+- the total import time against a budget (STARTUP_IMPORT_BUDGET_MS, per entry point below)
+- that no heavy subsystem (llama_index, pinecone, OpenAI, sklearn, MCP, motor, the agents, RAGBot)
+  is imported at startup: those must stay lazy (imported on first use / by the background warm-up)
+
+Run: python benchmark_startup.py [--runs N]   (exit code 1 on a regression)
+"""
+
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Entry point -> import-time budget in ms (best of N runs, generous enough for slow CI machines)
+ENTRY_POINTS = {
+    "main_fastapi": int(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500")),
+    "main_grpc": int(os.getenv("GRPC_IMPORT_BUDGET_MS", "600")),
+}
+
+# Top-level packages / modules that must not be imported while a server starts
+LAZY_MODULES = [
+    "llama_index", "pinecone", "openai", "sklearn", "mcp", "motor",
+    "app.botagent.main_bot", "app.core.a2a_workflow", "app.agents",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module: str) -> Tuple[int, List[Tuple[str, int]]]:
+    """(total ms, [(module, cumulative µs)]) for importing module in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVICE_DIR,
+        env={**os.environ, "PYTHONPATH": SERVICE_DIR},
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(2))))
+    total = next((cumulative for name, cumulative in modules if name == module), 0)
+    return total // 1000, modules
+
+
+def lazy_violations(modules: List[Tuple[str, int]]) -> Dict[str, int]:
+    violations = {}
+    for name, cumulative in modules:
+        for lazy in LAZY_MODULES:
+            if name == lazy or name.startswith(f"{lazy}."):
+                violations[lazy] = max(violations.get(lazy, 0), cumulative // 1000)
+    return violations
+
+
+def run_benchmark(runs: int = 3) -> bool:
+    print("🧪 Benchmarking server startup imports")
+    print("=" * 60)
+    ok = True
+
+    for module, budget in ENTRY_POINTS.items():
+        samples = [measure(module) for _ in range(runs)]
+        total, modules = min(samples, key=lambda sample: sample[0])
+
+        print(f"\n📦 {module}: {total} ms (best of {runs}, budget {budget} ms)")
+        top_level = sorted(
+            ((name, cumulative) for name, cumulative in modules if "." not in name and name != module),
+            key=lambda item: item[1],
+            reverse=True
+        )[:8]
+        for name, cumulative in top_level:
+            print(f"   {cumulative / 1000:8.1f} ms  {name}")
+
+        violations = lazy_violations(modules)
+        if violations:
+            ok = False
+            for name, cost in violations.items():
+                print(f"❌ {name} is imported at startup ({cost} ms): import it where it is used")
+        if total > budget:
+            ok = False
+            print(f"❌ {module} import time {total} ms exceeds the {budget} ms budget")
+
+    print("\n" + "=" * 60)
+    print("✅ Startup imports within budget" if ok else "❌ Startup import regression")
+    return ok
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[sys.argv.index("--runs") + 1]) if "--runs" in sys.argv else 3
+    sys.exit(0 if run_benchmark(runs) else 1)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: chatbot.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'chatbot.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rchatbot.proto\x12\x07\x63hatbot\"K\n\x0b\x43hatRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x17\n\x0f\x63onversation_id\x18\x02 \x01(\t\x12\x12\n\ncitizen_id\x18\x03 \x01(\t\"\xd1\x01\n\x0c\x43hatResponse\x12\x10\n\x08question\x18\x01 \x01(\t\x12\x0e\n\x06\x61nswer\x18\x02 \x01(\t\x12\x0f\n\x07sources\x18\x03 \x03(\t\x12\x17\n\x0fprocessing_time\x18\x04 \x01(\x01\x12\x0f\n\x07success\x18\x05 \x01(\x08\x12\r\n\x05\x65rror\x18\x06 \x01(\t\x12\x10\n\x08strategy\x18\x07 \x01(\t\x12\x17\n\x0f\x63onversation_id\x18\x08 \x01(\t\x12\x16\n\x0erequires_login\x18\t \x01(\x08\x12\x12\n\nsuggestion\x18\n \x01(\t\"e\n\x0f\x43hatStreamEvent\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0c\n\x04text\x18\x02 \x01(\t\x12\'\n\x08response\x18\x03 \x01(\x0b\x32\x15.chatbot.ChatResponse\x12\r\n\x05\x65rror\x18\x04 \x01(\t\"\x19\n\x17\x43learAnswerCacheRequest\"U\n\x18\x43learAnswerCacheResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x17\n\x0fstatistics_json\x18\x03 \x01(\t\"?\n\x1aInvalidateUserCacheRequest\x12\x12\n\ncitizen_id\x18\x01 \x01(\t\x12\r\n\x05scope\x18\x02 \x01(\t\"G\n\x1bInvalidateUserCacheResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x17\n\x0fremoved_entries\x18\x02 \x01(\x05\"\x0e\n\x0cReadyRequest\"\xb4\x01\n\rReadyResponse\x12\r\n\x05ready\x18\x01 \x01(\x08\x12\x0e\n\x06status\x18\x02 \x01(\t\x12:\n\ncomponents\x18\x03 \x03(\x0b\x32&.chatbot.ReadyResponse.ComponentsEntry\x12\x15\n\rsnapshot_json\x18\x04 \x01(\t\x1a\x31\n\x0f\x43omponentsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x32\xf8\x02\n\x0e\x43hatbotService\x12\x33\n\x04\x43hat\x12\x14.chatbot.ChatRequest\x1a\x15.chatbot.ChatResponse\x12>\n\nChatStream\x12\x14.chatbot.ChatRequest\x1a\x18.chatbot.ChatStreamEvent0\x01\x12W\n\x10\x43learAnswerCache\x12 .chatbot.ClearAnswerCacheRequest\x1a!.chatbot.ClearAnswerCacheResponse\x12`\n\x13InvalidateUserCache\x12#.chatbot.InvalidateUserCacheRequest\x1a$.chatbot.InvalidateUserCacheResponse\x12\x36\n\x05Ready\x12\x15.chatbot.ReadyRequest\x1a\x16.chatbot.ReadyResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'chatbot_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_READYRESPONSE_COMPONENTSENTRY']._loaded_options = None
+  _globals['_READYRESPONSE_COMPONENTSENTRY']._serialized_options = b'8\001'
+  _globals['_CHATREQUEST']._serialized_start=26
+  _globals['_CHATREQUEST']._serialized_end=101
+  _globals['_CHATRESPONSE']._serialized_start=104
+  _globals['_CHATRESPONSE']._serialized_end=313
+  _globals['_CHATSTREAMEVENT']._serialized_start=315
+  _globals['_CHATSTREAMEVENT']._serialized_end=416
+  _globals['_CLEARANSWERCACHEREQUEST']._serialized_start=418
+  _globals['_CLEARANSWERCACHEREQUEST']._serialized_end=443
+  _globals['_CLEARANSWERCACHERESPONSE']._serialized_start=445
+  _globals['_CLEARANSWERCACHERESPONSE']._serialized_end=530
+  _globals['_INVALIDATEUSERCACHEREQUEST']._serialized_start=532
+  _globals['_INVALIDATEUSERCACHEREQUEST']._serialized_end=595
+  _globals['_INVALIDATEUSERCACHERESPONSE']._serialized_start=597
+  _globals['_INVALIDATEUSERCACHERESPONSE']._serialized_end=668
+  _globals['_READYREQUEST']._serialized_start=670
+  _globals['_READYREQUEST']._serialized_end=684
+  _globals['_READYRESPONSE']._serialized_start=687
+  _globals['_READYRESPONSE']._serialized_end=867
+  _globals['_READYRESPONSE_COMPONENTSENTRY']._serialized_start=818
+  _globals['_READYRESPONSE_COMPONENTSENTRY']._serialized_end=867
+  _globals['_CHATBOTSERVICE']._serialized_start=870
+  _globals['_CHATBOTSERVICE']._serialized_end=1246
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,277 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+import chatbot_pb2 as chatbot__pb2
+
+GRPC_GENERATED_VERSION = '1.74.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + f' but the generated code in chatbot_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class ChatbotServiceStub(object):
+    """Chatbot service definition
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Chat = channel.unary_unary(
+                '/chatbot.ChatbotService/Chat',
+                request_serializer=chatbot__pb2.ChatRequest.SerializeToString,
+                response_deserializer=chatbot__pb2.ChatResponse.FromString,
+                _registered_method=True)
+        self.ChatStream = channel.unary_stream(
+                '/chatbot.ChatbotService/ChatStream',
+                request_serializer=chatbot__pb2.ChatRequest.SerializeToString,
+                response_deserializer=chatbot__pb2.ChatStreamEvent.FromString,
+                _registered_method=True)
+        self.ClearAnswerCache = channel.unary_unary(
+                '/chatbot.ChatbotService/ClearAnswerCache',
+                request_serializer=chatbot__pb2.ClearAnswerCacheRequest.SerializeToString,
+                response_deserializer=chatbot__pb2.ClearAnswerCacheResponse.FromString,
+                _registered_method=True)
+        self.InvalidateUserCache = channel.unary_unary(
+                '/chatbot.ChatbotService/InvalidateUserCache',
+                request_serializer=chatbot__pb2.InvalidateUserCacheRequest.SerializeToString,
+                response_deserializer=chatbot__pb2.InvalidateUserCacheResponse.FromString,
+                _registered_method=True)
+        self.Ready = channel.unary_unary(
+                '/chatbot.ChatbotService/Ready',
+                request_serializer=chatbot__pb2.ReadyRequest.SerializeToString,
+                response_deserializer=chatbot__pb2.ReadyResponse.FromString,
+                _registered_method=True)
+
+
+class ChatbotServiceServicer(object):
+    """Chatbot service definition
+    """
+
+    def Chat(self, request, context):
+        """Send a chat message and get response
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ChatStream(self, request, context):
+        """Same request, answer streamed token by token; the last event carries the full ChatResponse
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ClearAnswerCache(self, request, context):
+        """Drop this process's cached knowledge-base answers (e.g. after uploading documents)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def InvalidateUserCache(self, request, context):
+        """Drop this process's cached user/student/academic data of a citizen (sent after a profile update)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Ready(self, request, context):
+        """Warm-up state of the process serving chat (same as GET /ready on FastAPI)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_ChatbotServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Chat': grpc.unary_unary_rpc_method_handler(
+                    servicer.Chat,
+                    request_deserializer=chatbot__pb2.ChatRequest.FromString,
+                    response_serializer=chatbot__pb2.ChatResponse.SerializeToString,
+            ),
+            'ChatStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ChatStream,
+                    request_deserializer=chatbot__pb2.ChatRequest.FromString,
+                    response_serializer=chatbot__pb2.ChatStreamEvent.SerializeToString,
+            ),
+            'ClearAnswerCache': grpc.unary_unary_rpc_method_handler(
+                    servicer.ClearAnswerCache,
+                    request_deserializer=chatbot__pb2.ClearAnswerCacheRequest.FromString,
+                    response_serializer=chatbot__pb2.ClearAnswerCacheResponse.SerializeToString,
+            ),
+            'InvalidateUserCache': grpc.unary_unary_rpc_method_handler(
+                    servicer.InvalidateUserCache,
+                    request_deserializer=chatbot__pb2.InvalidateUserCacheRequest.FromString,
+                    response_serializer=chatbot__pb2.InvalidateUserCacheResponse.SerializeToString,
+            ),
+            'Ready': grpc.unary_unary_rpc_method_handler(
+                    servicer.Ready,
+                    request_deserializer=chatbot__pb2.ReadyRequest.FromString,
+                    response_serializer=chatbot__pb2.ReadyResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'chatbot.ChatbotService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('chatbot.ChatbotService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class ChatbotService(object):
+    """Chatbot service definition
+    """
+
+    @staticmethod
+    def Chat(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chatbot.ChatbotService/Chat',
+            chatbot__pb2.ChatRequest.SerializeToString,
+            chatbot__pb2.ChatResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ChatStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/chatbot.ChatbotService/ChatStream',
+            chatbot__pb2.ChatRequest.SerializeToString,
+            chatbot__pb2.ChatStreamEvent.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ClearAnswerCache(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chatbot.ChatbotService/ClearAnswerCache',
+            chatbot__pb2.ClearAnswerCacheRequest.SerializeToString,
+            chatbot__pb2.ClearAnswerCacheResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def InvalidateUserCache(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chatbot.ChatbotService/InvalidateUserCache',
+            chatbot__pb2.InvalidateUserCacheRequest.SerializeToString,
+            chatbot__pb2.InvalidateUserCacheResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Ready(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chatbot.ChatbotService/Ready',
+            chatbot__pb2.ReadyRequest.SerializeToString,
+            chatbot__pb2.ReadyResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,8 +1,30 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# Load .env before importing app modules: they read their settings (MongoDB, warm-up, retrieval, ...) at import
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.endpoints import router
+from app.database.connection import mongo_registry
+from app.core.warmup import STARTUP_WARMUP, warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up MongoDB (shared pool), the agents and the RAG bot in the background so the first user
+    # doesn't pay for them; requests are served meanwhile and /api/v1/ready turns 200 when done
+    warmup_task = asyncio.create_task(warm_up()) if STARTUP_WARMUP else None
+    yield
+    if warmup_task:
+        warmup_task.cancel()
+    mongo_registry.close_all()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -22,6 +44,7 @@ async def root():
         "status": "running",
         "endpoints": {
             "health": "/api/v1/health",
+            "ready": "/api/v1/ready",
             "chat": "/api/v1/chat",
             "debate_loan": "/api/v1/debate-loan"
         }
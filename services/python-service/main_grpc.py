@@ -4,56 +4,304 @@ import sys
 import time
 generated = False
 
-# Path to the .proto file in the sibling express-service
+# Paths to the .proto files in the sibling express-service
 script_dir = os.path.dirname(os.path.abspath(__file__))
-proto_path = os.path.abspath(os.path.join(script_dir, '..', 'express-service', 'base.proto'))
+express_dir = os.path.abspath(os.path.join(script_dir, '..', 'express-service'))
+proto_paths = [
+    os.path.join(express_dir, 'base.proto'),
+    os.path.join(express_dir, 'src', 'services', 'pythonService', 'chatbot.proto'),
+]
 
 # Generate Python bindings from .proto if not already present
 out_dir = script_dir
-pb2_file = os.path.join(out_dir, 'base_pb2.py')
-grpc_pb2_file = os.path.join(out_dir, 'base_pb2_grpc.py')
-
-if not (os.path.exists(pb2_file) and os.path.exists(grpc_pb2_file)):
-    print("🔧 Generating gRPC code from base.proto...")
-    from grpc_tools import protoc
-    protoc.main([
-        '',
-        f'-I{os.path.dirname(proto_path)}',
-        f'--python_out={out_dir}',
-        f'--grpc_python_out={out_dir}',
-        proto_path,
-    ])
-    generated = True
+for proto_path in proto_paths:
+    name = os.path.splitext(os.path.basename(proto_path))[0]
+    pb2_file = os.path.join(out_dir, f'{name}_pb2.py')
+    grpc_pb2_file = os.path.join(out_dir, f'{name}_pb2_grpc.py')
 
+    if not (os.path.exists(pb2_file) and os.path.exists(grpc_pb2_file)):
+        print(f"🔧 Generating gRPC code from {name}.proto...")
+        from grpc_tools import protoc
+        protoc.main([
+            '',
+            f'-I{os.path.dirname(proto_path)}',
+            f'--python_out={out_dir}',
+            f'--grpc_python_out={out_dir}',
+            proto_path,
+        ])
+        generated = True
+
+from dotenv import load_dotenv
+
+# Load .env before importing app modules: they read their settings at import
+load_dotenv(os.path.join(script_dir, '.env'))
+
+import asyncio
+import json
 import grpc
 from concurrent import futures
+import numpy as np
 import base_pb2
 import base_pb2_grpc
+import chatbot_pb2
+import chatbot_pb2_grpc
+from app.core.loan_rules import ROW_SIZE, evaluate_batch, evaluate_rules, features_from_row
+from app.core.warmup import STARTUP_WARMUP, warm_up, warmup_state
+
+GRPC_PORT = int(os.getenv("GRPC_PORT", "50051"))
+# The debate workflow is synchronous (blocking LLM calls): each DebateLoan runs in one of these threads,
+# while the asyncio server itself multiplexes any number of streams
+DEBATE_WORKERS = int(os.getenv("GRPC_DEBATE_WORKERS", "32"))
+debate_executor = futures.ThreadPoolExecutor(max_workers=DEBATE_WORKERS, thread_name_prefix="debate")
+# Conversation storage runs after the stream has finished (keep references until done)
+background_tasks = set()
+
+
+def debate_request_to_application(request):
+    """DebateLoanReq -> LoanApplicationRequest (same validation as the FastAPI endpoint)"""
+    from app.schema.workflow import LoanApplicationRequest
+    data = {field.name: getattr(request, field.name) for field in request.DESCRIPTOR.fields}
+    # proto3 strings have no null: empty = not provided
+    data["club"] = data["club"] or None
+    data["guarantor"] = data["guarantor"] or None
+    return LoanApplicationRequest(**data)
+
+
+def debate_round_to_proto(debate_round):
+    return base_pb2.DebateRound(
+        round=debate_round["round"],
+        stage=debate_round["stage"],
+        turns=[
+            base_pb2.AgentTurn(
+                agent=turn["agent"],
+                target=turn.get("target") or "",
+                decision=str(turn.get("decision") or ""),
+                reason=str(turn.get("reason") or "")
+            )
+            for turn in debate_round["turns"]
+        ]
+    )
+
+
+def debate_result_to_proto(result, processing_time):
+    final_result = result.get("final_result", {})
+    rule_based = result.get("rule_based", {})
+    agent_status = result.get("agent_status", {})
+    return base_pb2.DebateResult(
+        decision=final_result.get("decision", "reject"),
+        reason=str(final_result.get("reason", "")),
+        rule_based_decision=str(rule_based.get("rule_based_decision", "")),
+        passed_count=int(rule_based.get("total_passed_count", 0)),
+        special_violations=int(rule_based.get("special_violations_count", 0)),
+        academic_approve=bool(agent_status.get("academic_approve", False)),
+        finance_approve=bool(agent_status.get("finance_approve", False)),
+        processing_time_seconds=round(processing_time, 2)
+    )
+
+
+async def store_debate(result, request_data):
+    try:
+        from app.database.mongodb import mongodb_config
+        await mongodb_config.store_conversation(result, request_data)
+    except Exception as e:
+        print(f"⚠️  Warning: Failed to store conversation: {e}")
+
 
 # Implement the BaseService
 class BaseServiceHandler(base_pb2_grpc.BaseServiceServicer):
-    def SayHello(self, request, context):
+    async def SayHello(self, request, context):
         return base_pb2.HelloReply(message=f"Hello, {request.name}")
 
-    def SayGoodBye(self, request, context):
+    async def SayGoodBye(self, request, context):
         return base_pb2.ByeReply(message=f"Goodbye, {request.name}")
 
-    def Predict(self, request, context):
-        # Echo back the features as prediction
-        return base_pb2.PredictRes(prediction=list(request.features))
+    async def Predict(self, request, context):
+        # Score one feature row with the loan regulation rules
+        if len(request.features) != ROW_SIZE:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Expected {ROW_SIZE} features, got {len(request.features)}")
+        
+        result = evaluate_rules(features_from_row(list(request.features)))
+        return base_pb2.PredictRes(
+            prediction=[1.0 if result["decision"] == "approve" else 0.0, result["passed_count"], result["special_violations"]],
+            decision=result["decision"],
+            passed_count=result["passed_count"],
+            special_violations=result["special_violations"],
+            reason=result["reason"]
+        )
+
+    async def PredictBatch(self, request, context):
+        # Many rows in one call, scored with vectorized rules (no per-row Python loop)
+        row_size = request.row_size or ROW_SIZE
+        if row_size != ROW_SIZE or len(request.features) % ROW_SIZE:
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"Expected rows of {ROW_SIZE} features, got {len(request.features)} values with row_size {row_size}"
+            )
+        
+        rows = np.fromiter(request.features, dtype=np.float64, count=len(request.features))
+        result = evaluate_batch(rows)
+        return base_pb2.PredictBatchRes(
+            approved=result["approved"].tolist(),
+            passed_count=result["passed_count"].tolist(),
+            special_violations=result["special_violations"].tolist(),
+            rows=len(rows) // ROW_SIZE
+        )
+
+    async def DebateLoan(self, request, context):
+        # Multi-agent debate, streamed round by round while the workflow runs in a worker thread
+        try:
+            application = debate_request_to_application(request)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid loan application: {e}")
+
+        from app.core.a2a_workflow import debate_to_decide_workflow
+
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        rounds = asyncio.Queue()
 
+        def on_round(debate_round):
+            loop.call_soon_threadsafe(rounds.put_nowait, debate_round)
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        print(f"\n🚀 [gRPC] Processing loan application {application.loan_contract_id}")
+        workflow = loop.run_in_executor(
+            debate_executor,
+            lambda: debate_to_decide_workflow(application.to_profile_text(), return_log=True, on_round=on_round)
+        )
+        workflow.add_done_callback(lambda _: rounds.put_nowait(None))
+
+        # The "decision" round is sent last, together with the structured result
+        decision_round = {"round": 3, "stage": "decision", "turns": []}
+        while (debate_round := await rounds.get()) is not None:
+            if debate_round["stage"] == "decision":
+                decision_round = debate_round
+            else:
+                yield debate_round_to_proto(debate_round)
+
+        try:
+            result = workflow.result()
+        except Exception as e:
+            print(f"❌ [gRPC] Debate failed for {application.loan_contract_id}: {e}")
+            await context.abort(grpc.StatusCode.INTERNAL, f"Workflow execution failed: {e}")
+
+        processing_time = time.time() - start_time
+        final_round = debate_round_to_proto(decision_round)
+        final_round.result.CopyFrom(debate_result_to_proto(result, processing_time))
+        yield final_round
+        print(f"✅ [gRPC] Decision: {final_round.result.decision} (took {processing_time:.2f}s)")
+
+        # Store like the FastAPI endpoint, without holding the stream open
+        result["processing_time_seconds"] = round(processing_time, 2)
+        result["request_id"] = application.loan_contract_id
+        task = asyncio.create_task(store_debate(result, application.dict()))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+
+def chat_result_to_proto(request, result, processing_time):
+    """RAGBot.chat() result -> ChatResponse (same fields as POST /api/v1/chat)"""
+    return chatbot_pb2.ChatResponse(
+        question=request.message,
+        answer=result.get("response", "Không có câu trả lời"),
+        sources=[str(source) for source in result.get("sources", [])],
+        processing_time=round(processing_time, 2),
+        success="error" not in result,
+        error=str(result.get("error", "")),
+        strategy=str(result.get("source", "unknown")),
+        conversation_id=str(result.get("conversation_id") or ""),
+        requires_login=bool(result.get("requires_login", False)),
+        suggestion=str(result.get("suggestion", ""))
+    )
+
+
+# Implement the ChatbotService on top of the shared RAGBot (memory keyed by conversation_id, else citizen_id)
+class ChatbotServiceHandler(chatbot_pb2_grpc.ChatbotServiceServicer):
+    async def Chat(self, request, context):
+        start_time = time.time()
+        try:
+            from app.botagent.main_bot import aget_rag_bot
+            bot = await aget_rag_bot()
+            result = await bot.chat(
+                message=request.message,
+                citizen_id=request.citizen_id or None,
+                conversation_id=request.conversation_id or None
+            )
+        except Exception as e:
+            print(f"❌ [gRPC] Chat error: {e}")
+            result = {"response": f"Xin lỗi, tôi gặp lỗi: {str(e)}", "source": "error", "error": str(e)}
+        return chat_result_to_proto(request, result, time.time() - start_time)
+
+    async def ChatStream(self, request, context):
+        # Tokens as they are generated; cancelling the call stops generation (stream_chat cancels its task)
+        start_time = time.time()
+        try:
+            from app.botagent.main_bot import aget_rag_bot
+            bot = await aget_rag_bot()
+            async for event in bot.stream_chat(
+                message=request.message,
+                citizen_id=request.citizen_id or None,
+                conversation_id=request.conversation_id or None
+            ):
+                if event["type"] == "done":
+                    response = chat_result_to_proto(request, event["result"], time.time() - start_time)
+                    yield chatbot_pb2.ChatStreamEvent(type="done", response=response)
+                else:
+                    yield chatbot_pb2.ChatStreamEvent(type="token", text=event["text"])
+        except Exception as e:
+            print(f"❌ [gRPC] Streaming chat error: {e}")
+            yield chatbot_pb2.ChatStreamEvent(type="error", error=str(e))
+
+    async def ClearAnswerCache(self, request, context):
+        # This process has its own answer cache: FastAPI's POST /chat/cache/clear does not reach it
+        from app.botagent.answer_cache import knowledge_base_answer_cache
+        knowledge_base_answer_cache.clear()
+        print("🧹 [gRPC] Knowledge-base answer cache cleared")
+        return chatbot_pb2.ClearAnswerCacheResponse(
+            success=True,
+            message="Answer cache cleared",
+            statistics_json=json.dumps(knowledge_base_answer_cache.get_stats(), default=str)
+        )
+
+    async def InvalidateUserCache(self, request, context):
+        # Same as FastAPI's POST /cache/invalidate, for the cache of this process (which serves Express chat)
+        if not request.citizen_id:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "citizen_id is required")
+
+        from app.core.cache import citizen_data_cache
+        removed = citizen_data_cache.invalidate(request.citizen_id, namespace=request.scope or None)
+        print(f"🧹 [gRPC] Invalidated {removed} cache entries for citizen {request.citizen_id}")
+        return chatbot_pb2.InvalidateUserCacheResponse(success=True, removed_entries=removed)
+
+    async def Ready(self, request, context):
+        # Warm-up state of this process (same fields as FastAPI's GET /ready)
+        snapshot = warmup_state.snapshot()
+        return chatbot_pb2.ReadyResponse(
+            ready=snapshot["ready"],
+            status=snapshot["status"],
+            components={name: component["status"] for name, component in snapshot["components"].items()},
+            snapshot_json=json.dumps(snapshot, default=str)
+        )
+
+
+async def serve():
+    server = grpc.aio.server()
     base_pb2_grpc.add_BaseServiceServicer_to_server(BaseServiceHandler(), server)
-    server.add_insecure_port('[::]:50051')
-    server.start()
-    print("📡 gRPC server started on port 50051...")
+    chatbot_pb2_grpc.add_ChatbotServiceServicer_to_server(ChatbotServiceHandler(), server)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
+    await server.start()
+    print(f"📡 gRPC server (asyncio) started on port {GRPC_PORT}...")
+    # Warm up in the background so the first Chat does not build RAGBot inline (Ready reports progress)
+    warmup_task = asyncio.create_task(warm_up()) if STARTUP_WARMUP else None
     try:
-        while True:
-            time.sleep(60)
-    except KeyboardInterrupt:
-        server.stop(0)
+        await server.wait_for_termination()
+    finally:
+        if warmup_task:
+            warmup_task.cancel()
+        await server.stop(5)
+        debate_executor.shutdown(wait=False)
 
 if __name__ == '__main__':
-    serve()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
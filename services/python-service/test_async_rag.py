@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test script for the non-blocking RAG path
+Runs several knowledge-base questions concurrently against a vector store that blocks like the
+Pinecone client does, and checks that they overlap instead of serializing and that the event loop
+stays responsive (health checks keep being served); then checks that streamed answers arrive token by token
+and that the answer cache is keyed by the user's question and login state, not the per-user context
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Keep the test offline and away from the real caches/indexes
+_tmp_dir = tempfile.mkdtemp()
+os.environ.setdefault("EMBEDDING_CACHE_DIR", "")
+os.environ.setdefault("KB_VERSION_PATH", os.path.join(_tmp_dir, "kb_version.txt"))
+os.environ.setdefault("CLASSIFIER_LOG_PATH", os.path.join(_tmp_dir, "classification_log.jsonl"))
+
+from llama_index.core import Settings, StorageContext, VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms.mock import MockLLM
+from llama_index.core.schema import TextNode
+
+from app.botagent.answer_cache import SemanticAnswerCache
+from app.botagent.hybrid_retrieval import BM25Index
+from app.botagent.local_vectorstore import LocalVectorStore
+from app.botagent.main_bot import RAGBot
+
+STORE_LATENCY = 0.5  # seconds, a slow network round trip to the vector database
+CONCURRENT_CHATS = 4
+
+
+class BlockingVectorStore(LocalVectorStore):
+    """Sync-only vector store that blocks like a network client"""
+
+    def query(self, query, **kwargs):
+        time.sleep(STORE_LATENCY)
+        return super().query(query, **kwargs)
+
+
+def build_bot() -> RAGBot:
+    """RAGBot with its real query engine over an offline index (mock embeddings and LLM)"""
+    Settings.embed_model = MockEmbedding(embed_dim=16)
+
+    store = BlockingVectorStore(persist_dir=None)
+    nodes = [
+        TextNode(text="Quy trình vay vốn sinh viên gồm nộp hồ sơ, xét duyệt và giải ngân."),
+        TextNode(text="Lãi suất cho vay ưu đãi đối với học sinh, sinh viên theo Nghị định 07/2021."),
+        TextNode(text="Điều kiện vay: sinh viên có hoàn cảnh gia đình khó khăn."),
+    ]
+    index = VectorStoreIndex(nodes=nodes, storage_context=StorageContext.from_defaults(vector_store=store))
+
+    bot = RAGBot.__new__(RAGBot)
+    bot.llm = MockLLM(max_tokens=20)
+    bot.pinecone_manager = SimpleNamespace(vector_index=index, keyword_index=BM25Index(path=None))
+    bot.pinecone_manager.keyword_index.add_nodes(nodes, persist=False)
+    bot.answer_cache = SemanticAnswerCache(threshold=2.0)  # never hits: every question runs the full path
+    bot.query_engine = bot._create_query_engine()
+    bot.streaming_query_engine = bot._create_query_engine(streaming=True)
+    return bot
+
+
+async def test_concurrent_chats():
+    """Concurrent RAG questions must overlap, and the event loop must keep ticking meanwhile"""
+    print("🧪 Testing non-blocking RAG retrieval")
+    print("=" * 50)
+
+    bot = build_bot()
+
+    # Heartbeat: stands in for /health requests served while RAG questions run
+    max_gap = 0.0
+    running = True
+
+    async def heartbeat():
+        nonlocal max_gap
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            max_gap = max(max_gap, now - last)
+            last = now
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+
+    questions = [f"Quy trình vay vốn sinh viên lần {i}" for i in range(CONCURRENT_CHATS)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(bot._handle_rag_query(question, time.time()) for question in questions))
+    elapsed = time.perf_counter() - start
+
+    running = False
+    await heartbeat_task
+
+    print(f"\n1. {CONCURRENT_CHATS} concurrent questions took {elapsed:.2f}s "
+          f"(serialized would be >= {CONCURRENT_CHATS * STORE_LATENCY:.2f}s)")
+    print(f"2. Longest event-loop stall: {max_gap * 1000:.0f} ms")
+
+    for result in results:
+        assert result["source"] == "knowledge_base", result
+        assert result["sources"], "retrieval returned no documents"
+
+    assert elapsed < CONCURRENT_CHATS * STORE_LATENCY * 0.75, "RAG questions were serialized"
+    assert max_gap < STORE_LATENCY / 2, "event loop was blocked by retrieval"
+
+    print("\n✅ Concurrent chats overlap and the event loop stays responsive")
+    print("=" * 50)
+
+
+async def test_streaming_rag():
+    """Streamed RAG answers arrive as several tokens that add up to the final response"""
+    print("🧪 Testing streamed RAG answers")
+    print("=" * 50)
+    
+    bot = build_bot()
+    tokens = []
+    
+    async def on_token(text):
+        tokens.append(text)
+    
+    result = await bot._handle_rag_query("Lãi suất cho vay sinh viên", time.time(), on_token=on_token)
+    
+    print(f"\n1. Received {len(tokens)} tokens")
+    print(f"2. Sources: {len(result['sources'])}")
+    
+    assert result["source"] == "knowledge_base", result
+    assert len(tokens) > 1, "answer was not streamed"
+    assert "".join(tokens) == result["response"], "streamed tokens don't match the final response"
+    assert result["sources"], "retrieval returned no documents"
+    
+    print("\n✅ RAG answers stream token by token")
+    print("=" * 50)
+
+
+async def test_answer_cache_key():
+    """Same question in another context hits the cache; another login state doesn't; cached sources are copies"""
+    print("🧪 Testing answer cache key")
+    print("=" * 50)
+
+    bot = build_bot()
+    bot.answer_cache = SemanticAnswerCache(threshold=0.92)
+    history_a = "Lịch sử trò chuyện gần đây:\nuser: Tôi học năm 2 ngành Kinh tế"
+    history_b = "Lịch sử trò chuyện gần đây:\nuser: Tôi là sinh viên Bách khoa"
+
+    first = await bot._handle_rag_query("Lãi suất cho vay sinh viên?", time.time(), history_a)
+    assert "cache" not in first and first["sources"], first
+    first["sources"].clear()  # callers mutating a result must not touch the cached entry
+
+    other_context = await bot._handle_rag_query("lãi suất  cho vay sinh viên?", time.time(), history_b)
+    logged_in = await bot._handle_rag_query("Lãi suất cho vay sinh viên?", time.time(), history_a, has_citizen_id=True)
+    print(f"\n1. Other context: cache={other_context.get('cache')}")
+    print(f"2. Logged in: cache={logged_in.get('cache')}")
+    print(f"3. Stats: {bot.answer_cache.get_stats()}")
+
+    assert other_context["cache"]["hit"] and other_context["sources"], other_context
+    other_context["sources"].clear()
+    assert "cache" not in logged_in, "answer leaked across login states"
+    assert bot.answer_cache.lookup(await bot._embed_question("lãi suất cho vay sinh viên?"), scope=False)["answer"]["sources"]
+
+    print("\n✅ Answer cache is keyed by question and login state and returns copies")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    asyncio.run(test_concurrent_chats())
+    asyncio.run(test_streaming_rag())
+    asyncio.run(test_answer_cache_key())
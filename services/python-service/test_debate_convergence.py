@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for debate convergence in debate_to_decide_workflow
+Scripted agents (no LLM) count the calls they receive: a track whose agent and CriticalAgent agree skips the
+repredict, N-round debates stop at convergence, early stop can be disabled per track
+"""
+
+import time
+
+import app.core.a2a_workflow as a2a_workflow
+
+PROFILE = "Sinh viên: 21 tuổi, Nữ, tier 1, STEM, GPA: 0.85, Thu nhập gia đình: 6M VND/tháng, không nợ, vay: 40M VND học phí"
+
+
+class Scenario:
+    """
+    first: round-1 decision per agent; critic: recommended decision per agent;
+    switch: agent adopts the critic's recommendation when repredicting (else keeps its decision)
+    """
+
+    def __init__(self, first, critic, switch):
+        self.first, self.critic, self.switch = first, critic, switch
+        self.calls = {"critique": 0, "repredict": 0, "decision": 0}
+
+    def agent(self, name):
+        scenario = self
+
+        class ScriptedAgent:
+            def __init__(self, name=name):
+                self.name = name
+                self.coordinator = None
+
+            def handle_message(self, message):
+                message_type, sender = message["type"], message["sender"]
+                payload = message["payload"]
+                if self.name == "CriticalAgent":
+                    scenario.calls["critique"] += 1
+                    agent = "AcademicAgent" if message_type == "scholarship_decision" else "FinanceAgent"
+                    reply = {"critical_response": "phản biện", "recommended_decision": scenario.critic[agent]}
+                    self.coordinator.route_message(self.name, sender, f"{message_type}_critical_response", reply)
+                elif self.name == "DecisionAgent":
+                    scenario.calls["decision"] += 1
+                    self.coordinator.route_message(self.name, sender, "final_decision", {"decision": "approve", "reason": "ok"})
+                elif message_type.startswith("repredict"):
+                    scenario.calls["repredict"] += 1
+                    decision = payload["recommended_decision"] if scenario.switch[self.name] else scenario.first[self.name]
+                    self.coordinator.route_message(self.name, sender, message_type, {"decision": decision, "reason": "sau phản biện"})
+                else:
+                    reply_type = "scholarship_decision" if self.name == "AcademicAgent" else "loan_decision"
+                    self.coordinator.route_message(self.name, sender, reply_type, {"decision": scenario.first[self.name], "reason": "vòng 1"})
+
+        return ScriptedAgent
+
+    def run(self, **kwargs):
+        for name in ["AcademicAgent", "FinanceAgent", "CriticalAgent", "DecisionAgent"]:
+            setattr(a2a_workflow, name, self.agent(name))
+        rounds = []
+        result = a2a_workflow.debate_to_decide_workflow(PROFILE, return_log=True, on_round=rounds.append, **kwargs)
+        return result, rounds
+
+
+def tracks(result):
+    return {name: (track["rounds"], track["repredicts"], track["converged"], track["final_decision"])
+            for name, track in result["debate"]["tracks"].items()}
+
+
+def test_debate_convergence():
+    print("🧪 Testing debate convergence / early termination")
+    print("=" * 50)
+
+    # 1. Critic agrees with both agents: no repredict at all
+    scenario = Scenario(
+        first={"AcademicAgent": "approve", "FinanceAgent": "reject"},
+        critic={"AcademicAgent": "approve", "FinanceAgent": "reject"},
+        switch={"AcademicAgent": True, "FinanceAgent": True}
+    )
+    start = time.perf_counter()
+    result, rounds = scenario.run(max_rounds=1)
+    elapsed = time.perf_counter() - start
+    print(f"\n1. Agreement: calls={scenario.calls}, stages={[r['stage'] for r in rounds]}, {elapsed:.2f}s")
+    assert scenario.calls == {"critique": 2, "repredict": 0, "decision": 1}, scenario.calls
+    assert [r["stage"] for r in rounds] == ["arguments", "critique", "decision"]
+    assert tracks(result) == {"academic": (1, 0, True, "approve"), "finance": (1, 0, True, "reject")}
+    assert result["responses"]["finance_repredict"]["decision"] == "reject"  # round-1 decision stands
+    assert elapsed < 2, "debate still waits on fixed sleeps"
+
+    # 2. Finance disagrees and adopts the critic's view: one repredict, converged after it
+    scenario = Scenario(
+        first={"AcademicAgent": "approve", "FinanceAgent": "reject"},
+        critic={"AcademicAgent": "approve", "FinanceAgent": "approve"},
+        switch={"AcademicAgent": True, "FinanceAgent": True}
+    )
+    result, rounds = scenario.run(max_rounds=3)
+    print(f"\n2. One disagreement, N=3: calls={scenario.calls}, tracks={tracks(result)}")
+    assert scenario.calls == {"critique": 2, "repredict": 1, "decision": 1}, scenario.calls
+    assert tracks(result) == {"academic": (1, 0, True, "approve"), "finance": (1, 1, True, "approve")}
+    assert [(r["round"], r["stage"]) for r in rounds] == [(1, "arguments"), (2, "critique"), (2, "rebuttal"), (3, "decision")]
+
+    # 3. Stubborn finance agent: debate runs all N rounds without converging
+    scenario = Scenario(
+        first={"AcademicAgent": "approve", "FinanceAgent": "reject"},
+        critic={"AcademicAgent": "approve", "FinanceAgent": "approve"},
+        switch={"AcademicAgent": True, "FinanceAgent": False}
+    )
+    result, rounds = scenario.run(max_rounds=3)
+    print(f"\n3. No convergence, N=3: calls={scenario.calls}, tracks={tracks(result)}")
+    assert scenario.calls == {"critique": 4, "repredict": 3, "decision": 1}, scenario.calls
+    assert tracks(result)["finance"] == (3, 3, False, "reject")
+    assert rounds[-1] == {**rounds[-1], "round": 5, "stage": "decision"}
+
+    # 4. Early stop disabled for the academic track: the old always-repredict behaviour
+    scenario = Scenario(
+        first={"AcademicAgent": "approve", "FinanceAgent": "reject"},
+        critic={"AcademicAgent": "approve", "FinanceAgent": "reject"},
+        switch={"AcademicAgent": True, "FinanceAgent": True}
+    )
+    result, rounds = scenario.run(max_rounds=1, early_stop={"AcademicAgent": False})
+    print(f"\n4. Early stop off for academic: calls={scenario.calls}, tracks={tracks(result)}")
+    assert scenario.calls == {"critique": 2, "repredict": 1, "decision": 1}, scenario.calls
+    assert tracks(result) == {"academic": (1, 1, False, "approve"), "finance": (1, 0, True, "reject")}
+
+    print("\n✅ Debate tracks stop once agent and critic agree")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_debate_convergence()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test script for the ChatbotService gRPC servicer (Chat + ChatStream + cache RPCs + Ready)
+Serves main_grpc's ChatbotServiceHandler with a scripted bot (no Pinecone / OpenAI) whose stream_chat is
+RAGBot.stream_chat itself, and checks unary answers, token streaming, conversation_id-scoped memory, that
+several streams share one channel concurrently, and that this process's answer cache, citizen data cache and
+warm-up state are reachable over gRPC
+"""
+
+import asyncio
+import json
+import time
+
+import grpc
+
+import chatbot_pb2
+import chatbot_pb2_grpc
+import app.botagent.main_bot as main_bot
+from app.botagent.answer_cache import knowledge_base_answer_cache
+from app.botagent.session_memory import session_key
+from app.core.cache import citizen_data_cache
+from app.core.warmup import warmup_state
+from main_grpc import ChatbotServiceHandler
+
+TOKEN_DELAY = 0.05
+
+
+class ScriptedBot:
+    """chat() answers "turn N: <message>" word by word, N counted per memory session"""
+
+    stream_chat = main_bot.RAGBot.stream_chat
+
+    def __init__(self):
+        self.histories = {}
+
+    async def chat(self, message, citizen_id=None, conversation_id=None, on_token=None):
+        session = session_key(conversation_id, citizen_id)
+        history = self.histories.setdefault(session, [])
+        history.append(message)
+        answer = f"turn {len(history)}: {message}"
+        if on_token:
+            for word in answer.split(" "):
+                await asyncio.sleep(TOKEN_DELAY)
+                await on_token(word + " ")
+        return {"response": answer, "source": "direct_answer", "sources": ["doc.pdf"], "conversation_id": conversation_id}
+
+
+async def test_grpc_chat():
+    print("🧪 Testing ChatbotService over grpc.aio")
+    print("=" * 50)
+
+    bot = ScriptedBot()
+
+    async def aget_rag_bot():
+        return bot
+
+    main_bot.aget_rag_bot = aget_rag_bot
+
+    server = grpc.aio.server()
+    chatbot_pb2_grpc.add_ChatbotServiceServicer_to_server(ChatbotServiceHandler(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+
+    try:
+        channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        stub = chatbot_pb2_grpc.ChatbotServiceStub(channel)
+
+        # 1. Unary Chat, memory scoped by conversation_id
+        first = await stub.Chat(chatbot_pb2.ChatRequest(message="xin chào", conversation_id="conv-a"))
+        second = await stub.Chat(chatbot_pb2.ChatRequest(message="lãi suất?", conversation_id="conv-a", citizen_id="001"))
+        other = await stub.Chat(chatbot_pb2.ChatRequest(message="xin chào", conversation_id="conv-b"))
+        print(f"\n1. Chat: {first.answer!r} / {second.answer!r} / {other.answer!r}")
+        assert first.success and first.strategy == "direct_answer" and list(first.sources) == ["doc.pdf"], first
+        assert second.answer.startswith("turn 2") and second.conversation_id == "conv-a", second
+        assert other.answer.startswith("turn 1") and other.conversation_id == "conv-b", other
+
+        # 2. ChatStream: tokens first, then one done event with the full response
+        events = [event async for event in stub.ChatStream(chatbot_pb2.ChatRequest(message="hạn mức vay", conversation_id="conv-c"))]
+        tokens = "".join(event.text for event in events if event.type == "token")
+        print(f"\n2. ChatStream: {len(events) - 1} token events → {tokens.strip()!r}")
+        assert [event.type for event in events][-1] == "done" and all(event.type == "token" for event in events[:-1])
+        assert len(events) > 2 and tokens.strip() == events[-1].response.answer == "turn 1: hạn mức vay"
+
+        # 3. Concurrent streams on one channel overlap
+        start = time.perf_counter()
+        streams = await asyncio.gather(*[_collect(stub, f"câu hỏi {i}", f"conv-{i}") for i in range(10)])
+        elapsed = time.perf_counter() - start
+        single = 5 * TOKEN_DELAY  # "turn 1: câu hỏi i" = 5 tokens
+        print(f"\n3. 10 concurrent streams in {elapsed:.2f}s (one stream ≈ {single:.2f}s)")
+        assert all(events[-1].response.answer.startswith("turn 1") for events in streams)
+        assert elapsed < single * 5, "streams were serialized"
+
+        # 4. Answer cache clear and readiness of this process
+        knowledge_base_answer_cache.store([1.0, 0.0, 0.0], "lãi suất?", {"response": "6%/năm"})
+        assert knowledge_base_answer_cache.get_stats()["entries"] == 1
+        cleared = await stub.ClearAnswerCache(chatbot_pb2.ClearAnswerCacheRequest())
+        ready = await stub.Ready(chatbot_pb2.ReadyRequest())
+        print(f"\n4. ClearAnswerCache: {cleared.message!r}; Ready: ready={ready.ready}, status={ready.status}, components={dict(ready.components)}")
+        assert cleared.success and json.loads(cleared.statistics_json)["entries"] == 0
+        assert (ready.ready, ready.status) == (warmup_state.ready, warmup_state.status)
+        assert set(ready.components) == {"mongodb", "agents", "rag_bot"}
+        assert json.loads(ready.snapshot_json)["status"] == ready.status
+
+        # 4b. Profile update: Express invalidates this process's citizen data cache
+        citizen_data_cache.set("student", "001", {"gpa": 3.2})
+        citizen_data_cache.set("user", "001", {"name": "An"})
+        invalidated = await stub.InvalidateUserCache(chatbot_pb2.InvalidateUserCacheRequest(citizen_id="001", scope="student"))
+        print(f"\n4b. InvalidateUserCache(student): removed {invalidated.removed_entries}")
+        assert invalidated.success and invalidated.removed_entries == 1
+        assert citizen_data_cache.get("student", "001") is None and citizen_data_cache.get("user", "001") == {"name": "An"}
+        invalidated = await stub.InvalidateUserCache(chatbot_pb2.InvalidateUserCacheRequest(citizen_id="001"))
+        assert invalidated.removed_entries == 1 and citizen_data_cache.get("user", "001") is None
+        try:
+            await stub.InvalidateUserCache(chatbot_pb2.InvalidateUserCacheRequest())
+            raise AssertionError("invalidation without citizen_id was accepted")
+        except grpc.RpcError as e:
+            assert e.code() == grpc.StatusCode.INVALID_ARGUMENT, e
+
+        # 5. Bot failure is reported, not raised
+        async def broken_bot():
+            raise RuntimeError("Pinecone unavailable")
+
+        main_bot.aget_rag_bot = broken_bot
+        reply = await stub.Chat(chatbot_pb2.ChatRequest(message="xin chào"))
+        events = [event async for event in stub.ChatStream(chatbot_pb2.ChatRequest(message="xin chào"))]
+        print(f"\n5. Bot unavailable: success={reply.success}, error={reply.error!r}, stream={[event.type for event in events]}")
+        assert not reply.success and "Pinecone" in reply.error
+        assert [event.type for event in events] == ["error"]
+        await channel.close()
+    finally:
+        await server.stop(0)
+
+    print("\n✅ ChatbotService serves Chat, ChatStream, ClearAnswerCache, InvalidateUserCache and Ready")
+    print("=" * 50)
+
+
+async def _collect(stub, message, conversation_id):
+    return [event async for event in stub.ChatStream(chatbot_pb2.ChatRequest(message=message, conversation_id=conversation_id))]
+
+
+if __name__ == "__main__":
+    asyncio.run(test_grpc_chat())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the server-streaming DebateLoan RPC (grpc.aio)
+Runs the real debate workflow with scripted agents (no LLM calls) and checks that the rounds arrive as typed
+messages in order, that the last one carries the result, that concurrent debates overlap instead of queueing
+behind a small thread pool, and that an invalid application is rejected
+"""
+
+import asyncio
+import time
+
+import grpc
+
+import base_pb2
+import base_pb2_grpc
+import app.core.a2a_workflow as a2a_workflow
+from main_grpc import BaseServiceHandler
+
+CONCURRENT_DEBATES = 8
+LLM_LATENCY = 0.2  # seconds per scripted agent reply (the real agents block on an LLM call)
+
+# Scripted replies: agent -> incoming message type -> (reply type, payload)
+SCRIPT = {
+    "AcademicAgent": {
+        "scholarship_application": ("scholarship_decision", {"decision": "approve", "reason": "GPA 0.85, ngành STEM"}),
+        "repredict_scholarship": ("repredict_scholarship", {"decision": "approve", "reason": "Giữ nguyên quyết định"}),
+    },
+    "FinanceAgent": {
+        "loan_application": ("loan_decision", {"decision": "reject", "reason": "Khoản vay lớn so với thu nhập"}),
+        "repredict_loan": ("repredict_loan", {"decision": "approve", "reason": "Có bảo lãnh, chấp nhận"}),
+    },
+    "CriticalAgent": {
+        "scholarship_decision": ("scholarship_decision_critical_response", {"critical_response": "Hợp lý", "recommended_decision": "approve"}),
+        "loan_decision": ("loan_decision_critical_response", {"critical_response": "Bỏ qua người bảo lãnh", "recommended_decision": "approve"}),
+    },
+    "DecisionAgent": {
+        "aggregate_all": ("final_decision", {
+            "decision": "approve",
+            "reason": "PASS cả 3 special features",
+            "detailed_analysis": {
+                "rule_calculation": {"total_passed_count": 7, "special_violations_count": 0, "rule_based_decision": "approve"},
+                "agent_consensus": {"academic_approve": True, "finance_approve": True},
+            },
+        }),
+    },
+}
+
+
+class ScriptedAgent:
+    def __init__(self, name="agent"):
+        self.name = name
+        self.coordinator = None
+
+    def handle_message(self, message):
+        reply = SCRIPT[self.name].get(message["type"])
+        if reply:
+            time.sleep(LLM_LATENCY)
+            self.coordinator.route_message(self.name, message["sender"], *reply)
+
+
+def scripted(name):
+    return lambda name=name: ScriptedAgent(name)
+
+
+APPLICATION = dict(
+    loan_contract_id="loan-grpc-1", age_group="18-22", age=20, gender="Nữ", province_region="Bắc",
+    university_tier=1, public_university=True, major_category="STEM", gpa_normalized=0.85, study_year=3,
+    family_income=6_000_000, has_part_time_job=False, existing_debt=False, guarantor="Cha mẹ",
+    loan_amount_requested=40_000_000, loan_purpose="Học phí"
+)
+
+
+async def collect(stub, **overrides):
+    return [message async for message in stub.DebateLoan(base_pb2.DebateLoanReq(**{**APPLICATION, **overrides}))]
+
+
+async def test_grpc_debate():
+    print("🧪 Testing DebateLoan server streaming over grpc.aio")
+    print("=" * 50)
+
+    for name, attribute in [("AcademicAgent", "AcademicAgent"), ("FinanceAgent", "FinanceAgent"),
+                            ("CriticalAgent", "CriticalAgent"), ("DecisionAgent", "DecisionAgent")]:
+        setattr(a2a_workflow, attribute, scripted(name))
+
+    server = grpc.aio.server()
+    base_pb2_grpc.add_BaseServiceServicer_to_server(BaseServiceHandler(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+
+    try:
+        channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        stub = base_pb2_grpc.BaseServiceStub(channel)
+
+        # 1. One debate: rounds in order, result only on the last message
+        start = time.perf_counter()
+        rounds = await collect(stub)
+        single = time.perf_counter() - start
+        print(f"\n1. One debate in {single:.2f}s:")
+        for message in rounds:
+            turns = ", ".join(f"{turn.agent}{'→' + turn.target if turn.target else ''}={turn.decision}" for turn in message.turns)
+            print(f"   round {message.round} {message.stage}: {turns}")
+
+        assert [message.stage for message in rounds] == ["arguments", "critique", "rebuttal", "decision"], rounds
+        assert [turn.decision for turn in rounds[0].turns] == ["approve", "reject"]
+        assert [turn.target for turn in rounds[1].turns] == ["AcademicAgent", "FinanceAgent"]
+        assert all(not message.HasField("result") for message in rounds[:-1])
+        result = rounds[-1].result
+        print(f"   result: {result.decision} (rule-based {result.rule_based_decision}, passed {result.passed_count})")
+        assert (result.decision, result.passed_count, result.academic_approve) == ("approve", 7, True), result
+
+        # 2. Concurrent debates share the asyncio server instead of queueing behind 4 threads
+        start = time.perf_counter()
+        results = await asyncio.gather(*[collect(stub, loan_contract_id=f"loan-grpc-{i}") for i in range(CONCURRENT_DEBATES)])
+        concurrent = time.perf_counter() - start
+        print(f"\n2. {CONCURRENT_DEBATES} concurrent debates in {concurrent:.2f}s (one alone: {single:.2f}s)")
+        assert all(messages[-1].result.decision == "approve" for messages in results)
+        assert concurrent < single * 2, "concurrent debates were serialized"
+
+        # 3. Invalid application
+        try:
+            await collect(stub, age=0)
+            raise AssertionError("invalid application was accepted")
+        except grpc.RpcError as e:
+            assert e.code() == grpc.StatusCode.INVALID_ARGUMENT, e
+        print("\n3. Invalid application rejected with INVALID_ARGUMENT")
+        await channel.close()
+    finally:
+        await server.stop(0)
+
+    print("\n✅ DebateLoan streams typed debate rounds")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    asyncio.run(test_grpc_debate())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the rule-based Predict / PredictBatch RPCs
+Starts main_grpc's BaseServiceHandler on a free local port and checks single-row decisions against the
+regulation (including the exact F2/F6 thresholds, which float32 features would break), that PredictBatch
+agrees with the per-row rules on random rows, and that bad input is rejected
+"""
+
+import asyncio
+import random
+import time
+
+import grpc
+
+import base_pb2
+import base_pb2_grpc
+from app.core.loan_rules import ROW_SIZE, evaluate_rules, features_from_row
+from main_grpc import BaseServiceHandler
+
+BATCH_ROWS = 10000
+
+
+def random_row(rng: random.Random):
+    return [
+        rng.choice([4_000_000, 8_000_000, 12_000_000]),
+        rng.choice([0.6, 0.7, 6.0, 8.5]),
+        rng.randint(0, 1),
+        rng.randint(0, 1),
+        rng.randint(0, 1),
+        rng.choice([30_000_000, 60_000_000, 80_000_000]),
+        rng.randint(0, 1),
+    ]
+
+
+async def test_grpc_predict():
+    print("🧪 Testing rule-based Predict / PredictBatch over gRPC")
+    print("=" * 50)
+
+    server = grpc.aio.server()
+    base_pb2_grpc.add_BaseServiceServicer_to_server(BaseServiceHandler(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+
+    try:
+        channel = grpc.aio.insecure_channel(f"127.0.0.1:{port}")
+        stub = base_pb2_grpc.BaseServiceStub(channel)
+
+        # 1. Single rows: all special features pass / one special failure / two special failures
+        cases = [
+            ([6_000_000, 7.5, 1, 1, 1, 40_000_000, 0], "approve", 7, 0),
+            ([6_000_000, 0.6, 1, 1, 1, 40_000_000, 0], "approve", 6, 1),
+            ([12_000_000, 0.6, 0, 1, 1, 40_000_000, 0], "reject", 4, 1),
+            ([6_000_000, 0.6, 1, 1, 0, 40_000_000, 0], "reject", 5, 2),
+        ]
+        for features, decision, passed_count, special_violations in cases:
+            reply = await stub.Predict(base_pb2.PredictReq(features=features))
+            print(f"\n1. {features} → {reply.decision} (passed {reply.passed_count}, special violations {reply.special_violations})")
+            assert (reply.decision, reply.passed_count, reply.special_violations) == (decision, passed_count, special_violations), reply
+            assert list(reply.prediction) == [1.0 if decision == "approve" else 0.0, passed_count, special_violations]
+
+        # 1b. Thresholds survive the wire: GPA exactly 0.65 passes F2, 60,000,000 VND passes F6 and 60,000,001 fails it
+        boundaries = [
+            ([6_000_000, 0.65, 1, 1, 1, 40_000_000, 0], "approve", 7, 0),
+            ([6_000_000, 6.5, 1, 1, 1, 40_000_000, 0], "approve", 7, 0),
+            ([6_000_000, 7.5, 1, 1, 1, 60_000_000, 0], "approve", 7, 0),
+            ([6_000_000, 7.5, 1, 1, 1, 60_000_001, 0], "approve", 6, 0),
+        ]
+        for features, decision, passed_count, special_violations in boundaries:
+            reply = await stub.Predict(base_pb2.PredictReq(features=features))
+            print(f"\n1b. {features} → {reply.decision} (passed {reply.passed_count}, special violations {reply.special_violations})")
+            assert (reply.decision, reply.passed_count, reply.special_violations) == (decision, passed_count, special_violations), reply
+        reply = await stub.PredictBatch(base_pb2.PredictBatchReq(features=[value for row, *_ in boundaries for value in row]))
+        assert list(reply.passed_count) == [passed_count for _, _, passed_count, _ in boundaries], reply
+
+        # 2. Batch: same answers as the per-row rules, in one round trip
+        rng = random.Random(7)
+        rows = [random_row(rng) for _ in range(BATCH_ROWS)]
+        start = time.perf_counter()
+        reply = await stub.PredictBatch(base_pb2.PredictBatchReq(features=[value for row in rows for value in row]))
+        elapsed = time.perf_counter() - start
+        print(f"\n2. PredictBatch: {reply.rows} rows in {elapsed * 1000:.1f} ms, {sum(reply.approved)} approved")
+
+        assert reply.rows == BATCH_ROWS
+        for i, row in enumerate(rows):
+            expected = evaluate_rules(features_from_row(row))
+            got = ("approve" if reply.approved[i] else "reject", reply.passed_count[i], reply.special_violations[i])
+            assert got == (expected["decision"], expected["passed_count"], expected["special_violations"]), (row, got, expected)
+
+        # 3. Malformed input is an INVALID_ARGUMENT, not a wrong answer
+        for request, call in [
+            (base_pb2.PredictReq(features=[1.0, 2.0]), stub.Predict),
+            (base_pb2.PredictBatchReq(features=[0.0] * (ROW_SIZE + 1)), stub.PredictBatch),
+        ]:
+            try:
+                await call(request)
+                raise AssertionError("malformed request was accepted")
+            except grpc.RpcError as e:
+                assert e.code() == grpc.StatusCode.INVALID_ARGUMENT, e
+        print("\n3. Malformed rows rejected with INVALID_ARGUMENT")
+        await channel.close()
+    finally:
+        await server.stop(0)
+
+    print("\n✅ Predict and PredictBatch apply the loan regulation rules")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    asyncio.run(test_grpc_predict())
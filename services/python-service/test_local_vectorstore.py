@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the local flat vector store (VECTOR_BACKEND=local)
+Checks exact top-k search, that batched adds append to the journal instead of rewriting the whole index,
+that a reopened store sees every add/delete (journal replay, also after a torn last line, which is cut off so
+later writes survive), compaction, and that a second process reloads when the knowledge-base version changes
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+import app.botagent.local_vectorstore as local_vectorstore
+from app.botagent.local_vectorstore import EMBEDDINGS_FILE, JOURNAL_FILE, LocalVectorStore
+
+DIM = 32
+BATCHES = 40
+BATCH_SIZE = 50
+
+
+def make_nodes(rng: np.random.Generator, start: int, count: int):
+    return [
+        TextNode(id_=f"chunk-{i}", text=f"Đoạn tài liệu số {i}", embedding=rng.normal(size=DIM).tolist(),
+                 metadata={"source": f"doc-{i % 5}.pdf"})
+        for i in range(start, start + count)
+    ]
+
+
+def top_ids(store: LocalVectorStore, embedding, k: int = 3):
+    result = store.query(VectorStoreQuery(query_embedding=list(embedding), similarity_top_k=k))
+    return result.ids
+
+
+def test_local_vectorstore():
+    print("🧪 Testing LocalVectorStore")
+    print("=" * 50)
+
+    rng = np.random.default_rng(7)
+    persist_dir = tempfile.mkdtemp()
+    local_vectorstore.COMPACT_MIN_ROWS = 10_000  # no compaction during the batched ingest below
+    store = LocalVectorStore(persist_dir=persist_dir)
+
+    # 1. Batched ingest only appends: the compacted base files are never rewritten
+    start = time.perf_counter()
+    nodes = []
+    for batch in range(BATCHES):
+        batch_nodes = make_nodes(rng, batch * BATCH_SIZE, BATCH_SIZE)
+        store.add(batch_nodes)
+        nodes.extend(batch_nodes)
+    elapsed = time.perf_counter() - start
+    print(f"\n1. {BATCHES} batches of {BATCH_SIZE} added in {elapsed:.2f}s, stats: {store.get_stats()}")
+    assert store.get_stats()["total_vectors"] == BATCHES * BATCH_SIZE
+    assert not os.path.exists(os.path.join(persist_dir, EMBEDDINGS_FILE)), "index was rewritten on add"
+    assert store.get_stats()["journal_rows"] == BATCHES * BATCH_SIZE
+
+    # 2. Exact search: a node's own embedding is its nearest neighbour
+    for node in nodes[::397]:
+        assert top_ids(store, node.embedding)[0] == node.node_id
+    print("\n2. Nearest neighbour of each probed node is itself")
+
+    # 3. Deletes + re-adds survive a reopen (journal replay), even with a torn last line
+    store.delete_nodes(node_ids=[node.node_id for node in nodes[:10]])
+    replaced = make_nodes(rng, 9, 1)[0]  # deleted above, added back with a new embedding
+    store.add([replaced])
+    with open(os.path.join(persist_dir, JOURNAL_FILE), "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "records": [')
+
+    reopened = LocalVectorStore(persist_dir=persist_dir)
+    print(f"\n3. Reopened: {reopened.get_stats()}")
+    assert reopened.get_stats()["total_vectors"] == BATCHES * BATCH_SIZE - 9
+    assert top_ids(reopened, replaced.embedding)[0] == "chunk-9"
+    assert "chunk-3" not in top_ids(reopened, nodes[3].embedding, k=5)
+    assert top_ids(reopened, nodes[1234].embedding)[0] == "chunk-1234"
+
+    # 3b. Writes after the torn line are not lost on the next replay
+    late = make_nodes(rng, 50_000, 1)[0]
+    reopened.add([late])
+    assert LocalVectorStore(persist_dir=persist_dir).get_stats()["total_vectors"] == BATCHES * BATCH_SIZE - 8
+    assert top_ids(LocalVectorStore(persist_dir=persist_dir), late.embedding)[0] == "chunk-50000"
+    print("\n3b. Torn journal line truncated; later writes replay")
+
+    # 4. Compaction folds the journal into embeddings.npy / nodes.json
+    reopened.persist()
+    assert not os.path.exists(os.path.join(persist_dir, JOURNAL_FILE))
+    compacted = LocalVectorStore(persist_dir=persist_dir)
+    print(f"\n4. After compaction: {compacted.get_stats()}")
+    assert compacted.get_stats()["total_vectors"] == reopened.get_stats()["total_vectors"] == BATCHES * BATCH_SIZE - 8
+    assert top_ids(compacted, nodes[1234].embedding)[0] == "chunk-1234"
+
+    # 5. Automatic compaction once the journal holds as many rows as the compacted files
+    local_vectorstore.COMPACT_MIN_ROWS = 0
+    compacted.add(make_nodes(rng, 100_000, 1000))
+    assert os.path.exists(os.path.join(persist_dir, JOURNAL_FILE))
+    compacted.add(make_nodes(rng, 200_000, 1000))
+    assert not os.path.exists(os.path.join(persist_dir, JOURNAL_FILE))
+    assert LocalVectorStore(persist_dir=persist_dir).get_stats()["total_vectors"] == 1992 + 2000
+    print("\n5. Journal compacted automatically")
+
+    # 6. A reader process reloads once the knowledge-base version changes (upload from another process)
+    version = {"value": "v1"}
+    reader = LocalVectorStore(persist_dir=persist_dir, version_fn=lambda: version["value"])
+    fresh = make_nodes(rng, 300_000, 1)[0]
+    compacted.add([fresh])
+    assert top_ids(reader, fresh.embedding)[0] != "chunk-300000"  # same version: no reload
+    version["value"] = "v2"
+    assert top_ids(reader, fresh.embedding)[0] == "chunk-300000"
+    assert reader.get_stats()["reloads"] == 1 and reader.get_stats()["knowledge_base_version"] == "v2"
+    print(f"\n6. Reader reloaded on version change: {reader.get_stats()}")
+
+    compacted.clear()
+    assert LocalVectorStore(persist_dir=persist_dir).get_stats()["total_vectors"] == 0
+    print("\n7. clear() empties the persisted index")
+
+    print("\n✅ LocalVectorStore searches exactly and persists incrementally")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_local_vectorstore()
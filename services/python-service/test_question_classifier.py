@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test script for the local question classifier rules
+Checks that academic keywords only route to the user's DB record for first-person questions or when no
+policy/document keyword is present, so policy questions like "Điều kiện nhận học bổng" reach rag_search
+"""
+
+import os
+import tempfile
+
+from app.botagent.question_classifier import QuestionClassifier
+
+CASES = [
+    # (message, has_citizen_id, expected strategy)
+    ("Điều kiện nhận học bổng", True, "rag_search"),
+    ("Điều kiện nhận học bổng", False, "rag_search"),
+    ("Quy định tín chỉ", True, "rag_search"),
+    ("Quy định về học kỳ phụ", True, "rag_search"),
+    ("GPA của tôi là bao nhiêu?", True, "call_data_db"),
+    ("Học bổng của tôi có đủ điều kiện không?", True, "call_data_db"),
+    ("tín chỉ tôi đã học", True, "call_data_db"),
+    ("thành tích học tập", True, "call_data_db"),
+    ("Lãi suất vay sinh viên", False, "rag_search"),
+    ("Tôi có thể vay bao nhiêu tiền?", True, "personal"),
+    ("xin chào", False, "direct_answer"),
+    ("cảm ơn bạn", True, "direct_answer"),
+]
+
+
+def test_question_classifier():
+    print("🧪 Testing QuestionClassifier rules")
+    print("=" * 50)
+
+    classifier = QuestionClassifier(log_path=os.path.join(tempfile.mkdtemp(), "classification_log.jsonl"))
+
+    for message, has_citizen_id, expected in CASES:
+        strategy = classifier.classify_by_rules(message, has_citizen_id)
+        print(f"   {message!r} (logged in: {has_citizen_id}) → {strategy}")
+        assert strategy == expected, (message, has_citizen_id, strategy, expected)
+
+        # Full local pipeline agrees (rules decide before the centroid model)
+        result = classifier.classify(message, has_citizen_id)
+        assert result and result["strategy"] == expected and result["stage"] == "rules", (message, result)
+
+    print("\n✅ Policy questions with academic words go to rag_search, the user's own record to call_data_db")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_question_classifier()
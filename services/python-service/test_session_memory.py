@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for persisted chat sessions (ChatSessionStore)
+Simulates a restart (a fresh store over the same disk directory / MongoDB collection) and checks that the
+first turn afterwards continues the stored history instead of overwriting it, in the order RAGBot.chat uses
+(append the user message, then read the history)
+"""
+
+import asyncio
+import tempfile
+from datetime import datetime
+
+from app.botagent.session_memory import ChatSessionStore
+
+KEY = "conv:restart"
+
+
+class InMemoryCollection:
+    """The few chatsessions operations ChatSessionStore uses, with MongoDB's $push/$each/$slice semantics"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def create_index(self, *args, **kwargs):
+        return "expires_at_1"
+
+    async def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        if doc and doc["expires_at"] > query["expires_at"]["$gt"]:
+            return doc
+        return None
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"], "messages": []})
+        push = update["$push"]["messages"]
+        doc["messages"] = (doc["messages"] + push["$each"])[push["$slice"]:]
+        doc.update(update["$set"])
+
+    async def delete_one(self, query):
+        self.docs.pop(query["_id"], None)
+
+
+def make_store(persistence: str, disk_dir: str, collection: InMemoryCollection) -> ChatSessionStore:
+    store = ChatSessionStore(persistence=persistence, disk_dir=disk_dir, max_messages=20)
+    if persistence == "mongodb":
+        async def _collection():
+            return collection
+        store._collection = _collection
+    return store
+
+
+async def chat_turn(store: ChatSessionStore, question: str, answer: str):
+    # Same order as RAGBot.chat
+    await store.append(KEY, "user", question)
+    await store.get_messages(KEY)
+    await store.append(KEY, "assistant", answer)
+
+
+async def test_session_memory():
+    print("🧪 Testing chat session persistence across restarts")
+    print("=" * 50)
+
+    for persistence in ("disk", "mongodb"):
+        disk_dir, collection = tempfile.mkdtemp(), InMemoryCollection()
+
+        before = make_store(persistence, disk_dir, collection)
+        for i in range(3):
+            await chat_turn(before, f"q{i}", f"a{i}")
+
+        # Restart: a new process starts with an empty in-memory store
+        after = make_store(persistence, disk_dir, collection)
+        await after.append(KEY, "user", "q3")
+        history = [message["content"] for message in await after.get_messages(KEY)]
+        print(f"\n{persistence}: history after restart = {history}")
+        assert history == ["q0", "a0", "q1", "a1", "q2", "a2", "q3"], history
+        assert after.get_stats()["restored"] == 1
+
+        # What is stored must also be the full history (another restart sees it)
+        again = make_store(persistence, disk_dir, collection)
+        stored = [message["content"] for message in await again.get_messages(KEY)]
+        assert stored == history, stored
+        if persistence == "mongodb":
+            assert collection.docs[KEY]["expires_at"] > datetime.utcnow()
+
+    print("\n✅ Chat history survives restarts for disk and MongoDB persistence")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    asyncio.run(test_session_memory())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test script for the async web-page loader
+Serves regulation pages from a local HTTP server (ETag on some, Last-Modified on others, a delay per
+request) and checks that pages are fetched concurrently, boilerplate is stripped, sections reach the
+chunker, and that a refresh only downloads the page that changed
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Keep the test offline and away from the real caches
+_tmp_dir = tempfile.mkdtemp()
+os.environ.setdefault("CRAWL_CACHE_DIR", os.path.join(_tmp_dir, "http_cache"))
+
+from app.botagent.web_crawler import WebCrawler, stream_web_chunks
+
+SERVER_LATENCY = 0.3  # seconds per request
+PAGE_COUNT = 6
+
+pages = {}
+requests_served = []
+
+
+def regulation_page(i: int, revision: int = 1) -> str:
+    sections = "".join(
+        f"<h2>PHẦN {s}: Quy định {s} của văn bản {i}</h2>"
+        f"<p>Sinh viên được vay vốn theo quy định số {s}, bản sửa đổi {revision}. Hồ sơ nộp tại trường.</p>"
+        for s in range(1, 4)
+    )
+    return (
+        f"<html><head><title>Văn bản {i}</title><script>var tracking = 1;</script></head><body>"
+        f"<div class='navbar'><a href='/'>Trang chủ</a><a href='/tin-tuc'>Tin tức</a></div>"
+        f"<header>Cổng thông tin</header>"
+        f"<main>{sections}</main>"
+        f"<div id='share-buttons'>Chia sẻ Facebook</div>"
+        f"<footer>Bản quyền 2024</footer></body></html>"
+    )
+
+
+class RegulationHandler(BaseHTTPRequestHandler):
+    """Odd pages carry an ETag, even pages a Last-Modified date"""
+
+    def do_GET(self):
+        time.sleep(SERVER_LATENCY)
+        page = pages.get(self.path)
+        if page is None:
+            self.send_response(404)
+            self.end_headers()
+            requests_served.append((self.path, 404))
+            return
+
+        body = page["html"].encode("utf-8")
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        index = int(self.path.rsplit("/", 1)[-1])
+        if index % 2:
+            not_modified = self.headers.get("If-None-Match") == etag
+            validator = ("ETag", etag)
+        else:
+            not_modified = self.headers.get("If-Modified-Since") == page["last_modified"]
+            validator = ("Last-Modified", page["last_modified"])
+
+        status = 304 if not_modified else 200
+        self.send_response(status)
+        self.send_header(*validator)
+        if not_modified:
+            self.end_headers()
+        else:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        requests_served.append((self.path, status))
+
+    def log_message(self, *args):
+        pass
+
+
+def publish(i: int, revision: int = 1):
+    pages[f"/van-ban/{i}"] = {"html": regulation_page(i, revision), "last_modified": formatdate(time.time() + revision, usegmt=True)}
+
+
+async def test_web_crawler():
+    print("🧪 Testing async web-page loading with HTTP caching")
+    print("=" * 50)
+
+    for i in range(1, PAGE_COUNT + 1):
+        publish(i)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RegulationHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base_url}/van-ban/{i}" for i in range(1, PAGE_COUNT + 1)] + [f"{base_url}/missing"]
+
+    try:
+        # 1. Cold crawl: everything is downloaded, concurrently
+        crawler = WebCrawler(concurrency=PAGE_COUNT + 1)
+        start = time.perf_counter()
+        chunks = [chunk async for chunk in stream_web_chunks(urls, crawler=crawler)]
+        elapsed = time.perf_counter() - start
+        print(f"\n1. Cold crawl: {len(chunks)} chunks in {elapsed:.2f}s (serial would be >= {len(urls) * SERVER_LATENCY:.2f}s), {crawler.stats}")
+
+        assert crawler.stats["fetched"] == PAGE_COUNT and crawler.stats["failed"] == 1, crawler.stats
+        assert elapsed < len(urls) * SERVER_LATENCY / 2, "pages were fetched one at a time"
+        assert len(chunks) == PAGE_COUNT * 3, "each page should be split into its 3 sections"
+        assert {chunk.metadata["section_title"] for chunk in chunks if chunk.metadata["source"] == urls[0]} == {
+            f"PHẦN {s}: Quy định {s} của văn bản 1" for s in range(1, 4)
+        }
+        text = "\n".join(chunk.text for chunk in chunks)
+        for boilerplate in ("Trang chủ", "Cổng thông tin", "Chia sẻ", "Bản quyền", "tracking"):
+            assert boilerplate not in text, f"boilerplate left in content: {boilerplate}"
+
+        # 2. Refresh without changes: every page is revalidated (304), nothing is downloaded
+        requests_served.clear()
+        crawler = WebCrawler()
+        changed = [page async for page in _crawl(crawler, urls, include_unchanged=False)]
+        print(f"2. Refresh: {len(changed)} changed pages, responses {sorted(status for _, status in requests_served)}")
+
+        assert not changed, "unchanged pages were reported as changed"
+        assert crawler.stats["not_modified"] == PAGE_COUNT and crawler.stats["fetched"] == 0, crawler.stats
+
+        # 3. One page (Last-Modified) and one page (ETag) revised: only those two are downloaded again
+        publish(2, revision=2)
+        publish(3, revision=2)
+        crawler = WebCrawler()
+        changed = [page async for page in _crawl(crawler, urls, include_unchanged=False)]
+        print(f"3. After revising 2 pages: changed {sorted(page['url'].rsplit('/', 1)[-1] for page in changed)}, {crawler.stats}")
+
+        assert sorted(page["url"] for page in changed) == [urls[1], urls[2]]
+        assert "bản sửa đổi 2" in changed[0]["document"].text
+        assert crawler.stats["not_modified"] == PAGE_COUNT - 2 and crawler.stats["fetched"] == 2, crawler.stats
+
+        # 4. Unchanged pages can still be read from the cache (to re-chunk the whole set)
+        crawler = WebCrawler()
+        everything = [page async for page in _crawl(crawler, urls, include_unchanged=True)]
+        print(f"4. Full read from cache: {len(everything)} pages, {crawler.stats['bytes_downloaded']} bytes downloaded")
+        assert len(everything) == PAGE_COUNT and crawler.stats["fetched"] == 0
+    finally:
+        server.shutdown()
+
+    print("\n✅ Pages load concurrently, without boilerplate, and refreshes only transfer what changed")
+    print("=" * 50)
+
+
+async def _crawl(crawler: WebCrawler, urls, include_unchanged: bool):
+    async with crawler:
+        async for page in crawler.crawl(urls, include_unchanged):
+            yield page
+
+
+if __name__ == "__main__":
+    asyncio.run(test_web_crawler())